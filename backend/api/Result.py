@@ -18,3 +18,8 @@ class Result(Generic[T]):
             "data": self.data,
             "error": self.error.msg if self.error is not None else None,
         }
+
+    @classmethod
+    def fromJson(cls, result: dict) -> "Result":
+        """Inverse of __json__, used to load a saved controllerData snapshot."""
+        return cls(result["data"], Result.Error(result["error"]) if result["error"] is not None else None)
@@ -2,15 +2,19 @@ import json
 import logging
 import re
 import time
-from datetime import date, datetime, timedelta
-from json import JSONDecodeError
-from math import ceil
+from datetime import datetime, timedelta
 from typing import List
 
 from backend.api.Result import Result
 from backend.api.appd.AppDController import AppdController
 from backend.api.appd.AuthMethod import AuthMethod
-from backend.util.asyncio_utils import AsyncioUtils
+from backend.api.appd.ControllerGateway import ControllerGateway, RetryPolicy
+from backend.api.appd.DashboardStore import DashboardStore
+from backend.api.appd.RequestCoalescer import RequestCoalescer
+from backend.api.appd.ResponseArchive import ResponseArchive
+from backend.api.appd.ResponseCache import ResponseCache
+from backend.util.asyncio_utils import AdaptiveConcurrency, AdmissionLimiter, AsyncioUtils
+from backend.util.json_utils import loadsResponseBody
 from backend.util.stdlib_utils import get_recursively
 
 
@@ -21,18 +25,45 @@ class AppDService:
     def __init__(self,
                  applicationFilter: dict = None,
                  timeRangeMins: int = 1440,
-                 authMethod: AuthMethod = None):
+                 authMethod: AuthMethod = None,
+                 requestsPerSecond: float = None,
+                 concurrentConnections: int = None,
+                 adaptiveConcurrency: bool = False,
+                 retryPolicy: RetryPolicy = None,
+                 responseCache: ResponseCache = None,
+                 dashboardStore: DashboardStore = None,
+                 responseArchive: ResponseArchive = None,
+                 endTime: int = None):
 
         self.applicationFilter = applicationFilter
         self.timeRangeMins = timeRangeMins
-        self.endTime = int(round(time.time() * 1000))
+        # a replayed extraction keeps the time range it was recorded with
+        self.endTime = endTime if endTime is not None else int(round(time.time() * 1000))
         self.startTime = self.endTime - (1 * 60 * self.timeRangeMins * 1000)
         self.totalCallsProcessed = 0
 
         self.authMethod = authMethod
         self.host = authMethod.host
-        self.controller = authMethod.controller
+        # all calls against this controller share one admission limiter, regardless of how deeply they are gathered
+        self.admissionLimiter = AdmissionLimiter(concurrentConnections or authMethod.concurrentConnections, requestsPerSecond)
+        # with adaptive concurrency the connection pool size is the ceiling, the limiter starts at concurrentConnections
+        self.adaptiveConcurrency = AdaptiveConcurrency(self.admissionLimiter, maxLimit=authMethod.concurrentConnections) if adaptiveConcurrency else None
+        # identical requests of different steps are sent once per job
+        self.requestCoalescer = RequestCoalescer()
+        self.controller = ControllerGateway(
+            self.host,
+            authMethod.controller,
+            self.admissionLimiter,
+            self.adaptiveConcurrency,
+            retryPolicy,
+            account=authMethod.account,
+            username=authMethod.username,
+            responseCache=responseCache,
+            responseArchive=responseArchive,
+            requestCoalescer=self.requestCoalescer,
+        )
         self.username = authMethod.username
+        self.dashboardStore = dashboardStore
 
     def getAuthMethod(self) -> AuthMethod:
         return self.authMethod
@@ -41,6 +72,9 @@ class AppDService:
         return {
             "host": self.host,
             "username": self.username,
+            "timeRangeMins": self.timeRangeMins,
+            "startTime": self.startTime,
+            "endTime": self.endTime,
         }
 
     async def loginToController(self) -> Result:
@@ -408,12 +442,9 @@ class AppDService:
         response = await self.controller.getHealthRules(applicationID)
         healthRules = await self.getResultFromResponse(response, debugString)
 
-        healthRuleDetails = []
-        for healthRule in healthRules.data:
-            healthRuleDetails.append(
-                self.controller.getHealthRule(applicationID, healthRule["id"]))
-
-        responses = await AsyncioUtils.gatherWithConcurrency(*healthRuleDetails)
+        responses = await AsyncioUtils.gatherLazily(
+            self.controller.getHealthRule(applicationID, healthRule["id"])
+            for healthRule in healthRules.data)
 
         healthRulesData = []
         for response, healthRule in zip(responses, healthRules.data):
@@ -570,39 +601,26 @@ class AppDService:
         allDashboardsMetadata = await self.getResultFromResponse(response,
                                                                  debugString)
 
-        dashboards = []
-        batch_size = AsyncioUtils.concurrentConnections
-        for i in range(0, len(allDashboardsMetadata.data), batch_size):
-            dashboardsFutures = []
-
-            logging.debug(
-                f"Batch iteration {int(i / batch_size)} of {ceil(len(allDashboardsMetadata.data) / batch_size)}")
-            chunk = allDashboardsMetadata.data[i: i + batch_size]
-
-            for dashboard in chunk:
-                dashboardsFutures.append(
-                    self.controller.getDashboard(dashboard["id"]))
-
-            response = await AsyncioUtils.gatherWithConcurrency(
-                *dashboardsFutures)
-            for dashboard in [
-                await self.getResultFromResponse(response, debugString) for
-                response in response]:
-                dashboards.append(dashboard.data)
-                # logging.info(f'{self.host} - DASHBOARD: '
-                #              f'{dashboard.data["name"]}'
-                #              f' {dashboard.data["name"]}')
-
-        # The above implementation shouldn't be necessary since gatherWithConcurrency uses a semaphore to limit number of concurrent calls.
-        # But on controllers with a large number of dashboards the coroutines will get stuck unless explicitly batched.
-        # The below implementation should work, but doesn't and I'm tired of looking at it. Maybe someone smarter than me can fix it.
-        # Tens of hours wasted here, beware ye who enter.
-        # dashboardFutures = []
-        # for dashboard in allDashboardsMetadata.data:
-        #     dashboardFutures.append(self.controller.getDashboard(dashboard["id"]))
-        # response = await gatherWithConcurrency(*dashboardFutures)
-        # dashboards = [await self.getResultFromResponse(response, debugString) for response in response]
-        # dashboards = [dashboard.data for dashboard in dashboards if dashboard.error is None]
+        # with a dashboard store only dashboards modified since the last run are exported again
+        if self.dashboardStore is not None:
+            dashboards = [self.dashboardStore.get(dashboard["id"], dashboard["modifiedOn"]) for dashboard in allDashboardsMetadata.data]
+        else:
+            dashboards = [None] * len(allDashboardsMetadata.data)
+        staleIndexes = [idx for idx, dashboard in enumerate(dashboards) if dashboard is None]
+
+        response = await AsyncioUtils.gatherLazily(self.controller.getDashboard(allDashboardsMetadata.data[idx]["id"]) for idx in staleIndexes)
+        for idx, response in zip(staleIndexes, response):
+            dashboards[idx] = (await self.getResultFromResponse(response, debugString)).data
+            if self.dashboardStore is not None and "schemaVersion" in dashboards[idx]:
+                dashboardOverview = allDashboardsMetadata.data[idx]
+                self.dashboardStore.put(dashboardOverview["id"], dashboardOverview["modifiedOn"], dashboards[idx])
+
+        if self.dashboardStore is not None and allDashboardsMetadata.error is None:
+            removed = self.dashboardStore.retain([dashboard["id"] for dashboard in allDashboardsMetadata.data])
+            logging.info(
+                f"{self.host} - Dashboards: {len(dashboards) - len(staleIndexes)} unchanged, "
+                f"{len(staleIndexes)} exported, {removed} deleted since last run"
+            )
 
         returnedDashboards = []
         for dashboardSchema, dashboardOverview in zip(dashboards,
@@ -671,10 +689,9 @@ class AppDService:
         if len(agentIDs) == 0:
             return Result([], None)
 
-        futures = [
+        response = await AsyncioUtils.gatherLazily(
             self.controller.getAppServerAgentsMetadata(applicationId, agentId)
-            for agentId in agentIDs]
-        response = await AsyncioUtils.gatherWithConcurrency(*futures)
+            for agentId in agentIDs)
         results = [
             (await self.getResultFromResponse(response, debugString)).data for
             response in response]
@@ -705,6 +722,7 @@ class AppDService:
 
         debugString = f"Gathering App Server Agents Agents List"
         agentFutures = []
+        # the controller limits the number of ids per request, concurrency is left to the admission limiter
         batch_size = 50
         for i in range(0, len(agentIds), batch_size):
             chunk = agentIds[i: i + batch_size]
@@ -762,6 +780,7 @@ class AppDService:
 
         debugString = f"Gathering Machine Agents Agents List"
         agentFutures = []
+        # the controller limits the number of ids per request, concurrency is left to the admission limiter
         batch_size = 50
         for i in range(0, len(agentIds), batch_size):
             chunk = agentIds[i: i + batch_size]
@@ -1105,13 +1124,15 @@ class AppDService:
         logging.debug(f"{self.host} - {debugString}")
         # get the last 24 hours in milliseconds
         lastMonth = self.endTime - (1 * 60 * 60 * 24 * 30 * 1000)
+        # relative to the end of the time range instead of today, so the request is the same when replayed
+        endDay = datetime.fromtimestamp(self.endTime / 1000)
         monthStart = datetime.timestamp(
-            datetime.today().replace(day=1, hour=0, minute=0, second=0,
-                                     microsecond=0))
-        ws = (date.today() - timedelta(date.today().weekday()))
+            endDay.replace(day=1, hour=0, minute=0, second=0,
+                           microsecond=0))
+        ws = (endDay.date() - timedelta(endDay.weekday()))
         weekStart = datetime.timestamp(
-            datetime.today().replace(year=ws.year, month=ws.month, day=ws.day,
-                                     hour=0, minute=0, second=0, microsecond=0))
+            endDay.replace(year=ws.year, month=ws.month, day=ws.day,
+                           hour=0, minute=0, second=0, microsecond=0))
         body = {
             "appId": applicationId,
             "scheduleIds": jobsJson,
@@ -1136,26 +1157,27 @@ class AppDService:
     async def getResultFromResponse(self, response, debugString,
                                     isResponseJSON=True,
                                     isResponseList=True) -> Result:
-        body = (await response.content.read()).decode("ISO-8859-1")
         self.totalCallsProcessed += 1
 
         if response.status_code >= 400:
+            body = response.body.decode("ISO-8859-1")
             msg = f"{self.host} - {debugString} failed with code:{response.status_code} body:{body}"
             try:
-                responseJSON = json.loads(body)
+                responseJSON = loadsResponseBody(response.body)
                 if "message" in responseJSON:
                     msg = f"{self.host} - {debugString} failed with code:{response.status_code} body:{responseJSON['message']}"
-            except JSONDecodeError:
+            except (ValueError, TypeError):
                 pass
             logging.debug(msg)
             return Result([] if isResponseList else {},
                           Result.Error(f"{response.status_code}"))
         if isResponseJSON:
             try:
-                return Result(json.loads(body), None)
-            except JSONDecodeError:
+                return Result(loadsResponseBody(response.body), None)
+            except ValueError:
+                body = response.body.decode("ISO-8859-1")
                 msg = f"{self.host} - {debugString} failed to parse json from body. Returned code:{response.status_code} body:{body}"
                 logging.error(msg)
                 return Result([] if isResponseList else {}, Result.Error(msg))
         else:
-            return Result(body, None)
+            return Result(response.body.decode("ISO-8859-1"), None)
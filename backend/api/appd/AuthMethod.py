@@ -10,7 +10,7 @@ from uplink.auth import BasicAuth, BearerToken
 
 from backend.api.Result import Result
 from backend.api.appd.AppDController import AppdController
-from backend.util.asyncio_utils import AsyncioUtils
+from backend.util.asyncio_utils import DEFAULT_CONCURRENT_CONNECTIONS
 from backend.util.logging_utils import initLogging
 
 
@@ -28,7 +28,8 @@ class AuthMethod():
                  password=None,
                  useProxy=True,
                  verifySsl=True,
-                 controller: AppdController = None):
+                 controller: AppdController = None,
+                 concurrentConnections: int = None):
 
         self.auth_method = auth_method
         self.host = host
@@ -40,6 +41,8 @@ class AuthMethod():
         self.useProxy = useProxy
         self.verifySSL = verifySsl
         self.session = None
+        # connection budget for this controller, set by the Engine for every controller of a job
+        self.concurrentConnections = concurrentConnections or DEFAULT_CONCURRENT_CONNECTIONS
         connection_url = (f'{"https" if ssl else "http"}://{host}:{port}')
 
 
@@ -59,7 +62,7 @@ class AuthMethod():
                 pass
 
             connector = aiohttp.TCPConnector(
-                limit=AsyncioUtils.concurrentConnections, verify_ssl=True)
+                limit=self.concurrentConnections, verify_ssl=True)
 
             self.session = aiohttp.ClientSession(connector=connector,
                                                  trust_env=True,
@@ -373,7 +376,7 @@ async def main():
         pass
 
     connector = aiohttp.TCPConnector(
-        limit=AsyncioUtils.concurrentConnections, verify_ssl=True)
+        limit=DEFAULT_CONCURRENT_CONNECTIONS, verify_ssl=True)
 
     client_session = aiohttp.ClientSession(connector=connector,
                                            trust_env=True,
@@ -0,0 +1,264 @@
+import asyncio
+import inspect
+import logging
+import random
+import time
+from functools import wraps
+
+import aiohttp
+from uplink.builder import ConsumerMethod
+
+from backend.api.appd.AppDController import AppdController
+from backend.api.appd.RequestCoalescer import RequestCoalescer
+from backend.api.appd.ResponseArchive import ResponseArchive
+from backend.api.appd.ResponseCache import ResponseCache
+from backend.util.asyncio_utils import AdaptiveConcurrency, AdmissionLimiter
+
+# responses telling us the controller is overloaded
+OVERLOAD_STATUS_CODES = (429, 503, 504)
+# transient responses worth another attempt
+RETRY_STATUS_CODES = (429, 502, 503, 504)
+
+# metric, event and snapshot queries aggregate over the whole time range and are much slower than configuration calls
+SLOW_ENDPOINTS = {
+    "getMetricData",
+    "getMetricTree",
+    "getApplicationEvents",
+    "getEventCounts",
+    "getSnapshotsWithDataCollector",
+    "getServerAvailability",
+    "getEumPageListViewData",
+    "getEumNetworkRequestList",
+    "getBrowserSnapshots",
+    "getMobileSnapshots",
+    "getSyntheticBillableTime",
+    "getSyntheticSessionData",
+}
+# configuration which rarely changes between runs and doesn't depend on the time range, served from the ResponseCache if enabled
+CACHEABLE_ENDPOINTS = {
+    "getBtMatchRules",
+    "getAppLevelBTConfig",
+    "getDevModeConfig",
+    "getInstrumentationLevel",
+    "getApplicationConfiguration",
+    "getHealthRule",
+    "getDashboard",
+    "getAllCustomExitPoints",
+    "getBackendDiscoveryConfigs",
+    "getAgentConfiguration",
+    "getPagesAndFramesConfig",
+    "getAJAXConfig",
+    "getVirtualPagesConfig",
+    "getMRUMNetworkRequestConfig",
+}
+# POST endpoints which only query, coalesced like GET endpoints. Every other POST is sent each time it is made.
+COALESCED_POST_ENDPOINTS = {
+    "getAllCustomExitPoints",
+    "getBackendDiscoveryConfigs",
+    "getAgentConfiguration",
+    "getServiceEndpointCustomMatchRules",
+    "getServiceEndpointDefaultMatchRules",
+    "getAppServerAgents",
+    "getMachineAgents",
+    "getAppServerAgentsIds",
+    "getMachineAgentsIds",
+}
+# the session headers of a login response are read by the caller, every login is sent
+UNCOALESCED_ENDPOINTS = {"login", "loginOAuth"}
+SLOW_ENDPOINT_TIMEOUT_SECONDS = 300
+ENDPOINT_TIMEOUT_SECONDS = 120
+
+
+def isCoalesced(name: str, consumerMethod: ConsumerMethod) -> bool:
+    if name in UNCOALESCED_ENDPOINTS:
+        return False
+    return consumerMethod._request_definition_builder.method == "GET" or name in COALESCED_POST_ENDPOINTS
+
+
+def isTimeout(exception: BaseException) -> bool:
+    # uplink wraps client errors in ApiError
+    return isinstance(exception, asyncio.TimeoutError) or any(isinstance(arg, asyncio.TimeoutError) for arg in exception.args)
+
+
+def isRetryable(exception: BaseException) -> bool:
+    return isTimeout(exception) or any(isinstance(e, aiohttp.ClientConnectionError) for e in (exception, *exception.args))
+
+
+class JobDeadlineExceeded(Exception):
+    pass
+
+
+class RetryPolicy:
+    """Jittered exponential backoff for transient controller failures, bounded by an optional job deadline."""
+
+    def __init__(self, maxRetries: int = 0, deadline: float = None, baseDelaySeconds: float = 1.0, maxDelaySeconds: float = 30.0):
+        self.maxRetries = maxRetries
+        # time.monotonic() after which no request is started
+        self.deadline = deadline
+        self.baseDelaySeconds = baseDelaySeconds
+        self.maxDelaySeconds = maxDelaySeconds
+        self.totalRetries = 0
+
+    def backoff(self, attempt: int, retryAfter: str = None) -> float:
+        # full jitter, so requests failing together don't come back together
+        delay = random.uniform(0, min(self.maxDelaySeconds, self.baseDelaySeconds * 2**attempt))
+        if retryAfter is not None and retryAfter.isdigit():
+            delay = max(delay, min(self.maxDelaySeconds, int(retryAfter)))
+        return delay
+
+    def allowsRetry(self, attempt: int, delay: float) -> bool:
+        if attempt >= self.maxRetries:
+            return False
+        return self.deadline is None or time.monotonic() + delay < self.deadline
+
+    def deadlineExceeded(self) -> bool:
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def clipTimeout(self, timeout: float) -> float:
+        if self.deadline is None:
+            return timeout
+        if self.deadlineExceeded():
+            raise JobDeadlineExceeded("Job deadline exceeded")
+        return min(timeout, self.deadline - time.monotonic())
+
+
+class BufferedResponse:
+    """Controller response whose body has already been read."""
+
+    def __init__(self, status_code: int, headers, body: bytes):
+        self.status_code = status_code
+        self.headers = headers
+        self.body = body
+
+
+class ControllerGateway:
+    """
+    Proxy in front of an AppdController through which every AppDService call is made.
+    Each endpoint call holds a slot of the AdmissionLimiter until its body is read, so a response never keeps
+    a pooled connection busy while waiting for the rest of a gather. Transient failures are retried with backoff,
+    without holding a slot. Identical GET requests and query POSTs are coalesced by the RequestCoalescer.
+    Any other attribute is passed through.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        controller: AppdController,
+        admissionLimiter: AdmissionLimiter,
+        adaptiveConcurrency: AdaptiveConcurrency = None,
+        retryPolicy: RetryPolicy = None,
+        account: str = None,
+        username: str = None,
+        responseCache: ResponseCache = None,
+        responseArchive: ResponseArchive = None,
+        requestCoalescer: RequestCoalescer = None,
+    ):
+        object.__setattr__(self, "host", host)
+        object.__setattr__(self, "account", account)
+        object.__setattr__(self, "username", username)
+        object.__setattr__(self, "responseCache", responseCache)
+        object.__setattr__(self, "responseArchive", responseArchive)
+        object.__setattr__(self, "requestCoalescer", requestCoalescer)
+        object.__setattr__(self, "_controller", controller)
+        object.__setattr__(self, "admissionLimiter", admissionLimiter)
+        object.__setattr__(self, "adaptiveConcurrency", adaptiveConcurrency)
+        object.__setattr__(self, "retryPolicy", retryPolicy or RetryPolicy())
+
+    def __getattr__(self, name):
+        attribute = getattr(self._controller, name)
+        consumerMethod = inspect.getattr_static(type(self._controller), name, None)
+        if not isinstance(consumerMethod, ConsumerMethod):
+            return attribute
+
+        timeout = SLOW_ENDPOINT_TIMEOUT_SECONDS if name in SLOW_ENDPOINTS else ENDPOINT_TIMEOUT_SECONDS
+        coalesced = self.requestCoalescer is not None and isCoalesced(name, consumerMethod)
+
+        @wraps(attribute)
+        async def admitted(*args, **kwargs) -> BufferedResponse:
+            if self.responseArchive is not None and self.responseArchive.replaying:
+                recorded = self.responseArchive.lookup(self.host, name, args, kwargs)
+                if recorded is None:
+                    logging.warning(f"{self.host} - {name} was not recorded in {self.responseArchive.path}")
+                    return BufferedResponse(404, {}, b"")
+                status, body = recorded
+                return BufferedResponse(status, {}, body)
+
+            if not coalesced:
+                return await fetchedAndRecorded(*args, **kwargs)
+            return await self.requestCoalescer.fetch(name, args, kwargs, lambda: fetchedAndRecorded(*args, **kwargs))
+
+        async def fetchedAndRecorded(*args, **kwargs) -> BufferedResponse:
+            response = await cachedOrFetched(*args, **kwargs)
+            if self.responseArchive is not None:
+                self.responseArchive.record(self.host, name, args, kwargs, response.status_code, response.body)
+            return response
+
+        async def cachedOrFetched(*args, **kwargs) -> BufferedResponse:
+            if self.responseCache is None or name not in CACHEABLE_ENDPOINTS:
+                return await withRetries(*args, **kwargs)
+
+            key = ResponseCache.key(self.host, self.account, self.username, name, args, kwargs)
+            cached = self.responseCache.get(key)
+            if cached is not None:
+                logging.debug(f"{self.host} - {name} served from response cache")
+                status, body = cached
+                return BufferedResponse(status, {}, body)
+            response = await withRetries(*args, **kwargs)
+            if response.status_code == 200:
+                self.responseCache.put(key, response.status_code, response.body)
+            return response
+
+        async def withRetries(*args, **kwargs) -> BufferedResponse:
+            attempt = 0
+            while True:
+                try:
+                    response = await self._attempt(attribute, args, kwargs, timeout)
+                except Exception as e:
+                    if not isRetryable(e):
+                        raise
+                    delay = self.retryPolicy.backoff(attempt)
+                    if not self.retryPolicy.allowsRetry(attempt, delay):
+                        if isTimeout(e) and self.retryPolicy.deadlineExceeded():
+                            # timeout was clipped by the deadline
+                            raise JobDeadlineExceeded("Job deadline exceeded") from e
+                        raise
+                    failure = "timed out" if isTimeout(e) else f"failed with {e}"
+                else:
+                    if response.status_code not in RETRY_STATUS_CODES:
+                        return response
+                    delay = self.retryPolicy.backoff(attempt, response.headers.get("Retry-After"))
+                    if not self.retryPolicy.allowsRetry(attempt, delay):
+                        return response
+                    failure = f"failed with code:{response.status_code}"
+
+                attempt += 1
+                self.retryPolicy.totalRetries += 1
+                logging.warning(f"{self.host} - {name} {failure}, retry {attempt}/{self.retryPolicy.maxRetries} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+        return admitted
+
+    async def _attempt(self, attribute, args, kwargs, timeout: float) -> BufferedResponse:
+        async with self.admissionLimiter:
+            startTime = time.monotonic()
+            try:
+                response, body = await asyncio.wait_for(self._send(attribute, args, kwargs), self.retryPolicy.clipTimeout(timeout))
+            except Exception as e:
+                if self.adaptiveConcurrency is not None and isTimeout(e):
+                    self.adaptiveConcurrency.observe(time.monotonic() - startTime, overloaded=True)
+                raise
+        if self.adaptiveConcurrency is not None:
+            self.adaptiveConcurrency.observe(time.monotonic() - startTime, overloaded=response.status_code in OVERLOAD_STATUS_CODES)
+        return BufferedResponse(response.status_code, response.headers, body)
+
+    @staticmethod
+    async def _send(attribute, args, kwargs):
+        response = await attribute(*args, **kwargs)
+        try:
+            body = await response.read()
+        finally:
+            response.release()
+        return response, body
+
+    def __setattr__(self, name, value):
+        setattr(self._controller, name, value)
@@ -0,0 +1,57 @@
+import json
+import logging
+import os
+
+
+class DashboardStore:
+    """
+    Dashboard exports of one controller persisted between runs.
+    An export is reused as long as the modifiedOn of its dashboard is unchanged.
+    """
+
+    def __init__(self, storeDir: str):
+        self.storeDir = storeDir
+        self.indexPath = os.path.join(storeDir, "index.json")
+        os.makedirs(storeDir, exist_ok=True)
+        try:
+            with open(self.indexPath, encoding="utf-8") as f:
+                # dashboard id -> modifiedOn of the stored export
+                self.index = json.load(f)
+        except (OSError, ValueError):
+            self.index = {}
+
+    def get(self, dashboardId, modifiedOn) -> dict:
+        """Returns the stored export of the dashboard if it is still current, otherwise None."""
+        if self.index.get(str(dashboardId)) != modifiedOn:
+            return None
+        try:
+            with open(self._path(dashboardId), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, dashboardId, modifiedOn, dashboard: dict):
+        with open(self._path(dashboardId), "w", encoding="utf-8") as f:
+            json.dump(dashboard, f)
+        self.index[str(dashboardId)] = modifiedOn
+
+    def retain(self, dashboardIds: list) -> int:
+        """Drops dashboards deleted on the controller and persists the index. Returns the number of dropped dashboards."""
+        keep = {str(dashboardId) for dashboardId in dashboardIds}
+        removed = [dashboardId for dashboardId in self.index if dashboardId not in keep]
+        for dashboardId in removed:
+            del self.index[dashboardId]
+            try:
+                os.remove(self._path(dashboardId))
+            except OSError:
+                pass
+
+        tmpPath = f"{self.indexPath}.tmp"
+        with open(tmpPath, "w", encoding="utf-8") as f:
+            json.dump(self.index, f)
+        os.replace(tmpPath, self.indexPath)
+        logging.debug(f"Dashboard store {self.storeDir} holds {len(self.index)} dashboards")
+        return len(removed)
+
+    def _path(self, dashboardId) -> str:
+        return os.path.join(self.storeDir, f"{dashboardId}.json")
@@ -0,0 +1,62 @@
+import asyncio
+
+from backend.api.appd.ResponseArchive import ResponseArchive
+
+# larger bodies (e.g. metric data of big applications) are shared while in flight but not kept for the rest of the job
+MEMO_MAX_BODY_BYTES = 1024 * 1024
+MEMO_MAX_BYTES = 256 * 1024 * 1024
+
+
+class RequestCoalescer:
+    """
+    Single-flight layer in front of the read-only calls of one controller, keyed by endpoint and arguments.
+    Identical requests made while one is in flight share its response, successful responses are memoized for the
+    rest of the job so steps requesting the same configuration (e.g. tiers, health rules, agent configurations)
+    only fetch it once. The memo is bounded by MEMO_MAX_BODY_BYTES and MEMO_MAX_BYTES and cleared by the Engine
+    once the extraction of the controller finished.
+    """
+
+    def __init__(self, maxBodyBytes: int = MEMO_MAX_BODY_BYTES, maxBytes: int = MEMO_MAX_BYTES):
+        self.maxBodyBytes = maxBodyBytes
+        self.maxBytes = maxBytes
+        self.memoizedBytes = 0
+        # requests which joined an identical request in flight
+        self.shared = 0
+        # requests served from the memo
+        self.memoHits = 0
+        # request key -> task fetching the response
+        self._inFlight = {}
+        # request key -> response
+        self._memo = {}
+
+    async def fetch(self, endpoint: str, args: tuple, kwargs: dict, fetchResponse):
+        """Returns the response of fetchResponse(), shared with identical requests."""
+        key = ResponseArchive.requestKey(endpoint, args, kwargs)
+        memoized = self._memo.get(key)
+        if memoized is not None:
+            self.memoHits += 1
+            return memoized
+
+        task = self._inFlight.get(key)
+        if task is None:
+            task = self._inFlight[key] = asyncio.ensure_future(fetchResponse())
+            task.add_done_callback(lambda done: self._complete(key, done))
+        else:
+            self.shared += 1
+        # a cancelled caller doesn't cancel the request for the others waiting on it
+        return await asyncio.shield(task)
+
+    def _complete(self, key: str, task: asyncio.Future):
+        del self._inFlight[key]
+        if task.cancelled() or task.exception() is not None:
+            return
+        response = task.result()
+        size = len(response.body)
+        if response.status_code == 200 and size <= self.maxBodyBytes and self.memoizedBytes + size <= self.maxBytes:
+            self._memo[key] = response
+            self.memoizedBytes += size
+
+    def clearMemo(self):
+        """Drops the memoized responses, requests in flight are still shared."""
+        self._memo.clear()
+        self.memoizedBytes = 0
@@ -0,0 +1,68 @@
+import gzip
+import json
+import logging
+
+
+class ResponseArchive:
+    """
+    Gzipped JSON lines archive of every controller response of a job, written with --record and served with --replay.
+    The first line holds the extraction time range of each controller, so replayed requests are built exactly as recorded.
+    Every other line holds one response, keyed by host, endpoint and arguments.
+    """
+
+    FILE_NAME = "responses.jsonl.gz"
+
+    def __init__(self, path: str):
+        self.path = path
+        self.replaying = False
+        # host -> {"startTime": ..., "endTime": ...}
+        self.controllers = {}
+        # host -> request key -> (status, body)
+        self.responses = {}
+        self._file = None
+
+    @staticmethod
+    def requestKey(endpoint: str, args: tuple, kwargs: dict) -> str:
+        return json.dumps([endpoint, args, sorted(kwargs.items())], default=str)
+
+    def startRecording(self, controllers: dict):
+        self.controllers = controllers
+        self._file = gzip.open(self.path, "wt", encoding="utf-8")
+        self._file.write(json.dumps({"controllers": controllers}) + "\n")
+        logging.info(f"Recording controller responses to {self.path}")
+
+    def record(self, host: str, endpoint: str, args: tuple, kwargs: dict, status: int, body: bytes):
+        if self._file is None:
+            return
+        record = {
+            "host": host,
+            "request": ResponseArchive.requestKey(endpoint, args, kwargs),
+            "status": status,
+            # ISO-8859-1 maps every byte to one character, so the body survives the round trip through JSON unchanged
+            "body": body.decode("ISO-8859-1"),
+        }
+        self._file.write(json.dumps(record) + "\n")
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    @classmethod
+    def load(cls, path: str) -> "ResponseArchive":
+        archive = cls(path)
+        archive.replaying = True
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            archive.controllers = json.loads(f.readline())["controllers"]
+            for line in f:
+                record = json.loads(line)
+                archive.responses.setdefault(record["host"], {})[record["request"]] = (
+                    record["status"],
+                    record["body"].encode("ISO-8859-1"),
+                )
+        logging.info(f"Replaying {sum(len(responses) for responses in archive.responses.values())} controller responses from {path}")
+        return archive
+
+    def lookup(self, host: str, endpoint: str, args: tuple, kwargs: dict) -> (int, bytes):
+        """Returns the recorded (status, body) or None."""
+        return self.responses.get(host, {}).get(ResponseArchive.requestKey(endpoint, args, kwargs))
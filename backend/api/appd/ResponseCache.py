@@ -0,0 +1,84 @@
+import hashlib
+import json
+import logging
+import os
+import time
+
+
+class ResponseCache:
+    """
+    Content addressed on-disk cache of successful controller responses.
+    Entries are keyed by controller, account and user, so users with different permissions never share responses.
+    Entries expire after ttlSeconds. When the cache grows past maxBytes the least recently used entries are evicted,
+    a hit refreshes the modification time of its file so it is used as the access time.
+    """
+
+    def __init__(self, cacheDir: str, ttlSeconds: float, maxBytes: int):
+        self.cacheDir = cacheDir
+        self.ttlSeconds = ttlSeconds
+        self.maxBytes = maxBytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.cacheDir, exist_ok=True)
+        self.sizeBytes = sum(entry.stat().st_size for entry in os.scandir(self.cacheDir) if entry.is_file())
+        self.evict()
+
+    @staticmethod
+    def key(host: str, account: str, username: str, endpoint: str, args: tuple, kwargs: dict) -> str:
+        request = json.dumps([host, account, username, endpoint, args, sorted(kwargs.items())], default=str)
+        return hashlib.sha256(request.encode()).hexdigest()
+
+    def get(self, key: str) -> (int, bytes):
+        """Returns the cached (status, body) or None."""
+        path = os.path.join(self.cacheDir, key)
+        try:
+            with open(path, "rb") as f:
+                header = json.loads(f.readline())
+                body = f.read()
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+
+        if time.time() - header["storedAt"] > self.ttlSeconds:
+            self._remove(path)
+            self.misses += 1
+            return None
+
+        os.utime(path)
+        self.hits += 1
+        return header["status"], body
+
+    def put(self, key: str, status: int, body: bytes):
+        path = os.path.join(self.cacheDir, key)
+        tmpPath = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmpPath, "wb") as f:
+                f.write(json.dumps({"status": status, "storedAt": time.time()}).encode() + b"\n")
+                f.write(body)
+            previousSize = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmpPath, path)
+        except OSError as e:
+            logging.warning(f"Unable to write response cache entry {path}: {e}")
+            return
+        self.sizeBytes += os.path.getsize(path) - previousSize
+        if self.sizeBytes > self.maxBytes:
+            self.evict()
+
+    def evict(self):
+        """Removes least recently used entries until the cache is below 90% of maxBytes."""
+        if self.sizeBytes <= self.maxBytes:
+            return
+        entries = sorted((entry for entry in os.scandir(self.cacheDir) if entry.is_file()), key=lambda entry: entry.stat().st_mtime)
+        for entry in entries:
+            if self.sizeBytes <= self.maxBytes * 0.9:
+                break
+            self._remove(entry.path)
+        logging.debug(f"Evicted response cache entries, size is now {self.sizeBytes} bytes")
+
+    def _remove(self, path: str):
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+            self.sizeBytes -= size
+        except OSError:
+            pass
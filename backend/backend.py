@@ -16,10 +16,71 @@ from backend.util.logging_utils import initLogging
 @click.option("-u", "--username", default=None, hidden=True)
 @click.option("-p", "--password", default=None, hidden=True)
 @click.option("-a", "--auth-method", default=None, hidden=True)
+@click.option("--parallel-controllers", is_flag=True, help="Extract all controllers of the job in parallel, each with its own connection budget")
+@click.option("--requests-per-second", type=float, default=None, help="Maximum number of requests started per second against each controller")
+@click.option("--adaptive-concurrency", is_flag=True, help="Adjust concurrent requests per controller to its latency and overload responses")
+@click.option("--max-retries", type=int, default=3, help="Retries of controller calls failing with 429/502/503/504, timeouts or connection errors")
+@click.option("--job-deadline-mins", type=float, default=None, help="Stop retrying and abort the job when it has run for this many minutes")
+@click.option("--response-cache", is_flag=True, help="Cache controller configuration responses on disk and reuse them in later runs")
+@click.option("--response-cache-ttl-mins", type=float, default=10, help="How long cached responses are reused")
+@click.option("--response-cache-max-mb", type=int, default=512, help="Size of the response cache before least recently used entries are evicted")
+@click.option("--incremental-dashboards", is_flag=True, help="Only export dashboards modified since the last run, reuse the rest from disk")
+@click.option("--record", is_flag=True, help="Record every controller response of the job for later --replay")
+@click.option("--replay", is_flag=True, help="Run the job against the responses recorded with --record, without contacting the controllers")
+@click.option("--analyze-only", is_flag=True, help="Rerun analysis and reports on the controllerData snapshot of the last run, without contacting the controllers")
+@click.option("--compact-snapshot", is_flag=True, help="Write controllerData as gzipped JSON lines to controllerData.jsonl.gz instead of controllerData.json")
+@click.option("--report-workers", type=click.IntRange(min=1), default=1, help="Render report workbooks and the presentation in this many worker processes")
 @coro
-async def main(job_file: str, thresholds_file: str, debug, concurrent_connections: int, username: str, password: str, auth_method: str):
+async def main(
+    job_file: str,
+    thresholds_file: str,
+    debug,
+    concurrent_connections: int,
+    username: str,
+    password: str,
+    auth_method: str,
+    parallel_controllers: bool,
+    requests_per_second: float,
+    adaptive_concurrency: bool,
+    max_retries: int,
+    job_deadline_mins: float,
+    response_cache: bool,
+    response_cache_ttl_mins: float,
+    response_cache_max_mb: int,
+    incremental_dashboards: bool,
+    record: bool,
+    replay: bool,
+    analyze_only: bool,
+    compact_snapshot: bool,
+    report_workers: int,
+):
     initLogging(debug)
-    engine = Engine(job_file, thresholds_file, concurrent_connections, username, password, auth_method)
+    if record and replay:
+        raise click.UsageError("--record and --replay are mutually exclusive")
+    if analyze_only and (record or replay):
+        raise click.UsageError("--analyze-only can't be combined with --record or --replay")
+    engine = Engine(
+        job_file,
+        thresholds_file,
+        concurrent_connections,
+        username,
+        password,
+        auth_method,
+        parallel_controllers,
+        requests_per_second,
+        adaptive_concurrency,
+        max_retries,
+        job_deadline_mins,
+        response_cache,
+        response_cache_ttl_mins,
+        response_cache_max_mb,
+        incremental_dashboards,
+        record,
+        replay,
+        analyze_only,
+        report_workers,
+        compact_snapshot,
+    )
     await engine.run()
 
 
@@ -1,6 +1,5 @@
 import json
 import logging
-import math
 import os
 import sys
 import time
@@ -14,6 +13,13 @@ import requests
 
 from backend.api.appd.AppDService import AppDService
 from backend.api.appd.AuthMethod import AuthMethod
+from backend.api.appd.ControllerGateway import JobDeadlineExceeded, RetryPolicy
+from backend.api.appd.DashboardStore import DashboardStore
+from backend.api.appd.ResponseArchive import ResponseArchive
+from backend.api.appd.ResponseCache import ResponseCache
+from backend.core.StepScheduler import StepScheduler
+from backend.extractionSteps.MetricQueryPlanner import MetricQueryPlanner
+from backend.extractionSteps.ThresholdTable import ThresholdTable
 from backend.extractionSteps.general.ControllerLevelDetails import ControllerLevelDetails
 from backend.extractionSteps.general.CustomMetrics import CustomMetrics
 from backend.extractionSteps.general.Synthetics import Synthetics
@@ -34,10 +40,11 @@ from backend.extractionSteps.maturityAssessment.brum.OverallAssessmentBRUM impor
 from backend.extractionSteps.maturityAssessment.mrum.HealthRulesAndAlertingMRUM import HealthRulesAndAlertingMRUM
 from backend.extractionSteps.maturityAssessment.mrum.NetworkRequestsMRUM import NetworkRequestsMRUM
 from backend.extractionSteps.maturityAssessment.mrum.OverallAssessmentMRUM import OverallAssessmentMRUM
+from backend.output.AnalysisResults import AnalysisResults
 from backend.output.Archiver import Archiver
+from backend.output.ControllerDataSnapshot import ControllerDataSnapshot
 from backend.output.PostProcessReport import PostProcessReport
-# from output.presentations.cxPpt import createCxPpt
-from backend.output.presentations.cxPptTemplate import createCxPpt as createCxPptTemplate
+from backend.output.ReportRenderer import ReportRenderer
 from backend.output.reports.AgentMatrixReport import AgentMatrixReport
 from backend.output.reports.ConfigurationAnalysisReport import ConfigurationAnalysisReport
 from backend.output.reports.CustomMetricsReport import CustomMetricsReport
@@ -47,12 +54,18 @@ from backend.output.reports.MaturityAssessmentReport import MaturityAssessmentRe
 from backend.output.reports.MaturityAssessmentReportRaw import RawMaturityAssessmentReport
 from backend.output.reports.SyntheticsReport import SyntheticsReport
 from backend.util.asyncio_utils import AsyncioUtils
-from backend.util.stdlib_utils import base64Decode, base64Encode, isBase64, jsonEncoder
+from backend.util.json_utils import JSON_BACKEND
+from backend.util.stdlib_utils import base64Decode, base64Encode, formatSize, isBase64
 
 logger = logging.getLogger(__name__.split('.')[-1])
 
 class Engine:
-    def __init__(self, jobFileName: str, thresholdsFileName: str, concurrentConnections: int, user_name: str, password: str, auth_method : str):
+    def __init__(self, jobFileName: str, thresholdsFileName: str, concurrentConnections: int, user_name: str, password: str, auth_method : str,
+                 parallelControllers: bool = False, requestsPerSecond: float = None, adaptiveConcurrency: bool = False,
+                 maxRetries: int = 3, jobDeadlineMins: float = None,
+                 responseCache: bool = False, responseCacheTtlMins: float = 10, responseCacheMaxMb: int = 512,
+                 incrementalDashboards: bool = False, record: bool = False, replay: bool = False, analyzeOnly: bool = False,
+                 reportWorkers: int = 1, compactSnapshot: bool = False):
 
         # should we run the configuration analysis report in post-processing?
         self.controllers = []
@@ -100,23 +113,35 @@ class Engine:
         self.job = json.loads(open(job_file_path).read())
         self.thresholds = json.loads(open(thresholds_file_path).read())
 
-        try:
-            response = requests.request(
-                "GET",
-                "https://api.github.com/repos/appdynamics/config-assessment-tool/tags",
-                verify=all([job.get("verifySsl", True)] for job in self.job),
-                timeout=5,
-            )
-            latestTag = None
-            if not response.ok:
-                logger.warning(f"Unable to get latest tag from https://api.github.com/repos/appdynamics/config-assessment-tool/tags")
+        # replayed and analyze-only runs don't touch the network
+        self.analyzeOnly = analyzeOnly
+        self.responseArchive = None
+        responseArchivePath = os.path.join(job_output_dir, ResponseArchive.FILE_NAME)
+        if replay:
+            if not Path(responseArchivePath).exists():
+                logger.error(f"No recorded responses found at {responseArchivePath}. Run the job with --record first. Aborting.")
+                sys.exit(1)
+            self.responseArchive = ResponseArchive.load(responseArchivePath)
+        elif not analyzeOnly:
+            self.checkLatestVersion()
+        if record:
+            self.responseArchive = ResponseArchive(responseArchivePath)
+            if incrementalDashboards:
+                logger.warning("Dashboards served from the dashboard store would be missing from the recording, ignoring --incremental-dashboards.")
+                incrementalDashboards = False
+
+        # When extracting controllers in parallel each controller gets its own connection budget, so a slow
+        # On-Premise controller no longer caps the connections used against SaaS controllers in the same job.
+        self.parallelControllers = parallelControllers
+        self.controllerConnections = {}
+        for controller in self.job:
+            if controller.get("concurrentConnections") is not None:
+                connections = controller["concurrentConnections"]
+            elif concurrentConnections is not None:
+                connections = concurrentConnections
             else:
-                latestTag = json.loads(response.text)[0]["name"]
-                if latestTag != self.codebaseVersion:
-                    logger.warning(f"You are using an outdated version of the software. Current {self.codebaseVersion} Latest {latestTag}")
-                    logger.warning("You can get the latest version from https://github.com/Appdynamics/config-assessment-tool/releases")
-        except requests.exceptions.RequestException:
-            logger.warning(f"Unable to get latest tag from https://api.github.com/repos/appdynamics/config-assessment-tool/tags")
+                connections = 50 if "saas.appdynamics.com" in controller["host"] else 10
+            self.controllerConnections[controller["host"]] = AsyncioUtils.clampConcurrentConnections(connections)
 
         # Default concurrent connections to 10 for On-Premise controllers
         if any(job for job in self.job if "saas.appdynamics.com" not in job["host"]):
@@ -125,7 +150,11 @@ class Engine:
         else:
             logger.info(f"SaaS controller detected. It is recommended to use a maximum of 50 concurrent connections.")
             concurrentConnections = 50 if concurrentConnections is None else concurrentConnections
-        AsyncioUtils.init(concurrentConnections)
+        concurrentConnections = AsyncioUtils.clampConcurrentConnections(concurrentConnections)
+        if self.parallelControllers:
+            logger.info(f"Extracting controllers in parallel with per-controller connection budgets: {self.controllerConnections}")
+        else:
+            logger.info(f"Setting concurrent connections to {concurrentConnections}.")
 
         # Convert passwords to base64 if they aren't already
         for controller in self.job:
@@ -155,7 +184,32 @@ class Engine:
                 indent=4,
             )
 
+        # shared by all controllers, the deadline is counted from the start of the job
+        self.retryPolicy = RetryPolicy(
+            maxRetries=maxRetries,
+            deadline=time.monotonic() + jobDeadlineMins * 60 if jobDeadlineMins else None,
+        )
+        self.jobDeadlineMins = jobDeadlineMins
+        logger.debug(f"Parsing controller responses with {JSON_BACKEND}")
+
+        # configuration responses are shared between jobs, so the cache lives next to the job output directories
+        self.responseCache = None
+        if responseCache:
+            self.responseCache = ResponseCache(
+                os.path.join(self.output_dir, ".cache", "responses"),
+                ttlSeconds=responseCacheTtlMins * 60,
+                maxBytes=responseCacheMaxMb * 1024 * 1024,
+            )
+            logger.info(f"Using response cache for configuration endpoints (ttl {responseCacheTtlMins:g} minutes, max {responseCacheMaxMb}MB)")
+
         for controller in self.job:
+            if replay and controller["host"] not in self.responseArchive.controllers:
+                logger.error(f'Controller {controller["host"]} was not recorded in {responseArchivePath}. Aborting.')
+                sys.exit(1)
+            if self.parallelControllers or "concurrentConnections" in controller:
+                connections = self.controllerConnections[controller["host"]]
+            else:
+                connections = concurrentConnections
 
             if controller.get("authType") is None:
                 logger.warn(f'\'authType\' is not '
@@ -180,13 +234,25 @@ class Engine:
                 password=password if password else base64Decode(controller[
                                                                     "pwd"])[len("CAT-ENCODED-") :],
                 verifySsl=controller.get("verifySsl", True),
-                useProxy=controller.get("useProxy", False)
+                useProxy=controller.get("useProxy", False),
+                # adaptive concurrency may grow the limit up to the size of the connection pool
+                concurrentConnections=100 if adaptiveConcurrency else connections,
             )
 
             controllerService = AppDService(
                 applicationFilter=controller.get("applicationFilter", None),
                 timeRangeMins=controller.get("timeRangeMins", 1440),
-                authMethod=authMethod
+                authMethod=authMethod,
+                requestsPerSecond=requestsPerSecond,
+                concurrentConnections=connections,
+                adaptiveConcurrency=adaptiveConcurrency,
+                retryPolicy=self.retryPolicy,
+                responseCache=self.responseCache,
+                dashboardStore=DashboardStore(
+                    os.path.join(self.output_dir, ".cache", "dashboards", f'{controller["host"]}-{controller["account"]}')
+                ) if incrementalDashboards else None,
+                responseArchive=self.responseArchive,
+                endTime=self.responseArchive.controllers[controller["host"]]["endTime"] if replay else None,
             )
 
 
@@ -228,26 +294,64 @@ class Engine:
             HealthRulesAndAlertingMRUM(),
             OverallAssessmentMRUM(),
         ]
+        self.stepScheduler = self.createStepScheduler([*self.otherSteps, *self.maturityAssessmentSteps])
+        # the maturity assessment workbooks of each component type are independent of each other
         self.reports = [
-            MaturityAssessmentReport(),
-            RawMaturityAssessmentReport(),
+            *[MaturityAssessmentReport((componentType,)) for componentType in ["apm", "brum", "mrum"]],
+            *[RawMaturityAssessmentReport((componentType,)) for componentType in ["apm", "brum", "mrum"]],
             AgentMatrixReport(),
             CustomMetricsReport(),
             LicenseReport(),
             SyntheticsReport(),
             DashboardReport(),
         ]
+        self.reportRenderer = ReportRenderer(reportWorkers)
+        if reportWorkers > 1:
+            logger.info(f"Rendering reports in {reportWorkers} worker processes")
+        self.snapshot = ControllerDataSnapshot(compact=compactSnapshot)
+        self.snapshotTime = 0
+
+    def checkLatestVersion(self):
+        try:
+            response = requests.request(
+                "GET",
+                "https://api.github.com/repos/appdynamics/config-assessment-tool/tags",
+                verify=all([job.get("verifySsl", True)] for job in self.job),
+                timeout=5,
+            )
+            latestTag = None
+            if not response.ok:
+                logger.warning(f"Unable to get latest tag from https://api.github.com/repos/appdynamics/config-assessment-tool/tags")
+            else:
+                latestTag = json.loads(response.text)[0]["name"]
+                if latestTag != self.codebaseVersion:
+                    logger.warning(f"You are using an outdated version of the software. Current {self.codebaseVersion} Latest {latestTag}")
+                    logger.warning("You can get the latest version from https://github.com/Appdynamics/config-assessment-tool/releases")
+        except requests.exceptions.RequestException:
+            logger.warning(f"Unable to get latest tag from https://api.github.com/repos/appdynamics/config-assessment-tool/tags")
 
     async def run(self):
         startTime = time.monotonic()
 
         try:
             await self.validateThresholdsFile()
-            await self.initControllers()
-            await self.process()
+            if self.analyzeOnly:
+                self.loadSnapshot()
+            else:
+                await self.initControllers()
+                if self.responseArchive is not None and not self.responseArchive.replaying:
+                    self.responseArchive.startRecording(
+                        {controller.host: {"startTime": controller.startTime, "endTime": controller.endTime} for controller in self.controllers}
+                    )
+                await self.extract()
+            self.analyze()
+            self.writeSnapshot()
+            self.report()
             await self.postProcess()
             await self.runPlugins()
             self.finalize(startTime)
+        except JobDeadlineExceeded:
+            logger.error(f"Job did not finish within its deadline of {self.jobDeadlineMins} minutes. Aborting.")
         except Exception as e:
             # catch exceptions here, so we can terminate coroutines before program exit
             logger.error("".join(traceback.TracebackException.from_exception(e).format()))
@@ -276,7 +380,8 @@ class Engine:
             "jobFileName": self.jobFileName,
             "outputDir": os.path.join(self.output_dir, self.jobFileName),
             "controllerData": self.controllerData,
-            "controllers": self.controllers
+            "controllers": self.controllers,
+            "analysisResults": AnalysisResults(self.controllerData, self.maturityAssessmentSteps),
         }
 
         for plugin_name in plugin_folders:
@@ -355,6 +460,17 @@ class Engine:
                 logger.debug(traceback.format_exc())
 
     async def initControllers(self) -> ([AppDService], str):
+        if self.responseArchive is not None and self.responseArchive.replaying:
+            logger.info(f"Replaying recorded responses for Job - {self.jobFileName}, skipping Controller Login(s)")
+        else:
+            await self.loginToControllers()
+
+        for idx, controller in enumerate(self.controllers):
+            self.controllerData[controller.host] = OrderedDict()
+            hostData = self.controllerData[controller.host]
+            hostData["controller"] = controller
+
+    async def loginToControllers(self):
         logger.info(f"Validating Controller Login(s) for Job - {self.jobFileName} ")
         loginFutures = [controller.getAuthMethod().authenticate() for controller in
                         self.controllers]
@@ -362,12 +478,6 @@ class Engine:
         if any(login.error is not None for login in loginResults):
             await self.abortAndCleanup(f"Unable to connect to one or more controllers. Aborting.")
 
-
-        for idx, controller in enumerate(self.controllers):
-            self.controllerData[controller.host] = OrderedDict()
-            hostData = self.controllerData[controller.host]
-            hostData["controller"] = controller
-
     async def validateThresholdsFile(self):
         logger.info(f"----------Input Validation----------")
         logger.info(f"Validating Thresholds - {self.thresholdsFileName}")
@@ -451,27 +561,124 @@ class Engine:
                             f"Thresholds file does not contain strictly increasing/decreasing evaluation metric thresholds for {metric} on JobStep {jobStep}"
                         )
                         fail = True
+                if not fail:
+                    # compiled once, used by 'applyThresholds' to score all applications of a job step at once
+                    thresholds[jobStep]["table"] = ThresholdTable(thresholds[jobStep])
         if fail:
             logger.error(f"Invalid thresholds file. Aborting.")
             sys.exit(0)
         else:
             logger.debug(f"Validated thresholds file")
 
-    async def process(self):
-        logger.info(f"----------Extract----------")
+    def loadSnapshot(self):
+        """
+        Loads controllerData from the snapshot of the last run of the job instead of extracting it.
+        1. Reads the snapshot written by the last run, controllerData.json or controllerData.jsonl.gz, whichever is newer.
+        2. Attaches the controllers of the job file, keeping the time range the data was extracted for.
+        3. Lets every job step restore the data it extracted to the types 'analyze' expects.
+        """
+        job_output_dir = os.path.join(self.output_dir, self.jobFileName)
+        snapshotPaths = [
+            os.path.join(job_output_dir, fileName)
+            for fileName in (ControllerDataSnapshot.JSON_FILE_NAME, ControllerDataSnapshot.COMPACT_FILE_NAME)
+            if Path(job_output_dir, fileName).exists()
+        ]
+        if not snapshotPaths:
+            logger.error(f"No controllerData snapshot found in {job_output_dir}. Run the job without --analyze-only first. Aborting.")
+            sys.exit(1)
+
+        logger.info(f"----------Load Snapshot----------")
+        snapshotPath = max(snapshotPaths, key=os.path.getmtime)
+        snapshot = ControllerDataSnapshot.read(snapshotPath)
+
+        for controller in self.controllers:
+            if controller.host not in snapshot:
+                logger.error(f"Controller {controller.host} is not part of the snapshot at {snapshotPath}. Aborting.")
+                sys.exit(1)
+            hostInfo = snapshot[controller.host]
+            # snapshots written by older versions don't hold the time range
+            savedController = hostInfo["controller"]
+            controller.timeRangeMins = savedController.get("timeRangeMins", controller.timeRangeMins)
+            controller.startTime = savedController.get("startTime", controller.startTime)
+            controller.endTime = savedController.get("endTime", controller.endTime)
+            hostInfo["controller"] = controller
+            self.controllerData[controller.host] = hostInfo
+
         for jobStep in [*self.otherSteps, *self.maturityAssessmentSteps]:
-            await jobStep.extract(self.controllerData)
+            jobStep.restoreSnapshot(self.controllerData)
+        logger.info(f"Loaded controllerData of {len(self.controllerData)} controllers from {snapshotPath}")
+
+    async def extract(self):
+        logger.info(f"----------Extract----------")
+        if self.parallelControllers:
+            await asyncio.gather(*[self.extractController(host) for host in self.controllerData])
+        else:
+            try:
+                await self.stepScheduler.extract(self.controllerData)
+            finally:
+                for hostInfo in self.controllerData.values():
+                    hostInfo["controller"].requestCoalescer.clearMemo()
+        if self.responseArchive is not None:
+            self.responseArchive.close()
+        if self.responseCache is not None and self.responseCache.hits > 0:
+            logger.warning(
+                f"{self.responseCache.hits} configuration responses were served from the response cache instead of the controllers. "
+                f"Configuration changed in the last {self.responseCache.ttlSeconds / 60:g} minutes may not be reflected in the reports."
+            )
 
+    def analyze(self):
         logger.info(f"----------Analyze----------")
+        # the overall assessments score the results of the other steps of their component type
+        stepResults = OrderedDict()
         for jobStep in [*self.maturityAssessmentSteps, *self.otherSteps]:
+            jobStep.stepResults = stepResults
             jobStep.analyze(self.controllerData, self.thresholds)
+            stepResults[type(jobStep).__name__] = jobStep.results
 
+    def report(self):
         logger.info(f"----------Report----------")
-        job_output_dir = os.path.join(self.output_dir, self.jobFileName)
-        for report in self.reports:
-            report.createWorkbook(self.maturityAssessmentSteps, self.controllerData, self.jobFileName, self.output_dir)
+        self.reportRenderer.render(
+            self.reports,
+            [*self.otherSteps, *self.maturityAssessmentSteps],
+            self.maturityAssessmentSteps,
+            self.controllerData,
+            os.path.join(self.output_dir, self.jobFileName, self.snapshot.fileName),
+            self.jobFileName,
+            self.output_dir,
+        )
 
-    def finalize(self, startTime):
+    @staticmethod
+    def createStepScheduler(jobSteps: list) -> StepScheduler:
+        """Schedules the extraction of jobSteps, the metric paths of all of them are planned together."""
+        metricQueryPlanner = MetricQueryPlanner([metricPath for jobStep in jobSteps for metricPath in jobStep.metricPaths])
+        for jobStep in jobSteps:
+            jobStep.metricQueryPlanner = metricQueryPlanner
+        return StepScheduler(jobSteps, metricQueryPlanner)
+
+    async def extractController(self, host: str):
+        """
+        Runs the whole extraction pipeline against a single controller.
+        The controller gets its own instances of the job steps, so controllers extracted in parallel share no step state.
+        Steps only keep state while extracting, the extracted data lands in the shared hostInfo of self.controllerData.
+        """
+        startTime = time.monotonic()
+        stepScheduler = self.createStepScheduler([type(jobStep)() for jobStep in [*self.otherSteps, *self.maturityAssessmentSteps]])
+        # steps only iterate over the hosts they are given
+        controllerData = OrderedDict([(host, self.controllerData[host])])
+        try:
+            await stepScheduler.extract(controllerData)
+        finally:
+            # responses memoized for the steps of this controller aren't needed by analyze or the reports
+            self.controllerData[host]["controller"].requestCoalescer.clearMemo()
+        logger.info(f"{host} - Extraction finished in {time.monotonic() - startTime:.2f}s")
+
+    def writeSnapshot(self):
+        """
+        Saves the job info and the controllerData snapshot, before reports are rendered from it.
+        1. Writes info.json, read by the presentation.
+        2. Writes the snapshot, read by report workers and by later --analyze-only runs.
+        3. Writes the results of the maturity assessment steps next to it, read by report workers.
+        """
         now = int(time.time())
         job_output_dir = os.path.join(self.output_dir, self.jobFileName)
 
@@ -483,27 +690,15 @@ class Engine:
                 indent=4,
             )
 
-        with open(os.path.join(job_output_dir, "controllerData.json"), "w", encoding="utf-8") as f:
-            json.dump(
-                self.controllerData,
-                fp=f,
-                default=jsonEncoder,
-                indent=4,
-            )
-
-        # createCxPpt(self.jobFileName)
-        createCxPptTemplate(self.jobFileName, self.output_dir)
+        snapshotStartTime = time.monotonic()
+        self.snapshot.write(os.path.join(job_output_dir, self.snapshot.fileName), self.controllerData)
+        self.snapshot.writeResults(os.path.join(job_output_dir, ControllerDataSnapshot.RESULTS_FILE_NAME), self.maturityAssessmentSteps)
+        self.snapshotTime = time.monotonic() - snapshotStartTime
 
+    def finalize(self, startTime):
+        snapshot = self.snapshot
         logger.info(f"----------Complete----------")
-        # if controllerData.json file exists, delete it
-        controller_data_path = os.path.join(job_output_dir, "controllerData.json")
-        if Path(controller_data_path).exists():
-            sizeBytes = os.path.getsize(controller_data_path)
-            sizeName = ("B", "KB", "MB", "GB")
-            i = int(math.floor(math.log(sizeBytes, 1024)))
-            p = math.pow(1024, i)
-            size = round(sizeBytes / p, 2)
-
+        if snapshot.compressedBytes > 0:
             executionTime = time.monotonic() - startTime
             mins, secs = divmod(executionTime, 60)
             hours, mins = divmod(mins, 60)
@@ -517,11 +712,35 @@ class Engine:
             totalCalls = sum([controller.totalCallsProcessed for controller in self.controllers])
 
             logger.info(f"Total API calls made: {totalCalls}")
-            logger.info(f"Size of data retrieved: {size} {sizeName[i]}")
+            sharedCalls = sum(controller.requestCoalescer.shared for controller in self.controllers)
+            memoizedCalls = sum(controller.requestCoalescer.memoHits for controller in self.controllers)
+            logger.info(f"Identical API calls coalesced: {sharedCalls + memoizedCalls} ({sharedCalls} shared in flight, {memoizedCalls} memoized)")
+            logger.info(f"Total API calls retried: {self.retryPolicy.totalRetries}")
+            if self.responseCache is not None:
+                logger.info(f"Response cache hits: {self.responseCache.hits}, misses: {self.responseCache.misses}")
+            for controller in self.controllers:
+                limiter = controller.admissionLimiter
+                logger.info(f"{controller.host} - Peak requests in flight: {limiter.peakInFlight}/{limiter.maxInFlight}, peak queue depth: {limiter.peakQueueDepth}")
+                if controller.adaptiveConcurrency is not None:
+                    adaptive = controller.adaptiveConcurrency
+                    logger.info(
+                        f"{controller.host} - Adaptive concurrency settled at {adaptive.limit} "
+                        f"(range {adaptive.lowestLimit}-{adaptive.highestLimit}, backed off {adaptive.decreases} times)"
+                    )
+            logger.info(f"Size of data retrieved: {formatSize(snapshot.uncompressedBytes)}")
+            if snapshot.compact:
+                logger.info(
+                    f"Snapshot {snapshot.fileName} written in {self.snapshotTime:.2f}s, compressed to {formatSize(snapshot.compressedBytes)} "
+                    f"({snapshot.compressedBytes / snapshot.uncompressedBytes * 100:.1f}%)"
+                )
+            else:
+                logger.info(f"Snapshot {snapshot.fileName} written in {self.snapshotTime:.2f}s")
             logger.info(f"Total execution time: {executionTimeString}")
 
     async def abortAndCleanup(self, msg: str, error=True):
         """Closes open controller connections"""
+        if self.responseArchive is not None:
+            self.responseArchive.close()
         await AsyncioUtils.gatherWithConcurrency(*[controller.close() for controller in self.controllers])
         if error:
             logger.error(msg)
@@ -539,7 +758,8 @@ class Engine:
         # after ALL reports generated archive a copy for safekeeping
         commands.append(Archiver(self.output_dir))
 
+        analysisResults = AnalysisResults(self.controllerData, self.maturityAssessmentSteps)
         for command in commands:
-            await command.post_process(self.jobFileName)
+            await command.post_process(self.jobFileName, analysisResults)
 
         logger.info(f"----------Post Process Done----------")
@@ -0,0 +1,65 @@
+import asyncio
+import logging
+import time
+
+from backend.extractionSteps.JobStepBase import JobStepBase
+from backend.extractionSteps.MetricQueryPlanner import MetricQueryPlanner
+
+logger = logging.getLogger(__name__.split('.')[-1])
+
+
+class StepScheduler:
+    """
+    Runs the 'extract' of job steps as a dependency graph instead of one after the other.
+    A step waits only for the earlier steps whose declared keys it reads or writes,
+    so independent steps (e.g. all BRUM and MRUM steps) are extracted concurrently.
+    """
+
+    def __init__(self, jobSteps: [JobStepBase], metricQueryPlanner: MetricQueryPlanner = None):
+        self.jobSteps = jobSteps
+        # shared by jobSteps, its results only live for one extraction
+        self.metricQueryPlanner = metricQueryPlanner
+        self.dependencies = [
+            [earlierIdx for earlierIdx in range(idx) if StepScheduler.dependsOn(jobStep, jobSteps[earlierIdx])]
+            for idx, jobStep in enumerate(jobSteps)
+        ]
+        for jobStep, dependencies in zip(self.jobSteps, self.dependencies):
+            logger.debug(f"{type(jobStep).__name__} depends on {[type(self.jobSteps[idx]).__name__ for idx in dependencies]}")
+
+    @staticmethod
+    def dependsOn(jobStep: JobStepBase, earlierStep: JobStepBase) -> bool:
+        """True if jobStep has to wait for earlierStep, which precedes it in the configured step order."""
+        # steps without declarations are barriers
+        if any(keys is None for keys in (jobStep.consumes, jobStep.produces, earlierStep.consumes, earlierStep.produces)):
+            return True
+        # read after write, write after write and write after read
+        return bool(
+            set(jobStep.consumes) & set(earlierStep.produces)
+            or set(jobStep.produces) & set(earlierStep.produces)
+            or set(jobStep.produces) & set(earlierStep.consumes)
+        )
+
+    async def extract(self, controllerData):
+        """Extracts all steps for the given controllers, honoring the declared dependencies."""
+        tasks = []
+
+        async def runJobStep(idx: int):
+            await asyncio.gather(*[tasks[dependency] for dependency in self.dependencies[idx]])
+            jobStep = self.jobSteps[idx]
+            startTime = time.monotonic()
+            await jobStep.extract(controllerData)
+            logger.debug(f"{type(jobStep).__name__} extracted in {time.monotonic() - startTime:.2f}s")
+
+        for idx in range(len(self.jobSteps)):
+            tasks.append(asyncio.ensure_future(runJobStep(idx)))
+
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            # don't leave independent steps running against controllers which are about to be closed
+            for task in tasks:
+                task.cancel()
+            raise
+        finally:
+            if self.metricQueryPlanner is not None:
+                self.metricQueryPlanner.clear()
@@ -0,0 +1,59 @@
+import hashlib
+import json
+import logging
+import os
+
+from deepdiff import DeepDiff
+
+logger = logging.getLogger(__name__.split('.')[-1])
+
+CONTROLLER_DEFAULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "resources", "controllerDefaults")
+
+
+def canonicalize(value) -> str:
+    """
+    Order-insensitive JSON encoding of a health rule, equal for values DeepDiff(..., ignore_order=True) finds no difference in.
+    Keys of objects are sorted and items of lists are sorted without repetitions. Types are kept, 1, 1.0 and true differ.
+    """
+    if isinstance(value, dict):
+        return "{" + ",".join(f"{json.dumps(key)}:{canonicalize(item)}" for key, item in sorted(value.items(), key=lambda keyItem: str(keyItem[0]))) + "}"
+    if isinstance(value, list):
+        return "[" + ",".join(sorted({canonicalize(item) for item in value})) + "]"
+    return json.dumps(value)
+
+
+def fingerprint(value) -> str:
+    return hashlib.sha256(canonicalize(value).encode("utf-8")).hexdigest()
+
+
+class HealthRuleFingerprints:
+    """
+    Default health rules of a component type, fingerprinted once. A fetched health rule is unmodified if its
+    fingerprint, ignoring its id, equals the fingerprint of the default rule of the same name.
+    A component type without a defaults file has no default rules.
+    """
+
+    def __init__(self, componentType: str):
+        path = os.path.join(CONTROLLER_DEFAULTS_DIR, f"defaultHealthRules{componentType.upper()}.json")
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.defaultHealthRules = json.load(f)
+        else:
+            self.defaultHealthRules = {}
+        self.defaultFingerprints = {name: fingerprint(healthRule) for name, healthRule in self.defaultHealthRules.items()}
+
+    def names(self):
+        return self.defaultHealthRules.keys()
+
+    def isModified(self, name: str, healthRule: dict) -> bool:
+        # compare without the id, leaving the extracted health rule intact so it can be analyzed again
+        healthRule = {key: value for key, value in healthRule.items() if key != "id"}
+        modified = fingerprint(healthRule) != self.defaultFingerprints[name]
+        # the readable difference is expensive, it is only computed for debug logs
+        if modified and logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Default health rule {name} was modified: {DeepDiff(self.defaultHealthRules[name], healthRule, ignore_order=True)}")
+        return modified
+
+    def countModified(self, healthRules: dict) -> int:
+        """Number of default health rules which were modified or deleted, healthRules maps name -> health rule."""
+        return sum(1 for name in self.defaultFingerprints if name not in healthRules or self.isModified(name, healthRules[name]))
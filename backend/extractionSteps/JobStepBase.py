@@ -1,15 +1,44 @@
 import logging
 from abc import ABC, abstractmethod
 
-from backend.util.excel_utils import Color, addFilterAndFreeze, resizeColumnWidth, writeColoredRow, writeUncoloredRow
+import numpy as np
+
+from backend.api.Result import Result
+from backend.extractionSteps.MetricQueryPlanner import MetricQueryPlanner
+from backend.extractionSteps.ResultTable import ResultTable
+from backend.extractionSteps.ThresholdTable import ThresholdTable
+from backend.util.excel_utils import Color, ReportWorkbook, addFilterAndFreeze, resizeColumnWidth, writeUncoloredRow
 
 
 logger = logging.getLogger(__name__.split('.')[-1])
 
 
 class JobStepBase(ABC):
+    # Keys read and written by 'extract', used by the StepScheduler to run independent steps concurrently.
+    # hostInfo keys are plain ("exportedDashboards"), application keys are prefixed with the component type ("apm.nodes").
+    # Steps which leave these as None are run as barriers: after every step before them and before every step after them.
+    consumes: tuple = None
+    produces: tuple = None
+    # Rolled up metric paths 'extract' requests per application with getMetricData, declared up front so the
+    # MetricQueryPlanner of the job can merge the metric paths of all steps into fewer queries.
+    metricPaths: tuple = ()
+
     def __init__(self, componentType: str):
         self.componentType = componentType
+        # filled by 'analyze' of maturity assessment steps
+        self.results = ResultTable(componentType)
+        # set by the Engine, without it every metric path is queried on its own
+        self.metricQueryPlanner: MetricQueryPlanner = None
+        # set by the Engine before 'analyze', the results of the job steps analyzed before this one by job step name
+        self.stepResults: dict = None
+
+    def __getstate__(self):
+        # the planner holds the requests of the extraction in flight, the Engine sets it again for every extraction
+        state = self.__dict__.copy()
+        state["metricQueryPlanner"] = None
+        # the results of the other steps are set again for every analysis
+        state["stepResults"] = None
+        return state
 
     @abstractmethod
     async def extract(self, controllerData):
@@ -29,9 +58,29 @@ class JobStepBase(ABC):
         """
         pass
 
+    async def getMetricData(self, controller, applicationID: int, metricPath: str) -> Result:
+        """Rolled up metrics of one of the metricPaths of the step over the time range of the controller."""
+        if self.metricQueryPlanner is None:
+            return await MetricQueryPlanner.fetch(controller, applicationID, metricPath)
+        return await self.metricQueryPlanner.getMetricData(controller, applicationID, metricPath)
+
+    def restoreSnapshot(self, controllerData):
+        """
+        Restores data extracted by this step after controllerData was loaded from a controllerData snapshot.
+        Only needed by steps storing values which don't survive the JSON round trip, e.g. Result objects or int keys.
+        """
+        pass
+
+    def restoreAnalysis(self, controllerData, savedResults: dict):
+        """
+        Restores the results of 'applyThresholds' when reports are rendered from a controllerData snapshot without
+        analyzing it again. savedResults holds the saved ResultTable of every job step by job step name.
+        """
+        self.results = ResultTable.fromJson(savedResults[type(self).__name__])
+
     def reportData(
         self,
-        workbook,
+        workbook: ReportWorkbook,
         controllerData,
         jobStepName,
         useEvaluatedMetrics=True,
@@ -44,93 +93,48 @@ class JobStepBase(ABC):
         """Create report sheet for raw analysis data."""
         logger.debug(f"Creating workbook sheet for raw details of {jobStepName}")
 
-        metricFolder = "evaluated" if useEvaluatedMetrics else "raw"
+        results = self.results
+        # raw metrics are never colored
+        metrics = results.evaluated if useEvaluatedMetrics else results.raw
 
-        rawDataSheet = workbook.create_sheet(f"{jobStepName}")
-        if len(list(controllerData.values())[0][self.componentType]) == 0:
+        rawDataSheet = workbook.createSheet(f"{jobStepName}")
+        if len(results) == 0:
             logger.warning(f"No data found for {jobStepName}")
             return
 
-        rawDataHeaders = list(list(controllerData.values())[0][self.componentType].values())[0][jobStepName][metricFolder].keys()
-        headers = ["controller", "application", "applicationId"] + (["description"] if self.componentType == "apm" else []) + list(rawDataHeaders)
+        headers = ["controller", "application", "applicationId"] + (["description"] if self.componentType == "apm" else []) + list(metrics)
 
         writeUncoloredRow(rawDataSheet, 1, headers)
 
         # Write Data
-        rowIdx = 2
-        for host, hostInfo in controllerData.items():
-            for application in hostInfo[self.componentType].values():
-                if colorRows:
-                    data = [
-                        ( hostInfo["controller"].host, None),
-                        ( application["name"], None),
-                        ( application["applicationId"] if self.componentType == "mrum" else application["id"], None),
-                        *[application[jobStepName][metricFolder][header] for header in rawDataHeaders]
-                    ]
-                    if self.componentType == "apm":
-                        data.insert(3, ( application["description"], None))
-                    writeColoredRow(
-                        rawDataSheet,
-                        rowIdx,
-                        data
-                    )
-                else:
-                    data = [
-                        hostInfo["controller"].host,
-                        application["name"],
-                        application["applicationId"] if self.componentType == "mrum" else application["id"],
-                        *[application[jobStepName][metricFolder][header] for header in rawDataHeaders]
-                    ]
-                    if self.componentType == "apm":
-                        data.insert(3, application["description"])
-                    writeUncoloredRow(
-                        rawDataSheet,
-                        rowIdx,
-                        data
-                    )
-                rowIdx += 1
+        keyColumns = results.keyColumns()
+        metricColumns = [column.tolist() for column in metrics.values()]
+        if colorRows:
+            keyColors = [None] * len(keyColumns)
+            levelColumns = [results.evaluatedLevels[metric] for metric in metrics]
+        for idx, row in enumerate(zip(*keyColumns, *metricColumns)):
+            colors = [*keyColors, *[Color[levels[idx]] for levels in levelColumns]] if colorRows else None
+            rawDataSheet.writeRow(idx + 1, row, colors)
 
         addFilterAndFreeze(rawDataSheet, "E2") if self.componentType == "apm" else addFilterAndFreeze(rawDataSheet, "D2")
         resizeColumnWidth(rawDataSheet)
 
-    def applyThresholds(self, analysisDataEvaluatedMetrics, analysisDataRoot, jobStepThresholds):
-        thresholdLevels = ["platinum", "gold", "silver"]
-
-        # Calculate overall health across all thresholds and metrics a given for JobStep
-        # This data goes into the 'Analysis' xlsx sheet.
-        score = "bronze"
-        color = Color[score]
-        for thresholdLevel in thresholdLevels:
-            numCriteriaWhichComplyWithCurrentThresholdLevel = 0
-
-            for thresholdLevelMetric in jobStepThresholds[thresholdLevel].keys():
-                if jobStepThresholds["direction"][thresholdLevelMetric] == "decreasing":
-                    if analysisDataEvaluatedMetrics[thresholdLevelMetric] >= jobStepThresholds[thresholdLevel][thresholdLevelMetric]:
-                        numCriteriaWhichComplyWithCurrentThresholdLevel += 1
-                else:
-                    if analysisDataEvaluatedMetrics[thresholdLevelMetric] <= jobStepThresholds[thresholdLevel][thresholdLevelMetric]:
-                        numCriteriaWhichComplyWithCurrentThresholdLevel += 1
-
-            if numCriteriaWhichComplyWithCurrentThresholdLevel == len(jobStepThresholds[thresholdLevel].keys()):
-                score = thresholdLevel
-                color = Color[score]
-                break
-        analysisDataRoot["computed"] = [score, color]
-
-        # Calculate individual health of individual metrics.
-        # This data goes into the 'JobStep - Metrics' xlsx sheet.
-        for thresholdLevelMetric in analysisDataEvaluatedMetrics.keys():
-            # Default to bronze, then loop through thresholds to apply correct color
-            analysisDataEvaluatedMetrics[thresholdLevelMetric] = [
-                analysisDataEvaluatedMetrics[thresholdLevelMetric],
-                Color["bronze"],
-            ]
-            for thresholdLevel in thresholdLevels:
-                if jobStepThresholds["direction"][thresholdLevelMetric] == "decreasing":
-                    if analysisDataEvaluatedMetrics[thresholdLevelMetric][0] >= jobStepThresholds[thresholdLevel][thresholdLevelMetric]:
-                        analysisDataEvaluatedMetrics[thresholdLevelMetric][1] = Color[thresholdLevel]
-                        break
-                else:
-                    if analysisDataEvaluatedMetrics[thresholdLevelMetric][0] <= jobStepThresholds[thresholdLevel][thresholdLevelMetric]:
-                        analysisDataEvaluatedMetrics[thresholdLevelMetric][1] = Color[thresholdLevel]
-                        break
+    def applyThresholds(self, results: ResultTable, jobStepThresholds):
+        """
+        Scores all applications of the job step at once, after 'analyze' appended them to results.
+        1. The computed score of an application is the best level whose thresholds all its metrics meet, bronze otherwise.
+           This data goes into the 'Analysis' xlsx sheet.
+        2. Each evaluated metric gets the best level whose threshold it meets, bronze otherwise.
+           This data goes into the 'JobStep - Metrics' xlsx sheet.
+        """
+        results.buildColumns()
+        if len(results) == 0:
+            return
+
+        thresholdTable: ThresholdTable = jobStepThresholds["table"]
+        matrix = np.column_stack([results.evaluated[metric].astype(float) for metric in thresholdTable.metrics]).reshape(len(results), len(thresholdTable.metrics))
+        results.scores, metricLevels = thresholdTable.score(matrix)
+
+        results.evaluatedLevels.clear()
+        for metric in results.evaluated:
+            results.evaluatedLevels[metric] = metricLevels[:, thresholdTable.metricIndex[metric]]
@@ -0,0 +1,112 @@
+import asyncio
+import logging
+from collections import Counter, OrderedDict
+
+from backend.api.Result import Result
+
+logger = logging.getLogger(__name__.split('.')[-1])
+
+
+def matchesMetricPath(pattern: [str], metricPath: str) -> bool:
+    """True if the segments of metricPath match the segments of a metric path pattern, '*' matching any one segment."""
+    segments = metricPath.split("|")
+    return len(segments) == len(pattern) and all(p == "*" or p == s for p, s in zip(pattern, segments))
+
+
+class MetricQueryPlanner:
+    """
+    Merges the rolled up metric paths job steps query per application into fewer getMetricData calls.
+    The metric-data endpoint has no alternation, so metric paths of the same metric differing in a few segments are
+    merged into one broader query with '*' in those segments, widening each metric path by at most maxWidenedSegments
+    to bound the extra data returned. The last segment, the metric name, is never widened. The response of a merged
+    query is split back into the metrics of each metric path and kept in a per-application table until every step
+    registered for them has read them, or until 'clear' is called at the end of the extraction.
+    """
+
+    def __init__(self, metricPaths: [str], maxWidenedSegments: int = 1):
+        self.maxWidenedSegments = maxWidenedSegments
+        # metric path -> number of steps reading it
+        self.readers = Counter(metricPaths)
+        # query metric path -> metric paths it answers
+        self.queries = OrderedDict()
+        for metricPath in self.readers:
+            self._plan(metricPath)
+        # metric path -> query metric path
+        self.queryOf = {metricPath: query for query, metricPaths in self.queries.items() for metricPath in metricPaths}
+        # (host, applicationID, query) -> task splitting the response of the query, and the reads left before it is dropped
+        self._results = {}
+        self._readsLeft = Counter()
+        if len(self.queries) < len(self.readers):
+            logger.debug(f"Merged {len(self.readers)} metric paths into {len(self.queries)} metric queries per application")
+        for query, metricPaths in self.queries.items():
+            if len(metricPaths) > 1:
+                logger.debug(f"Metric query {query} answers {metricPaths}")
+
+    def _plan(self, metricPath: str):
+        segments = metricPath.split("|")
+        for query, metricPaths in self.queries.items():
+            querySegments = query.split("|")
+            # only metric paths of the same metric are merged, a query never fetches other metric names
+            if len(querySegments) != len(segments) or querySegments[-1] != segments[-1]:
+                continue
+            widened = "|".join(q if q == s else "*" for q, s in zip(querySegments, segments))
+            if all(self._widenedSegments(widened, member) <= self.maxWidenedSegments for member in (*metricPaths, metricPath)):
+                del self.queries[query]
+                self.queries[widened] = [*metricPaths, metricPath]
+                return
+        self.queries[metricPath] = [metricPath]
+
+    @staticmethod
+    def _widenedSegments(query: str, metricPath: str) -> int:
+        return sum(1 for q, s in zip(query.split("|"), metricPath.split("|")) if q == "*" and s != "*")
+
+    def clear(self):
+        """Drops the results not read yet, e.g. of applications a step skipped. Called when an extraction ends."""
+        for task in self._results.values():
+            task.cancel()
+        self._results.clear()
+        self._readsLeft.clear()
+
+    async def getMetricData(self, controller, applicationID: int, metricPath: str) -> Result:
+        """Rolled up metrics of metricPath over the time range of the controller, fetched with the query planned for it."""
+        query = self.queryOf.get(metricPath)
+        if query is None:
+            return await MetricQueryPlanner.fetch(controller, applicationID, metricPath)
+
+        key = (controller.host, applicationID, query)
+        task = self._results.get(key)
+        if task is None:
+            task = self._results[key] = asyncio.ensure_future(self._fetchAndSplit(controller, applicationID, query))
+            self._readsLeft[key] = sum(self.readers[member] for member in self.queries[query])
+        try:
+            results = await asyncio.shield(task)
+        finally:
+            self._readsLeft[key] -= 1
+            if self._readsLeft[key] <= 0:
+                del self._results[key]
+                del self._readsLeft[key]
+        return results[metricPath]
+
+    async def _fetchAndSplit(self, controller, applicationID: int, query: str) -> dict:
+        metricPaths = self.queries[query]
+        result = await MetricQueryPlanner.fetch(controller, applicationID, query)
+        if len(metricPaths) == 1 or result.error is not None:
+            return {metricPath: result for metricPath in metricPaths}
+
+        patterns = [(metricPath, metricPath.split("|")) for metricPath in metricPaths]
+        metrics = {metricPath: [] for metricPath in metricPaths}
+        for metric in result.data:
+            for metricPath, pattern in patterns:
+                if matchesMetricPath(pattern, metric["metricPath"]):
+                    metrics[metricPath].append(metric)
+        return {metricPath: Result(metrics[metricPath], None) for metricPath in metricPaths}
+
+    @staticmethod
+    async def fetch(controller, applicationID: int, metricPath: str) -> Result:
+        return await controller.getMetricData(
+            applicationID=applicationID,
+            metric_path=metricPath,
+            rollup=True,
+            time_range_type="BEFORE_NOW",
+            duration_in_mins=controller.timeRangeMins,
+        )
@@ -0,0 +1,143 @@
+from collections import OrderedDict
+
+# e.g. 'Application Infrastructure Performance|foo|Individual Nodes|bar|Agent|App|Availability'
+NODE_METRIC_PATH_PREFIX = "Application Infrastructure Performance|"
+
+
+def parseNodeMetricPath(metricPath: str) -> (str, str):
+    """Tier and node name of an individual node metric path, split once."""
+    parts = metricPath.split("|", 4)
+    if len(parts) < 4 or parts[0] + "|" != NODE_METRIC_PATH_PREFIX:
+        return None, None
+    return parts[1], parts[3]
+
+
+class NodeIndex:
+    """
+    Columnar index of the APM nodes of one controller, one row per node in the order of hostInfo["apm"].
+    Built once by AppAgentsAPM when the nodes are fetched and updated in place by later steps,
+    so node metrics are looked up by (applicationId, tierName, nodeName) instead of re-parsing metric paths
+    and agent steps read the columns instead of walking every node dict again.
+    """
+
+    # columns copied from the node returned by the controller
+    NODE_COLUMNS = OrderedDict(
+        [
+            ("nodeIds", "id"),
+            ("tierNames", "tierName"),
+            ("nodeNames", "name"),
+            ("machineIds", "machineId"),
+            ("agentTypes", "agentType"),
+            ("appAgentPresent", "appAgentPresent"),
+            ("appAgentVersions", "appAgentVersion"),
+            ("machineAgentPresent", "machineAgentPresent"),
+            ("machineAgentVersions", "machineAgentVersion"),
+        ]
+    )
+    # columns filled from node metrics by the agent steps, 0 when a node returned no data, and their keys in the node dicts
+    METRIC_COLUMNS = OrderedDict(
+        [
+            ("appAgentAvailability", "appAgentAvailability"),
+            ("machineAgentAvailability", "machineAgentAvailability"),
+            ("metricUploadRequestsExceedingLimit", "nodeMetricsUploadRequestsExceedingLimit"),
+        ]
+    )
+    # columns filled by 'analyze' of the agent steps, None for nodes without a parsable agent version
+    AGE_COLUMNS = OrderedDict([("appAgentAge", "appAgentAge"), ("machineAgentAge", "machineAgentAge")])
+
+    def __init__(self):
+        self.applicationIds = []
+        for column in (*NodeIndex.NODE_COLUMNS, *NodeIndex.METRIC_COLUMNS, *NodeIndex.AGE_COLUMNS):
+            setattr(self, column, [])
+        # application id -> rows of its nodes
+        self.applicationRows = OrderedDict()
+        # (applicationId, tierName, nodeName) -> row
+        self._rowsByName = {}
+
+    def __len__(self):
+        return len(self.nodeIds)
+
+    def addApplication(self, application: dict, nodes: [dict]):
+        start = len(self)
+        for row, node in enumerate(nodes, start):
+            self.applicationIds.append(application["id"])
+            for column, nodeKey in NodeIndex.NODE_COLUMNS.items():
+                getattr(self, column).append(node.get(nodeKey))
+            for column in NodeIndex.METRIC_COLUMNS:
+                getattr(self, column).append(0)
+            for column in NodeIndex.AGE_COLUMNS:
+                getattr(self, column).append(None)
+            self._rowsByName[(application["id"], node.get("tierName"), node.get("name"))] = row
+        self.applicationRows[application["id"]] = range(start, len(self))
+
+    def setNodeMetric(self, column: str, application: dict, nodeMetrics: [dict]) -> int:
+        """
+        Stores the rolled up sum of each node metric of one application in a metric column.
+        Returns the number of metrics which matched no node of the application.
+        """
+        values = getattr(self, column)
+        unmatched = 0
+        for nodeMetric in nodeMetrics:
+            tierName, nodeName = parseNodeMetricPath(nodeMetric["metricPath"])
+            row = self._rowsByName.get((application["id"], tierName, nodeName))
+            if row is None:
+                unmatched += 1
+                continue
+            try:
+                values[row] = nodeMetric["metricValues"][0]["sum"]
+            except IndexError:
+                values[row] = 0
+        return unmatched
+
+    def writeToNodes(self, applications: dict, columns: [str]):
+        """
+        Copies metric or age columns onto the node dicts of the applications, under the keys the agent steps always stored them.
+        Node dicts are what plugins get in context["controllerData"] and what the raw data dump holds.
+        Like before, ages are only set on nodes with a parsable agent version.
+        """
+        nodeKeys = {**NodeIndex.METRIC_COLUMNS, **NodeIndex.AGE_COLUMNS}
+        for application in applications.values():
+            for row, node in zip(self.applicationRows.get(application["id"], ()), application.get("nodes", [])):
+                for column in columns:
+                    value = getattr(self, column)[row]
+                    if value is not None or column not in NodeIndex.AGE_COLUMNS:
+                        node[nodeKeys[column]] = value
+
+    def availabilityPercentByNodeId(self, timeRangeMins: int) -> dict:
+        return {nodeId: availability / timeRangeMins * 100 for nodeId, availability in zip(self.nodeIds, self.appAgentAvailability)}
+
+    def availabilityPercentByMachineId(self, timeRangeMins: int) -> dict:
+        return {machineId: availability / timeRangeMins * 100 for machineId, availability in zip(self.machineIds, self.machineAgentAvailability)}
+
+    def __json__(self):
+        return {
+            "applicationRows": {applicationId: [rows.start, rows.stop] for applicationId, rows in self.applicationRows.items()},
+            "columns": {column: getattr(self, column) for column in ("applicationIds", *NodeIndex.NODE_COLUMNS, *NodeIndex.METRIC_COLUMNS, *NodeIndex.AGE_COLUMNS)},
+        }
+
+    @staticmethod
+    def fromJson(data: dict) -> "NodeIndex":
+        """Inverse of __json__, used to load a saved controllerData snapshot."""
+        nodeIndex = NodeIndex()
+        for column, values in data["columns"].items():
+            setattr(nodeIndex, column, values)
+        # JSON object keys are strings
+        for applicationId, (start, stop) in data["applicationRows"].items():
+            nodeIndex.applicationRows[int(applicationId)] = range(start, stop)
+        for row, key in enumerate(zip(nodeIndex.applicationIds, nodeIndex.tierNames, nodeIndex.nodeNames)):
+            nodeIndex._rowsByName[key] = row
+        return nodeIndex
+
+    @staticmethod
+    def fromNodes(applications: dict) -> "NodeIndex":
+        """Rebuilds the index from snapshots written before it existed, which kept node metrics on the node dicts."""
+        nodeIndex = NodeIndex()
+        for application in applications.values():
+            nodes = application.get("nodes", [])
+            nodeIndex.addApplication(application, nodes)
+            for row, node in zip(nodeIndex.applicationRows[application["id"]], nodes):
+                for column, nodeKey in NodeIndex.METRIC_COLUMNS.items():
+                    getattr(nodeIndex, column)[row] = node.get(nodeKey, 0)
+                for column, nodeKey in NodeIndex.AGE_COLUMNS.items():
+                    getattr(nodeIndex, column)[row] = node.get(nodeKey)
+        return nodeIndex
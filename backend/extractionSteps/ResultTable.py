@@ -0,0 +1,120 @@
+from collections import OrderedDict
+
+import numpy as np
+
+
+def toColumn(values: list) -> np.ndarray:
+    """NumPy column of the values of one metric. Numeric if every value is a number, otherwise values keep their type."""
+    if values and all(type(value) is bool for value in values):
+        return np.array(values, dtype=bool)
+    if values and all(type(value) in (int, float) for value in values):
+        try:
+            return np.array(values)
+        except OverflowError:
+            pass
+    column = np.empty(len(values), dtype=object)
+    column[:] = values
+    return column
+
+
+def valueAt(column: np.ndarray, idx: int):
+    """Value of a column as a Python value, the way it was appended."""
+    value = column[idx]
+    return value.item() if isinstance(value, np.generic) else value
+
+
+class ResultTable:
+    """
+    Columnar results of 'analyze' of one job step, one row per application in the order of controllerData.
+    Each evaluated and raw metric is a NumPy column next to the controller and application keys, so thresholds are
+    applied to all applications at once and reports read rows without walking controllerData again.
+    The table is the only store of the results, they are not written to controllerData.
+    """
+
+    def __init__(self, componentType: str):
+        self.componentType = componentType
+        self.controllers = []
+        self.applications = []
+        self.applicationIds = []
+        # apm only
+        self.descriptions = []
+        # metric -> column
+        self.evaluated = OrderedDict()
+        self.raw = OrderedDict()
+        # "platinum", "gold", "silver" or "bronze" of each row
+        self.scores = np.empty(0, dtype=object)
+        # metric -> level of each row
+        self.evaluatedLevels = OrderedDict()
+        # analysisDataRoot of each appended row, until 'buildColumns' turned them into columns
+        self._analysisDataRoots = []
+
+    def __len__(self):
+        return len(self.controllers)
+
+    def append(self, hostInfo, application, analysisDataRoot):
+        self.controllers.append(hostInfo["controller"].host)
+        self.applications.append(application["name"])
+        self.applicationIds.append(application["applicationId"] if self.componentType == "mrum" else application["id"])
+        if self.componentType == "apm":
+            self.descriptions.append(application["description"])
+        self._analysisDataRoots.append(analysisDataRoot)
+
+    def buildColumns(self):
+        """Turns the metrics of the appended rows into columns. Every application of a job step has the same metrics."""
+        for metricFolder, columns in (("evaluated", self.evaluated), ("raw", self.raw)):
+            columns.clear()
+            if not self._analysisDataRoots:
+                continue
+            for metric in self._analysisDataRoots[0][metricFolder]:
+                columns[metric] = toColumn([analysisDataRoot[metricFolder][metric] for analysisDataRoot in self._analysisDataRoots])
+        self._analysisDataRoots = []
+
+    def keyColumns(self) -> [list]:
+        """Columns identifying each row, the first columns of the job step sheets."""
+        return [self.controllers, self.applications, self.applicationIds, *([self.descriptions] if self.componentType == "apm" else [])]
+
+    def __json__(self):
+        """The columns as lists, saved next to the controllerData snapshot for rendering reports from it."""
+        return {
+            "componentType": self.componentType,
+            "controllers": self.controllers,
+            "applications": self.applications,
+            "applicationIds": self.applicationIds,
+            "descriptions": self.descriptions,
+            "evaluated": OrderedDict((metric, column.tolist()) for metric, column in self.evaluated.items()),
+            "raw": OrderedDict((metric, column.tolist()) for metric, column in self.raw.items()),
+            "scores": self.scores.tolist(),
+            "evaluatedLevels": OrderedDict((metric, levels.tolist()) for metric, levels in self.evaluatedLevels.items()),
+        }
+
+    @staticmethod
+    def fromJson(data: dict) -> "ResultTable":
+        results = ResultTable(data["componentType"])
+        results.controllers = data["controllers"]
+        results.applications = data["applications"]
+        results.applicationIds = data["applicationIds"]
+        results.descriptions = data["descriptions"]
+        for metric, values in data["evaluated"].items():
+            results.evaluated[metric] = toColumn(values)
+        for metric, values in data["raw"].items():
+            results.raw[metric] = toColumn(values)
+        results.scores = np.array(data["scores"], dtype=object)
+        for metric, levels in data["evaluatedLevels"].items():
+            results.evaluatedLevels[metric] = np.array(levels, dtype=object)
+        return results
+
+    def row(self, host: str, applicationName: str) -> OrderedDict:
+        """
+        Results of one application: its score, and the value and level of each metric.
+        Empty if the application wasn't analyzed by the job step.
+        """
+        for idx, (controller, application) in enumerate(zip(self.controllers, self.applications)):
+            if controller == host and application == applicationName:
+                return OrderedDict(
+                    [
+                        ("computed", self.scores[idx]),
+                        ("evaluated", OrderedDict((metric, [valueAt(column, idx), self.evaluatedLevels[metric][idx]]) for metric, column in self.evaluated.items())),
+                        ("raw", OrderedDict((metric, valueAt(column, idx)) for metric, column in self.raw.items())),
+                    ]
+                )
+        return OrderedDict()
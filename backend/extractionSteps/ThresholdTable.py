@@ -0,0 +1,40 @@
+import numpy as np
+
+# best first, an application or metric meeting none of them is bronze
+THRESHOLD_LEVELS = ["platinum", "gold", "silver"]
+LEVEL_NAMES = np.array([*THRESHOLD_LEVELS, "bronze"], dtype=object)
+
+
+def firstTrue(conditions: np.ndarray) -> np.ndarray:
+    """Index of the first level whose condition holds along axis 0, or the index of bronze if none does."""
+    return np.where(conditions.any(axis=0), conditions.argmax(axis=0), len(THRESHOLD_LEVELS))
+
+
+class ThresholdTable:
+    """
+    Thresholds of one job step compiled into arrays, built once by validateThresholdsFile.
+    Rows of 'bounds' are the threshold levels, best first, columns are the evaluated metrics.
+    """
+
+    def __init__(self, jobStepThresholds: dict):
+        # every level has the same metrics, checked by validateThresholdsFile
+        self.metrics = list(jobStepThresholds["platinum"].keys())
+        self.metricIndex = {metric: idx for idx, metric in enumerate(self.metrics)}
+        # bools compare like 0 and 1
+        self.bounds = np.array(
+            [[float(jobStepThresholds[thresholdLevel][metric]) for metric in self.metrics] for thresholdLevel in THRESHOLD_LEVELS],
+            dtype=float,
+        ).reshape(len(THRESHOLD_LEVELS), len(self.metrics))
+        self.decreasing = np.array([jobStepThresholds["direction"][metric] == "decreasing" for metric in self.metrics], dtype=bool)
+
+    def score(self, matrix: np.ndarray) -> (np.ndarray, np.ndarray):
+        """
+        Scores a matrix of evaluated metrics, one row per application and one column per metric of the table.
+        Returns the level of each application, the best level whose thresholds all its metrics meet,
+        and the level of each metric of each application, the best level whose threshold it meets.
+        """
+        # level x application x metric
+        meetsThreshold = np.where(self.decreasing, matrix >= self.bounds[:, None, :], matrix <= self.bounds[:, None, :])
+        applicationLevels = LEVEL_NAMES[firstTrue(meetsThreshold.all(axis=2))]
+        metricLevels = LEVEL_NAMES[firstTrue(meetsThreshold)]
+        return applicationLevels, metricLevels
@@ -7,6 +7,26 @@ from backend.extractionSteps.JobStepBase import JobStepBase
 logger = logging.getLogger(__name__.split('.')[-1])
 
 class ControllerLevelDetails(JobStepBase):
+    consumes = ()
+    produces = (
+        "apm",
+        "brum",
+        "mrum",
+        "dashboards",
+        "containers",
+        "analytics",
+        "servers",
+        "configurations",
+        "analyticsEnabledStatus",
+        "exportedDashboards",
+        "accountLicenseUsage",
+        "eumLicenseUsage",
+        "appServerAgents",
+        "machineAgents",
+        "dbAgents",
+        "analyticsAgents",
+    )
+
     def __init__(self):
         super().__init__("controller")
 
@@ -1,5 +1,4 @@
 import logging
-from collections import OrderedDict
 
 from backend.api.appd.AppDService import AppDService
 from backend.extractionSteps.JobStepBase import JobStepBase
@@ -8,13 +7,17 @@ from backend.util.asyncio_utils import AsyncioUtils
 logger = logging.getLogger(__name__.split('.')[-1])
 
 class CustomMetrics(JobStepBase):
+    consumes = ("apm",)
+    produces = ("apm.tiers", "apm.customMetrics")
+
     def __init__(self):
         super().__init__("apm")
 
     async def extract(self, controllerData):
         """
         Extract application customization details.
-        1. Makes one API call per application to get custom extensions.
+        1. Makes one API call per application to get its tiers.
+        2. Makes one API call per tier to get custom extensions.
         """
         jobStepName = type(self).__name__
 
@@ -22,32 +25,23 @@ class CustomMetrics(JobStepBase):
             logger.info(f'{hostInfo["controller"].host} - Extracting {jobStepName}')
             controller: AppDService = hostInfo["controller"]
 
-            getTiersFutures = []
+            async def extractTierCustomMetrics(application, tier):
+                customMetrics = await controller.getCustomMetrics(
+                    applicationID=application["id"],
+                    tierName=tier["name"],
+                )
+                application["customMetrics"].update(customMetric["name"] for customMetric in customMetrics.data)
+
+            async def extractApplicationCustomMetrics(application):
+                tiers = await controller.getTiers(application["id"])
+                application["tiers"] = tiers.data
+                await AsyncioUtils.gatherWithConcurrency(*[extractTierCustomMetrics(application, tier) for tier in tiers.data])
+
+            # One fan-out across all (application, tier) pairs of the controller, bounded by the AdmissionLimiter of the controller.
+            # The tiers of an application are requested as soon as its tiers are known instead of one application at a time.
             for application in hostInfo[self.componentType].values():
-                getTiersFutures.append(controller.getTiers(application["id"]))
-            allTiers = await AsyncioUtils.gatherWithConcurrency(*getTiersFutures)
-
-            allCustomMetrics = []
-            for application, tiers in zip(hostInfo[self.componentType].values(), allTiers):
-                getCustomMetricsFutures = []
-                for tier in tiers.data:
-                    getCustomMetricsFutures.append(
-                        controller.getCustomMetrics(
-                            applicationID=application["id"],
-                            tierName=tier["name"],
-                        )
-                    )
-                customMetrics = await AsyncioUtils.gatherWithConcurrency(*getCustomMetricsFutures)
-                allCustomMetrics.append(customMetrics)
-
-            for idx, applicationName in enumerate(hostInfo[self.componentType]):
-                application = hostInfo[self.componentType][applicationName]
-                application["tiers"] = allTiers[idx].data
-                customMetrics = set()
-                for tier in allCustomMetrics[idx]:
-                    for customMetric in tier.data:
-                        customMetrics.add(customMetric["name"])
-                application["customMetrics"] = customMetrics
+                application["customMetrics"] = set()
+            await AsyncioUtils.gatherWithConcurrency(*[extractApplicationCustomMetrics(application) for application in hostInfo[self.componentType].values()])
 
     def analyze(self, controllerData, thresholds):
         pass
@@ -8,6 +8,9 @@ from backend.util.asyncio_utils import AsyncioUtils
 logger = logging.getLogger(__name__.split('.')[-1])
 
 class Synthetics(JobStepBase):
+    consumes = ("brum",)
+    produces = ("brum.syntheticJobs",)
+
     def __init__(self):
         super().__init__("brum")
 
@@ -5,14 +5,22 @@ from collections import OrderedDict
 
 from backend.api.appd.AppDService import AppDService
 from backend.extractionSteps.JobStepBase import JobStepBase
+from backend.extractionSteps.NodeIndex import NodeIndex
+from backend.extractionSteps.ResultTable import ResultTable
 from backend.util.asyncio_utils import AsyncioUtils
-from backend.util.stdlib_utils import substringBetween
 
 
 logger = logging.getLogger(__name__.split('.')[-1])
 
 
 class AppAgentsAPM(JobStepBase):
+    consumes = ("apm",)
+    produces = ("apm.nodes", "nodeIndex", "nodeIdAppAgentAvailabilityMap", "nodeIdMetaInfoMap")
+    metricPaths = (
+        "Application Infrastructure Performance|*|Individual Nodes|*|Agent|App|Availability",
+        "Application Infrastructure Performance|*|Individual Nodes|*|Agent|Metric Upload|Requests Exceeding Limit",
+    )
+
     def __init__(self):
         super().__init__("apm")
 
@@ -22,11 +30,10 @@ class AppAgentsAPM(JobStepBase):
         1. Makes one API call per application to get Node Metadata.
         2. Makes one API call per application to get Node App Agent Availability.
         3. Makes one API call per application to get Node Requests Exceeding Limit.
+        4. Indexes the nodes of each controller once, later agent steps store their node metrics in the same NodeIndex.
         """
         jobStepName = type(self).__name__
 
-        nodeIdToAppAgentAvailabilityMap = {}
-        nodeIdToMetricLimitMap = {}
         for host, hostInfo in controllerData.items():
             logger.info(f'{hostInfo["controller"].host} - Extracting {jobStepName}')
             controller: AppDService = hostInfo["controller"]
@@ -38,105 +45,64 @@ class AppAgentsAPM(JobStepBase):
             for application in hostInfo[self.componentType].values():
                 getNodesFutures.append(controller.getNodes(application["id"]))
                 appAgentAvailabilityFutures.append(
-                    controller.getMetricData(
-                        applicationID=application["id"],
-                        metric_path="Application Infrastructure Performance|*|Individual Nodes|*|Agent|App|Availability",
-                        rollup=True,
-                        time_range_type="BEFORE_NOW",
-                        duration_in_mins=controller.timeRangeMins,
-                    )
+                    self.getMetricData(controller, application["id"], "Application Infrastructure Performance|*|Individual Nodes|*|Agent|App|Availability")
                 )
                 nodeMetricsUploadRequestsExceedingLimitFutures.append(
-                    controller.getMetricData(
-                        applicationID=application["id"],
-                        metric_path="Application Infrastructure Performance|*|Individual Nodes|*|Agent|Metric Upload|Requests Exceeding Limit",
-                        rollup=True,
-                        time_range_type="BEFORE_NOW",
-                        duration_in_mins=controller.timeRangeMins,
-                    )
+                    self.getMetricData(controller, application["id"], "Application Infrastructure Performance|*|Individual Nodes|*|Agent|Metric Upload|Requests Exceeding Limit")
                 )
             nodes = await AsyncioUtils.gatherWithConcurrency(*getNodesFutures)
             appAgentAvailability = await AsyncioUtils.gatherWithConcurrency(*appAgentAvailabilityFutures)
             nodeMetricsUploadRequestsExceedingLimit = await AsyncioUtils.gatherWithConcurrency(*nodeMetricsUploadRequestsExceedingLimitFutures)
 
-            # Create a dictionary of Node -> Calls Per Minute for fast lookup
-            for rolledUpMetrics in appAgentAvailability:
-                if rolledUpMetrics.error is not None:  # call to gather metrics failed for some reason (most likely 504)
-                    continue
-                for nodeMetric in rolledUpMetrics.data:
-                    try:
-                        # e.g. 'Overall Application Performance|foo|Individual Nodes|bar|Calls per Minute'
-                        tierName = substringBetween(
-                            nodeMetric["metricPath"],
-                            left="Application Infrastructure Performance|",
-                            right="|",
-                        )
-                        nodeName = substringBetween(
-                            nodeMetric["metricPath"],
-                            left="Individual Nodes|",
-                            right="|",
-                        )
-                        appAgentAvailability = nodeMetric["metricValues"][0]["sum"]
-                    except IndexError:
-                        tierName = ""
-                        nodeName = ""
-                        appAgentAvailability = 0
-                    nodeIdToAppAgentAvailabilityMap[tierName + "|" + nodeName] = appAgentAvailability
-
-            # Create a dictionary of Node -> Metrics Upload Requests Exceeding Limit for fast lookup
-            for rolledUpMetrics in nodeMetricsUploadRequestsExceedingLimit:
-                if rolledUpMetrics.error is not None:  # call to gather metrics failed for some reason (most likely 504)
-                    continue
-                for nodeMetric in rolledUpMetrics.data:
-                    try:
-                        # e.g. 'Application Infrastructure Performance|foo|Individual Nodes|bar|Agent|Metric Upload|Requests Exceeding Limit'
-                        tierName = substringBetween(
-                            nodeMetric["metricPath"],
-                            left="Application Infrastructure Performance|",
-                            right="|",
-                        )
-                        nodeName = substringBetween(
-                            nodeMetric["metricPath"],
-                            left="Individual Nodes|",
-                            right="|",
-                        )
-                        nodeMetricsUploadedExceedingLimitCount = nodeMetric["metricValues"][0]["sum"]
-                    except IndexError:
-                        tierName = ""
-                        nodeName = ""
-                        nodeMetricsUploadedExceedingLimitCount = 0
-                    nodeIdToMetricLimitMap[tierName + "|" + nodeName] = nodeMetricsUploadedExceedingLimitCount
-
             nodeMetadataFutures = []
             for nodesList, application in zip(nodes, (hostInfo[self.componentType].values())):
                 nodeIds = [node["id"] for node in nodesList.data]
                 nodeMetadataFutures.append(controller.getAppAgentMetadata(application["id"], nodeIds))
             nodeMetadata = await AsyncioUtils.gatherWithConcurrency(*nodeMetadataFutures)
 
-            # Append node level information to overall host info
-            hostInfo["nodeIdAppAgentAvailabilityMap"] = {}
+            # Index the nodes of the controller once, node metrics of every agent step are stored in its columns
+            nodeIndex = hostInfo["nodeIndex"] = NodeIndex()
             hostInfo["nodeIdMetaInfoMap"] = {}
-            for idx, application in enumerate(hostInfo[self.componentType]):
-                hostInfo[self.componentType][application]["nodes"] = nodes[idx].data
-                for node, metadata in zip(nodes[idx].data, nodeMetadata[idx].data):
+            for idx, application in enumerate(hostInfo[self.componentType].values()):
+                application["nodes"] = nodes[idx].data
+                nodeIndex.addApplication(application, application["nodes"])
+                for node, metadata in zip(application["nodes"], nodeMetadata[idx].data):
                     node["metadata"] = metadata
-                    try:
-                        node["appAgentAvailability"] = nodeIdToAppAgentAvailabilityMap[node["tierName"] + "|" + node["name"]]
-                    except (KeyError, TypeError):
-                        node["appAgentAvailability"] = 0
-                        logger.debug(
-                            f'{hostInfo["controller"].host} - Node: {node["tierName"]}|{node["name"]} returned no metric data for Agent Availability.'
-                        )
-                    hostInfo["nodeIdAppAgentAvailabilityMap"][node["id"]] = node["appAgentAvailability"] / controller.timeRangeMins * 100
-                    hostInfo["nodeIdMetaInfoMap"][node["id"]] = node["metadata"]
-
-                    try:
-                        node["nodeMetricsUploadRequestsExceedingLimit"] = nodeIdToMetricLimitMap[node["tierName"] + "|" + node["name"]]
-                    except (KeyError, TypeError):
-                        node["nodeMetricsUploadRequestsExceedingLimit"] = 0
-                        logger.debug(
-                            f'{hostInfo["controller"].host} - Node: {node["tierName"]}|{node["name"]} returned no metric data for Metrics Upload Requests Exceeding Limit.'
+                    hostInfo["nodeIdMetaInfoMap"][node["id"]] = metadata
+
+            for column, metricName, rolledUpMetricsList in (
+                ("appAgentAvailability", "App Agent Availability", appAgentAvailability),
+                ("metricUploadRequestsExceedingLimit", "Metric Upload Requests Exceeding Limit", nodeMetricsUploadRequestsExceedingLimit),
+            ):
+                for application, rolledUpMetrics in zip(hostInfo[self.componentType].values(), rolledUpMetricsList):
+                    if rolledUpMetrics.error is not None:  # call to gather metrics failed for some reason (most likely 504)
+                        logger.warning(
+                            f'{hostInfo["controller"].host} - Failed to gather {metricName} for application {application["name"]} '
+                            f"(error {rolledUpMetrics.error.msg}), its values will be missing from the report"
                         )
+                        continue
+                    unmatched = nodeIndex.setNodeMetric(column, application, rolledUpMetrics.data)
+                    if unmatched:
+                        logger.debug(f'{hostInfo["controller"].host} - {unmatched} {metricName} metrics of application {application["name"]} matched no node.')
+
+            nodeIndex.writeToNodes(hostInfo[self.componentType], ("appAgentAvailability", "metricUploadRequestsExceedingLimit"))
+            hostInfo["nodeIdAppAgentAvailabilityMap"] = nodeIndex.availabilityPercentByNodeId(controller.timeRangeMins)
+
+    def restoreSnapshot(self, controllerData):
+        # JSON object keys are strings, the maps are keyed by node id
+        for hostInfo in controllerData.values():
+            if "nodeIndex" in hostInfo:
+                hostInfo["nodeIndex"] = NodeIndex.fromJson(hostInfo["nodeIndex"])
+            else:
+                hostInfo["nodeIndex"] = NodeIndex.fromNodes(hostInfo[self.componentType])
+            hostInfo["nodeIdAppAgentAvailabilityMap"] = {int(nodeId): value for nodeId, value in hostInfo["nodeIdAppAgentAvailabilityMap"].items()}
+            hostInfo["nodeIdMetaInfoMap"] = {int(nodeId): value for nodeId, value in hostInfo["nodeIdMetaInfoMap"].items()}
+
+    def restoreAnalysis(self, controllerData, savedResults: dict):
+        super().restoreAnalysis(controllerData, savedResults)
+        # the set of (major, minor, agentType) tuples is saved as a list of lists
+        for hostInfo in controllerData.values():
+            hostInfo["appAgentVersions"] = {tuple(version) for version in hostInfo["appAgentVersions"]}
 
     def analyze(self, controllerData, thresholds):
         """
@@ -158,15 +124,17 @@ class AppAgentsAPM(JobStepBase):
 
         # Get thresholds related to job
         jobStepThresholds = thresholds[self.componentType][jobStepName]
+        self.results = ResultTable(self.componentType)
 
         for host, hostInfo in controllerData.items():
             logger.info(f'{hostInfo["controller"].host} - Analyzing {jobStepName}')
 
             hostInfo["appAgentVersions"] = set()
+            nodeIndex: NodeIndex = hostInfo["nodeIndex"]
 
             for application in hostInfo[self.componentType].values():
                 # Root node of current application for current JobStep.
-                analysisDataRoot = application[jobStepName] = OrderedDict()
+                analysisDataRoot = OrderedDict()
                 # This data goes into the 'JobStep - Metrics' xlsx sheet.
                 analysisDataEvaluatedMetrics = analysisDataRoot["evaluated"] = OrderedDict()
                 # This data goes into the 'JobStep - Raw' xlsx sheet.
@@ -182,16 +150,13 @@ class AppAgentsAPM(JobStepBase):
 
                 application["appAgentVersions"] = []
 
-                for node in application["nodes"]:
+                for row in nodeIndex.applicationRows.get(application["id"], ()):
                     # Support both APIs: new (explicit flag) and old (implicit via non-empty version string)
-                    app_agent_present_flag = node.get("appAgentPresent", None)
-                    app_agent_present = (
-                        app_agent_present_flag is True
-                        or (app_agent_present_flag is None and node.get("appAgentVersion", "") != "")
-                    )
+                    app_agent_present_flag = nodeIndex.appAgentPresent[row]
+                    version_str = nodeIndex.appAgentVersions[row] or ""
+                    app_agent_present = app_agent_present_flag is True or (app_agent_present_flag is None and version_str != "")
 
                     if app_agent_present:
-                        version_str = node.get("appAgentVersion", "")
                         if version_str in nodeVersionMap:
                             nodeVersionMap[version_str] += 1
                         else:
@@ -206,26 +171,27 @@ class AppAgentsAPM(JobStepBase):
                         version = match[0].split(".")
                         majorVersion = int(version[0])
                         minorVersion = int(version[1])
+                        agentType = nodeIndex.agentTypes[row]
 
-                        hostInfo["appAgentVersions"].add((majorVersion, minorVersion, node.get("agentType")))
-                        application["appAgentVersions"].append(f"{node.get('agentType')}:{version[0]}.{version[1]}")
+                        hostInfo["appAgentVersions"].add((majorVersion, minorVersion, agentType))
+                        application["appAgentVersions"].append(f"{agentType}:{version[0]}.{version[1]}")
 
                         if majorVersion == 4:
-                            node["appAgentAge"] = 3
+                            nodeIndex.appAgentAge[row] = 3
                         else:
                             years = currYear - majorVersion
                             if minorVersion < currMonth:
                                 years += 1
-                            node["appAgentAge"] = years
+                            nodeIndex.appAgentAge[row] = years
                             if years <= 2:
                                 numberAppAgentsLessThan2YearsOld += 1
                             if years == 1:
                                 numberAppAgentsLessThan1YearOld += 1
 
-                        if node.get("appAgentAvailability", 0) != 0:
+                        if nodeIndex.appAgentAvailability[row] != 0:
                             numberAppAgentsReportingData += 1
 
-                        if node.get("nodeMetricsUploadRequestsExceedingLimit", 0) != 0:
+                        if nodeIndex.metricUploadRequestsExceedingLimit[row] != 0:
                             analysisDataEvaluatedMetrics["metricLimitNotHit"] = False
 
                 # In the case of multiple versions, will return the largest common agent count regardless of version.
@@ -261,4 +227,8 @@ class AppAgentsAPM(JobStepBase):
                 analysisDataRawMetrics["numberAppAgentsLessThan2YearsOld"] = numberAppAgentsLessThan2YearsOld
                 analysisDataRawMetrics["numberOfAgentsReportingData"] = numberAppAgentsReportingData
 
-                self.applyThresholds(analysisDataEvaluatedMetrics, analysisDataRoot, jobStepThresholds)
+                self.results.append(hostInfo, application, analysisDataRoot)
+
+            nodeIndex.writeToNodes(hostInfo[self.componentType], ("appAgentAge",))
+
+        self.applyThresholds(self.results, jobStepThresholds)
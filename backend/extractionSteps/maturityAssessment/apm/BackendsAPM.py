@@ -3,6 +3,7 @@ from collections import OrderedDict
 
 from backend.api.appd.AppDService import AppDService
 from backend.extractionSteps.JobStepBase import JobStepBase
+from backend.extractionSteps.ResultTable import ResultTable
 from backend.util.asyncio_utils import AsyncioUtils
 from backend.util.stdlib_utils import substringBetween
 
@@ -11,6 +12,10 @@ logger = logging.getLogger(__name__.split('.')[-1])
 
 
 class BackendsAPM(JobStepBase):
+    consumes = ("apm",)
+    produces = ("apm.backends", "apm.allCustomExitPoints", "apm.backendDiscoveryConfigs")
+    metricPaths = ("Backends|*|Calls per Minute",)
+
     def __init__(self):
         super().__init__("apm")
 
@@ -39,13 +44,7 @@ class BackendsAPM(JobStepBase):
                 getAllCustomExitPointsFutures.append(controller.getAllCustomExitPoints(application["id"]))
                 getBackendDiscoveryConfigsFutures.append(controller.getBackendDiscoveryConfigs(application["id"]))
                 backendCallsPerMinuteFutures.append(
-                    controller.getMetricData(
-                        applicationID=application["id"],
-                        metric_path="Backends|*|Calls per Minute",
-                        rollup=True,
-                        time_range_type="BEFORE_NOW",
-                        duration_in_mins=controller.timeRangeMins,
-                    )
+                    self.getMetricData(controller, application["id"], "Backends|*|Calls per Minute")
                 )
             backends = await AsyncioUtils.gatherWithConcurrency(*getBackendsFutures)
             allCustomExitPoints = await AsyncioUtils.gatherWithConcurrency(*getAllCustomExitPointsFutures)
@@ -53,8 +52,12 @@ class BackendsAPM(JobStepBase):
             backendCallsPerMinute = await AsyncioUtils.gatherWithConcurrency(*backendCallsPerMinuteFutures)
 
             # Create a dictionary of Node -> Calls Per Minute for fast lookup
-            for rolledUpMetrics in backendCallsPerMinute:
+            for application, rolledUpMetrics in zip(hostInfo[self.componentType].values(), backendCallsPerMinute):
                 if rolledUpMetrics.error is not None:  # call to gather metrics failed for some reason (most likely 504)
+                    logger.warning(
+                        f'{hostInfo["controller"].host} - Failed to gather Backend Calls per Minute for application {application["name"]} '
+                        f"(error {rolledUpMetrics.error.msg}), its values will be missing from the report"
+                    )
                     continue
                 for backendMetric in rolledUpMetrics.data:
                     try:
@@ -94,13 +97,14 @@ class BackendsAPM(JobStepBase):
 
         # Get thresholds related to job
         jobStepThresholds = thresholds[self.componentType][jobStepName]
+        self.results = ResultTable(self.componentType)
 
         for host, hostInfo in controllerData.items():
             logger.info(f'{hostInfo["controller"].host} - Analyzing {jobStepName}')
 
             for application in hostInfo[self.componentType].values():
                 # Root node of current application for current JobStep.
-                analysisDataRoot = application[jobStepName] = OrderedDict()
+                analysisDataRoot = OrderedDict()
                 # This data goes into the 'JobStep - Metrics' xlsx sheet.
                 analysisDataEvaluatedMetrics = analysisDataRoot["evaluated"] = OrderedDict()
                 # This data goes into the 'JobStep - Raw' xlsx sheet.
@@ -149,4 +153,6 @@ class BackendsAPM(JobStepBase):
                 analysisDataRawMetrics["numberOfModifiedDefaultBackendDiscoveryConfigs"] = numberOfModifiedDefaultBackendDiscoveryConfigs
                 analysisDataRawMetrics["numberOfCustomExitPoints"] = numberOfCustomExitPoints
 
-                self.applyThresholds(analysisDataEvaluatedMetrics, analysisDataRoot, jobStepThresholds)
+                self.results.append(hostInfo, application, analysisDataRoot)
+
+        self.applyThresholds(self.results, jobStepThresholds)
@@ -3,6 +3,7 @@ from collections import OrderedDict
 
 from backend.api.appd.AppDService import AppDService
 from backend.extractionSteps.JobStepBase import JobStepBase
+from backend.extractionSteps.ResultTable import ResultTable
 from backend.util.asyncio_utils import AsyncioUtils
 
 
@@ -10,6 +11,10 @@ logger = logging.getLogger(__name__.split('.')[-1])
 
 
 class BusinessTransactionsAPM(JobStepBase):
+    consumes = ("apm",)
+    produces = ("apm.businessTransactionCallsPerMinute", "apm.appLevelBtConfig", "apm.btMatchRules")
+    metricPaths = ("Business Transaction Performance|Business Transactions|*|*|Calls per Minute",)
+
     def __init__(self):
         super().__init__("apm")
 
@@ -32,13 +37,7 @@ class BusinessTransactionsAPM(JobStepBase):
             getBtMatchRulesFutures = []
             for application in hostInfo[self.componentType].values():
                 getBTCallsPerMinuteFutures.append(
-                    controller.getMetricData(
-                        applicationID=application["id"],
-                        metric_path="Business Transaction Performance|Business Transactions|*|*|Calls per Minute",
-                        rollup=True,
-                        time_range_type="BEFORE_NOW",
-                        duration_in_mins=controller.timeRangeMins,
-                    )
+                    self.getMetricData(controller, application["id"], "Business Transaction Performance|Business Transactions|*|*|Calls per Minute")
                 )
                 getAppLevelBtConfigFutures.append(controller.getAppLevelBTConfig(application["id"]))
                 getBtMatchRulesFutures.append(controller.getBtMatchRules(application["id"]))
@@ -66,13 +65,14 @@ class BusinessTransactionsAPM(JobStepBase):
 
         # Get thresholds related to job
         jobStepThresholds = thresholds[self.componentType][jobStepName]
+        self.results = ResultTable(self.componentType)
 
         for host, hostInfo in controllerData.items():
             logger.info(f'{hostInfo["controller"].host} - Analyzing {jobStepName}')
 
             for application in hostInfo[self.componentType].values():
                 # Root node of current application for current JobStep.
-                analysisDataRoot = application[jobStepName] = OrderedDict()
+                analysisDataRoot = OrderedDict()
                 # This data goes into the 'JobStep - Metrics' xlsx sheet.
                 analysisDataEvaluatedMetrics = analysisDataRoot["evaluated"] = OrderedDict()
                 # This data goes into the 'JobStep - Raw' xlsx sheet.
@@ -148,4 +148,6 @@ class BusinessTransactionsAPM(JobStepBase):
                 analysisDataRawMetrics["btLockdownEnabled"] = analysisDataEvaluatedMetrics["btLockdownEnabled"]
                 analysisDataRawMetrics["numberCustomMatchRules"] = numberOfCustomMatchRules
 
-                self.applyThresholds(analysisDataEvaluatedMetrics, analysisDataRoot, jobStepThresholds)
+                self.results.append(hostInfo, application, analysisDataRoot)
+
+        self.applyThresholds(self.results, jobStepThresholds)
@@ -1,15 +1,19 @@
 import logging
-from collections import OrderedDict
+from collections import OrderedDict, defaultdict
 from datetime import datetime
 
 from backend.extractionSteps.JobStepBase import JobStepBase
-from backend.util.stdlib_utils import get_recursively
+from backend.extractionSteps.ResultTable import ResultTable
+from backend.util.stdlib_utils import AhoCorasick, get_fields_recursively
 
 
 logger = logging.getLogger(__name__.split('.')[-1])
 
 
 class DashboardsAPM(JobStepBase):
+    consumes = ("apm", "exportedDashboards")
+    produces = ("exportedDashboards", "apm.apmDashboards", "apm.biqDashboards")
+
     def __init__(self):
         super().__init__("apm")
 
@@ -17,30 +21,43 @@ class DashboardsAPM(JobStepBase):
         """
         Extract Dashboard details.
         1. No API calls to make, simply associate dashboards with which applications they have widgets for.
+        2. Dashboards are indexed by application name and id, and ADQL queries are matched against all application names at once.
         """
         jobStepName = type(self).__name__
 
         for host, hostInfo in controllerData.items():
             logger.info(f'{hostInfo["controller"].host} - Extracting {jobStepName}')
 
-            for dashboard in hostInfo["exportedDashboards"]:
-                dashboard["applicationNames"] = get_recursively(dashboard, "applicationName")
-                dashboard["applicationIDs"] = get_recursively(dashboard, "applicationId")
-                dashboard["adqlQueries"] = get_recursively(dashboard, "adqlQueryList")
-
-            for idx, applicationName in enumerate(hostInfo[self.componentType]):
-                application = hostInfo[self.componentType][applicationName]
-                application["apmDashboards"] = []
-                application["biqDashboards"] = []
-
-                for dashboard in hostInfo["exportedDashboards"]:
-                    if application["name"] in dashboard["applicationNames"]:
-                        application["apmDashboards"].append(dashboard)
-                    elif application["id"] in dashboard["applicationIDs"]:
-                        application["apmDashboards"].append(dashboard)
-
-                    if any(application["name"] in item for item in dashboard["adqlQueries"]):
-                        application["biqDashboards"].append(dashboard)
+            dashboards = hostInfo["exportedDashboards"]
+            applications = list(hostInfo[self.componentType].values())
+            # BiQ widgets reference applications by name anywhere in their ADQL queries
+            applicationNameMatcher = AhoCorasick([application["name"] for application in applications])
+
+            # Inverted index from application name, id and ADQL matches to dashboards, built in one pass over the exports
+            dashboardsByApplicationName = defaultdict(list)
+            dashboardsByApplicationId = defaultdict(list)
+            biqDashboardsByApplication = defaultdict(list)
+            for dashboardIdx, dashboard in enumerate(dashboards):
+                fields = get_fields_recursively(dashboard, ("applicationName", "applicationId", "adqlQueryList"))
+                dashboard["applicationNames"] = fields["applicationName"]
+                dashboard["applicationIDs"] = fields["applicationId"]
+                dashboard["adqlQueries"] = fields["adqlQueryList"]
+
+                for applicationName in dashboard["applicationNames"]:
+                    dashboardsByApplicationName[applicationName].append(dashboardIdx)
+                for applicationId in dashboard["applicationIDs"]:
+                    dashboardsByApplicationId[applicationId].append(dashboardIdx)
+                matchedApplications = set()
+                for adqlQuery in dashboard["adqlQueries"]:
+                    matchedApplications.update(applicationNameMatcher.search(adqlQuery))
+                for applicationIdx in matchedApplications:
+                    biqDashboardsByApplication[applicationIdx].append(dashboardIdx)
+
+            for applicationIdx, application in enumerate(applications):
+                # dashboards keep their export order, a dashboard matching both name and id is listed once
+                apmDashboardIdxs = set(dashboardsByApplicationName.get(application["name"], ())) | set(dashboardsByApplicationId.get(application["id"], ()))
+                application["apmDashboards"] = [dashboards[dashboardIdx] for dashboardIdx in sorted(apmDashboardIdxs)]
+                application["biqDashboards"] = [dashboards[dashboardIdx] for dashboardIdx in biqDashboardsByApplication.get(applicationIdx, ())]
 
     def analyze(self, controllerData, thresholds):
         """
@@ -54,15 +71,16 @@ class DashboardsAPM(JobStepBase):
 
         # Get thresholds related to job
         jobStepThresholds = thresholds[self.componentType][jobStepName]
-
-        now = datetime.now()
+        self.results = ResultTable(self.componentType)
 
         for host, hostInfo in controllerData.items():
             logger.info(f'{hostInfo["controller"].host} - Analyzing {jobStepName}')
+            # dashboard age is relative to the extraction, which matters for replayed runs
+            now = datetime.fromtimestamp(hostInfo["controller"].endTime / 1000)
 
             for application in hostInfo[self.componentType].values():
                 # Root node of current application for current JobStep.
-                analysisDataRoot = application[jobStepName] = OrderedDict()
+                analysisDataRoot = OrderedDict()
                 # This data goes into the 'JobStep - Metrics' xlsx sheet.
                 analysisDataEvaluatedMetrics = analysisDataRoot["evaluated"] = OrderedDict()
                 # This data goes into the 'JobStep - Raw' xlsx sheet.
@@ -93,4 +111,6 @@ class DashboardsAPM(JobStepBase):
                 # numberOfDashboardsUsingBiQ
                 analysisDataEvaluatedMetrics["numberOfDashboardsUsingBiQ"] = len(application["biqDashboards"])
 
-                self.applyThresholds(analysisDataEvaluatedMetrics, analysisDataRoot, jobStepThresholds)
+                self.results.append(hostInfo, application, analysisDataRoot)
+
+        self.applyThresholds(self.results, jobStepThresholds)
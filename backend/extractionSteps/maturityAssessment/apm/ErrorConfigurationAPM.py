@@ -3,6 +3,7 @@ from collections import OrderedDict
 
 from backend.api.appd.AppDService import AppDService
 from backend.extractionSteps.JobStepBase import JobStepBase
+from backend.extractionSteps.ResultTable import ResultTable
 from backend.util.asyncio_utils import AsyncioUtils
 from backend.util.stdlib_utils import substringBetween
 
@@ -11,6 +12,10 @@ logger = logging.getLogger(__name__.split('.')[-1])
 
 
 class ErrorConfigurationAPM(JobStepBase):
+    consumes = ("apm",)
+    produces = ("apm.businessTransactionErrorsPerMinute",)
+    metricPaths = ("Business Transaction Performance|Business Transactions|*|*|Errors per Minute",)
+
     def __init__(self):
         super().__init__("apm")
 
@@ -31,13 +36,7 @@ class ErrorConfigurationAPM(JobStepBase):
             getBusinessTransactionErrorsPerMinuteFutures = []
             for application in hostInfo[self.componentType].values():
                 getBusinessTransactionErrorsPerMinuteFutures.append(
-                    controller.getMetricData(
-                        applicationID=application["id"],
-                        metric_path="Business Transaction Performance|Business Transactions|*|*|Errors per Minute",
-                        rollup=True,
-                        time_range_type="BEFORE_NOW",
-                        duration_in_mins=controller.timeRangeMins,
-                    )
+                    self.getMetricData(controller, application["id"], "Business Transaction Performance|Business Transactions|*|*|Errors per Minute")
                 )
 
             businessTransactionErrorsPerMinute = await AsyncioUtils.gatherWithConcurrency(*getBusinessTransactionErrorsPerMinuteFutures)
@@ -57,13 +56,14 @@ class ErrorConfigurationAPM(JobStepBase):
 
         # Get thresholds related to job
         jobStepThresholds = thresholds[self.componentType][jobStepName]
+        self.results = ResultTable(self.componentType)
 
         for host, hostInfo in controllerData.items():
             logger.info(f'{hostInfo["controller"].host} - Analyzing {jobStepName}')
 
             for application in hostInfo[self.componentType].values():
                 # Root node of current application for current JobStep.
-                analysisDataRoot = application[jobStepName] = OrderedDict()
+                analysisDataRoot = OrderedDict()
                 # This data goes into the 'JobStep - Metrics' xlsx sheet.
                 analysisDataEvaluatedMetrics = analysisDataRoot["evaluated"] = OrderedDict()
                 # This data goes into the 'JobStep - Raw' xlsx sheet.
@@ -148,4 +148,6 @@ class ErrorConfigurationAPM(JobStepBase):
                 analysisDataRawMetrics["httpErrorReturnCodes"] = httpErrorReturnCodes
                 analysisDataRawMetrics["errorRedirectPages"] = errorRedirectPages
 
-                self.applyThresholds(analysisDataEvaluatedMetrics, analysisDataRoot, jobStepThresholds)
+                self.results.append(hostInfo, application, analysisDataRoot)
+
+        self.applyThresholds(self.results, jobStepThresholds)
@@ -1,10 +1,10 @@
-import json
 import logging
 from collections import OrderedDict
 
 from backend.api.appd.AppDService import AppDService
-from deepdiff import DeepDiff
+from backend.extractionSteps.HealthRuleFingerprints import HealthRuleFingerprints
 from backend.extractionSteps.JobStepBase import JobStepBase
+from backend.extractionSteps.ResultTable import ResultTable
 from backend.util.asyncio_utils import AsyncioUtils
 
 
@@ -12,6 +12,9 @@ logger = logging.getLogger(__name__.split('.')[-1])
 
 
 class HealthRulesAndAlertingAPM(JobStepBase):
+    consumes = ("apm",)
+    produces = ("apm.eventCounts", "apm.policies", "apm.healthRules")
+
     def __init__(self):
         super().__init__("apm")
 
@@ -71,14 +74,16 @@ class HealthRulesAndAlertingAPM(JobStepBase):
 
         # Get thresholds related to job
         jobStepThresholds = thresholds[self.componentType][jobStepName]
+        self.results = ResultTable(self.componentType)
 
-        defaultHealthRules = json.loads(open("backend/resources/controllerDefaults/defaultHealthRulesAPM.json").read())
+        # default health rules are fingerprinted once, each application compares fingerprints
+        defaultHealthRules = HealthRuleFingerprints(self.componentType)
         for host, hostInfo in controllerData.items():
             logger.info(f'{hostInfo["controller"].host} - Analyzing {jobStepName}')
 
             for application in hostInfo[self.componentType].values():
                 # Root node of current application for current JobStep.
-                analysisDataRoot = application[jobStepName] = OrderedDict()
+                analysisDataRoot = OrderedDict()
                 # This data goes into the 'JobStep - Metrics' xlsx sheet.
                 analysisDataEvaluatedMetrics = analysisDataRoot["evaluated"] = OrderedDict()
                 # This data goes into the 'JobStep - Raw' xlsx sheet.
@@ -89,20 +94,7 @@ class HealthRulesAndAlertingAPM(JobStepBase):
                 analysisDataEvaluatedMetrics["numberOfHealthRuleViolations"] = policyEventCounts["warning"] + policyEventCounts["critical"]
 
                 # numberOfDefaultHealthRulesModified
-                defaultHealthRulesModified = 0
-                for hrName, heathRule in defaultHealthRules.items():
-                    if hrName in application["healthRules"]:
-                        del application["healthRules"][hrName]["id"]
-                        healthRuleDiff = DeepDiff(
-                            defaultHealthRules[hrName],
-                            application["healthRules"][hrName],
-                            ignore_order=True,
-                        )
-                        if healthRuleDiff != {}:
-                            defaultHealthRulesModified += 1
-                    else:
-                        defaultHealthRulesModified += 1
-                analysisDataEvaluatedMetrics["numberOfDefaultHealthRulesModified"] = defaultHealthRulesModified
+                analysisDataEvaluatedMetrics["numberOfDefaultHealthRulesModified"] = defaultHealthRules.countModified(application["healthRules"])
 
                 # numberOfActionsBoundToEnabledPolicies
                 actionsInEnabledPolicies = set()
@@ -117,7 +109,7 @@ class HealthRulesAndAlertingAPM(JobStepBase):
 
                 # numberOfCustomHealthRules
                 analysisDataEvaluatedMetrics["numberOfCustomHealthRules"] = len(
-                    set(application["healthRules"].keys()).symmetric_difference(defaultHealthRules.keys())
+                    set(application["healthRules"].keys()).symmetric_difference(defaultHealthRules.names())
                 )
 
                 analysisDataRawMetrics["totalWarningPolicyViolations"] = policyEventCounts["warning"]
@@ -125,4 +117,6 @@ class HealthRulesAndAlertingAPM(JobStepBase):
                 analysisDataRawMetrics["numberOfHealthRules"] = len(application["healthRules"])
                 analysisDataRawMetrics["numberOfPolicies"] = len(application["policies"])
 
-                self.applyThresholds(analysisDataEvaluatedMetrics, analysisDataRoot, jobStepThresholds)
+                self.results.append(hostInfo, application, analysisDataRoot)
+
+        self.applyThresholds(self.results, jobStepThresholds)
@@ -5,14 +5,19 @@ from collections import OrderedDict
 
 from backend.api.appd.AppDService import AppDService
 from backend.extractionSteps.JobStepBase import JobStepBase
+from backend.extractionSteps.NodeIndex import NodeIndex
+from backend.extractionSteps.ResultTable import ResultTable
 from backend.util.asyncio_utils import AsyncioUtils
-from backend.util.stdlib_utils import substringBetween
 
 
 logger = logging.getLogger(__name__.split('.')[-1])
 
 
 class MachineAgentsAPM(JobStepBase):
+    consumes = ("apm", "apm.nodes", "nodeIndex")
+    produces = ("apm.nodes", "nodeIndex", "nodeMachineIdMachineAgentAvailabilityMap")
+    metricPaths = ("Application Infrastructure Performance|*|Individual Nodes|*|Agent|Machine|Availability",)
+
     def __init__(self):
         super().__init__("apm")
 
@@ -20,11 +25,10 @@ class MachineAgentsAPM(JobStepBase):
         """
         Extract node level details.
         1. Makes one API call per application to get node Machine Agent Availability.
-        2. Is dependent on nodes from AppAgents.
+        2. Is dependent on nodes from AppAgents, availability is stored in the node index AppAgents built and on the nodes.
         """
         jobStepName = type(self).__name__
 
-        nodeIdToMachineAgentAvailabilityMap = {}
         for host, hostInfo in controllerData.items():
             logger.info(f'{hostInfo["controller"].host} - Extracting {jobStepName}')
             controller: AppDService = hostInfo["controller"]
@@ -33,54 +37,36 @@ class MachineAgentsAPM(JobStepBase):
             machineAgentAvailabilityFutures = []
             for application in hostInfo[self.componentType].values():
                 machineAgentAvailabilityFutures.append(
-                    controller.getMetricData(
-                        applicationID=application["id"],
-                        metric_path="Application Infrastructure Performance|*|Individual Nodes|*|Agent|Machine|Availability",
-                        rollup=True,
-                        time_range_type="BEFORE_NOW",
-                        duration_in_mins=controller.timeRangeMins,
-                    )
+                    self.getMetricData(controller, application["id"], "Application Infrastructure Performance|*|Individual Nodes|*|Agent|Machine|Availability")
                 )
             machineAgentAvailability = await AsyncioUtils.gatherWithConcurrency(*machineAgentAvailabilityFutures)
 
-            # Create a dictionary of Node -> Calls Per Minute for fast lookup
-            for rolledUpMetrics in machineAgentAvailability:
+            # Store node metrics in the node index built by AppAgents
+            nodeIndex: NodeIndex = hostInfo["nodeIndex"]
+            for application, rolledUpMetrics in zip(hostInfo[self.componentType].values(), machineAgentAvailability):
                 if rolledUpMetrics.error is not None:  # call to gather metrics failed for some reason (most likely 504)
-                    continue
-                for nodeMetric in rolledUpMetrics.data:
-                    try:
-                        # e.g. 'Overall Application Performance|foo|Individual Nodes|bar|Calls per Minute'
-                        tierName = substringBetween(
-                            nodeMetric["metricPath"],
-                            left="Application Infrastructure Performance|",
-                            right="|",
-                        )
-                        nodeName = substringBetween(
-                            nodeMetric["metricPath"],
-                            left="Individual Nodes|",
-                            right="|",
-                        )
-                        machineAgentAvailabilityMetric = nodeMetric["metricValues"][0]["sum"]
-                    except IndexError:
-                        tierName = ""
-                        nodeName = ""
-                        machineAgentAvailabilityMetric = 0
-                    nodeIdToMachineAgentAvailabilityMap[tierName + "|" + nodeName] = machineAgentAvailabilityMetric
-
-            # Append node level information to overall host info
-            hostInfo["nodeMachineIdMachineAgentAvailabilityMap"] = {}
-            for application in hostInfo[self.componentType]:
-                for node in hostInfo[self.componentType][application]["nodes"]:
-                    try:
-                        node["machineAgentAvailability"] = nodeIdToMachineAgentAvailabilityMap[node["tierName"] + "|" + node["name"]]
-                    except (KeyError, TypeError):
-                        node["machineAgentAvailability"] = 0
-                        logger.debug(
-                            f'{hostInfo["controller"].host} - Node: {node["tierName"]}|{node["name"]} returned no metric data for Agent Availability.'
-                        )
-                    hostInfo["nodeMachineIdMachineAgentAvailabilityMap"][node["machineId"]] = (
-                        node["machineAgentAvailability"] / controller.timeRangeMins * 100
+                    logger.warning(
+                        f'{hostInfo["controller"].host} - Failed to gather Machine Agent Availability for application {application["name"]} '
+                        f"(error {rolledUpMetrics.error.msg}), its values will be missing from the report"
                     )
+                    continue
+                unmatched = nodeIndex.setNodeMetric("machineAgentAvailability", application, rolledUpMetrics.data)
+                if unmatched:
+                    logger.debug(f'{hostInfo["controller"].host} - {unmatched} Machine Agent Availability metrics of application {application["name"]} matched no node.')
+
+            nodeIndex.writeToNodes(hostInfo[self.componentType], ("machineAgentAvailability",))
+            hostInfo["nodeMachineIdMachineAgentAvailabilityMap"] = nodeIndex.availabilityPercentByMachineId(controller.timeRangeMins)
+
+    def restoreSnapshot(self, controllerData):
+        # JSON object keys are strings, the map is keyed by machine id. The node index is restored by AppAgents.
+        for hostInfo in controllerData.values():
+            hostInfo["nodeMachineIdMachineAgentAvailabilityMap"] = {int(nodeId): value for nodeId, value in hostInfo["nodeMachineIdMachineAgentAvailabilityMap"].items()}
+
+    def restoreAnalysis(self, controllerData, savedResults: dict):
+        super().restoreAnalysis(controllerData, savedResults)
+        # the set of (major, minor) tuples is saved as a list of lists
+        for hostInfo in controllerData.values():
+            hostInfo["machineAgentVersions"] = {tuple(version) for version in hostInfo["machineAgentVersions"]}
 
     def analyze(self, controllerData, thresholds):
         """
@@ -102,15 +88,17 @@ class MachineAgentsAPM(JobStepBase):
 
         # Get thresholds related to job
         jobStepThresholds = thresholds[self.componentType][jobStepName]
+        self.results = ResultTable(self.componentType)
 
         for host, hostInfo in controllerData.items():
             logger.info(f'{hostInfo["controller"].host} - Analyzing {jobStepName}')
 
             hostInfo["machineAgentVersions"] = set()
+            nodeIndex: NodeIndex = hostInfo["nodeIndex"]
 
             for application in hostInfo[self.componentType].values():
                 # Root node of current application for current JobStep.
-                analysisDataRoot = application[jobStepName] = OrderedDict()
+                analysisDataRoot = OrderedDict()
                 # This data goes into the 'JobStep - Metrics' xlsx sheet.
                 analysisDataEvaluatedMetrics = analysisDataRoot["evaluated"] = OrderedDict()
                 # This data goes into the 'JobStep - Raw' xlsx sheet.
@@ -126,13 +114,13 @@ class MachineAgentsAPM(JobStepBase):
 
                 application["machineAgentVersions"] = []
 
-                for node in application["nodes"]:
-                    machine_agent_present = node.get("machineAgentPresent") is True
-                    app_agent_present = node.get("appAgentPresent") is True
-                    if machine_agent_present and node["machineAgentVersion"] in nodeVersionMap:
-                        nodeVersionMap[node["machineAgentVersion"]] += 1
+                for row in nodeIndex.applicationRows.get(application["id"], ()):
+                    machine_agent_present = nodeIndex.machineAgentPresent[row] is True
+                    app_agent_present = nodeIndex.appAgentPresent[row] is True
+                    if machine_agent_present and nodeIndex.machineAgentVersions[row] in nodeVersionMap:
+                        nodeVersionMap[nodeIndex.machineAgentVersions[row]] += 1
                     elif machine_agent_present:
-                        nodeVersionMap[node["machineAgentVersion"]] = 1
+                        nodeVersionMap[nodeIndex.machineAgentVersions[row]] = 1
 
                     if machine_agent_present and app_agent_present:
                         numberMachineAgentsInstalledAlongsideAppAgents += 1
@@ -143,7 +131,7 @@ class MachineAgentsAPM(JobStepBase):
                         continue
 
                             # Calculate version age
-                    version = semanticVersionRegex.search(node["machineAgentVersion"])[0].split(".")  # e.g. 'Server Agent v21.6.1.2 GA ...'
+                    version = semanticVersionRegex.search(nodeIndex.machineAgentVersions[row])[0].split(".")  # e.g. 'Server Agent v21.6.1.2 GA ...'
                     majorVersion = int(version[0])
                     minorVersion = int(version[1])
 
@@ -151,12 +139,12 @@ class MachineAgentsAPM(JobStepBase):
                     application["machineAgentVersions"].append(f"{version[0]}.{version[1]}")
 
                     if majorVersion == 4:  # Agents with version 4 and below will always fail.
-                        node["machineAgentAge"] = 3
+                        nodeIndex.machineAgentAge[row] = 3
                     else:
                         years = currYear - majorVersion
                         if minorVersion < currMonth:
                             years += 1
-                        node["machineAgentAge"] = years
+                        nodeIndex.machineAgentAge[row] = years
 
                         if years <= 2:
                             numberMachineAgentsLessThan2YearsOld += 1
@@ -164,7 +152,7 @@ class MachineAgentsAPM(JobStepBase):
                             numberMachineAgentsLessThan1YearOld += 1
 
                     # Determine application load
-                    if node["machineAgentAvailability"] != 0:
+                    if nodeIndex.machineAgentAvailability[row] != 0:
                             numberMachineAgentsReportingData += 1
 
                 # In the case of multiple versions, will return the largest common agent count regardless of version.
@@ -206,4 +194,8 @@ class MachineAgentsAPM(JobStepBase):
                 analysisDataRawMetrics["numberMachineAgentsLessThan1YearOld"] = numberMachineAgentsLessThan1YearOld
                 analysisDataRawMetrics["numberMachineAgentsLessThan2YearsOld"] = numberMachineAgentsLessThan2YearsOld
 
-                self.applyThresholds(analysisDataEvaluatedMetrics, analysisDataRoot, jobStepThresholds)
+                self.results.append(hostInfo, application, analysisDataRoot)
+
+            nodeIndex.writeToNodes(hostInfo[self.componentType], ("machineAgentAge",))
+
+        self.applyThresholds(self.results, jobStepThresholds)
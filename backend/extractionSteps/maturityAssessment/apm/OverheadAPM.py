@@ -3,6 +3,7 @@ from collections import OrderedDict
 
 from backend.api.appd.AppDService import AppDService
 from backend.extractionSteps.JobStepBase import JobStepBase
+from backend.extractionSteps.ResultTable import ResultTable
 from backend.util.asyncio_utils import AsyncioUtils
 
 
@@ -10,6 +11,14 @@ logger = logging.getLogger(__name__.split('.')[-1])
 
 
 class OverheadAPM(JobStepBase):
+    consumes = ("apm",)
+    produces = (
+        "apm.agentConfigurations",
+        "apm.devModeConfig",
+        "apm.instrumentationLevel",
+        "apm.applicationConfiguration",
+    )
+
     def __init__(self):
         super().__init__("apm")
 
@@ -65,13 +74,14 @@ class OverheadAPM(JobStepBase):
 
         # Get thresholds related to job
         jobStepThresholds = thresholds[self.componentType][jobStepName]
+        self.results = ResultTable(self.componentType)
 
         for host, hostInfo in controllerData.items():
             logger.info(f'{hostInfo["controller"].host} - Analyzing {jobStepName}')
 
             for application in hostInfo[self.componentType].values():
                 # Root node of current application for current JobStep.
-                analysisDataRoot = application[jobStepName] = OrderedDict()
+                analysisDataRoot = OrderedDict()
                 # This data goes into the 'JobStep - Metrics' xlsx sheet.
                 analysisDataEvaluatedMetrics = analysisDataRoot["evaluated"] = OrderedDict()
                 # This data goes into the 'JobStep - Raw' xlsx sheet.
@@ -120,4 +130,6 @@ class OverheadAPM(JobStepBase):
                 analysisDataRawMetrics["numberOfComponentsWithFiendEntryPointsEnabled"] = numberOfComponentsWithFiendEntryPointsEnabled
                 analysisDataRawMetrics["numberOfTransactionsWithDevModeEnabled"] = numberOfTransactionsWithDevModeEnabled
 
-                self.applyThresholds(analysisDataEvaluatedMetrics, analysisDataRoot, jobStepThresholds)
+                self.results.append(hostInfo, application, analysisDataRoot)
+
+        self.applyThresholds(self.results, jobStepThresholds)
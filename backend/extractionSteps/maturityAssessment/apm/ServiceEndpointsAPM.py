@@ -1,8 +1,10 @@
 import logging
 from collections import OrderedDict
 
+from backend.api.Result import Result
 from backend.api.appd.AppDService import AppDService
 from backend.extractionSteps.JobStepBase import JobStepBase
+from backend.extractionSteps.ResultTable import ResultTable
 from backend.util.asyncio_utils import AsyncioUtils
 
 
@@ -10,6 +12,14 @@ logger = logging.getLogger(__name__.split('.')[-1])
 
 
 class ServiceEndpointsAPM(JobStepBase):
+    consumes = ("apm",)
+    produces = (
+        "apm.serviceEndpoints",
+        "apm.serviceEndpointCustomMatchRules",
+        "apm.serviceEndpointDefaultMatchRules",
+    )
+    metricPaths = ("Service Endpoints|*|*|Calls per Minute",)
+
     def __init__(self):
         super().__init__("apm")
 
@@ -30,13 +40,7 @@ class ServiceEndpointsAPM(JobStepBase):
             getServiceEndpointMatchRulesFutures = []
             for application in hostInfo[self.componentType].values():
                 getServiceEndpointCallsPerMinuteFutures.append(
-                    controller.getMetricData(
-                        applicationID=application["id"],
-                        metric_path="Service Endpoints|*|*|Calls per Minute",
-                        rollup=True,
-                        time_range_type="BEFORE_NOW",
-                        duration_in_mins=controller.timeRangeMins,
-                    )
+                    self.getMetricData(controller, application["id"], "Service Endpoints|*|*|Calls per Minute")
                 )
                 getServiceEndpointMatchRulesFutures.append(controller.getServiceEndpointMatchRules(application["id"]))
 
@@ -49,6 +53,12 @@ class ServiceEndpointsAPM(JobStepBase):
                 application["serviceEndpointCustomMatchRules"] = serviceEndpointMatchRules[idx].data[0]
                 application["serviceEndpointDefaultMatchRules"] = serviceEndpointMatchRules[idx].data[1]
 
+    def restoreSnapshot(self, controllerData):
+        for hostInfo in controllerData.values():
+            for application in hostInfo[self.componentType].values():
+                application["serviceEndpointCustomMatchRules"] = [Result.fromJson(tier) for tier in application["serviceEndpointCustomMatchRules"]]
+                application["serviceEndpointDefaultMatchRules"] = [Result.fromJson(rule) for rule in application["serviceEndpointDefaultMatchRules"]]
+
     def analyze(self, controllerData, thresholds):
         """
         Analysis of node level details.
@@ -60,6 +70,7 @@ class ServiceEndpointsAPM(JobStepBase):
 
         # Get thresholds related to job
         jobStepThresholds = thresholds[self.componentType][jobStepName]
+        self.results = ResultTable(self.componentType)
 
         for host, hostInfo in controllerData.items():
             logger.info(f'{hostInfo["controller"].host} - Analyzing {jobStepName}')
@@ -79,7 +90,7 @@ class ServiceEndpointsAPM(JobStepBase):
 
             for application in hostInfo[self.componentType].values():
                 # Root node of current application for current JobStep.
-                analysisDataRoot = application[jobStepName] = OrderedDict()
+                analysisDataRoot = OrderedDict()
                 # This data goes into the 'JobStep - Metrics' xlsx sheet.
                 analysisDataEvaluatedMetrics = analysisDataRoot["evaluated"] = OrderedDict()
                 # This data goes into the 'JobStep - Raw' xlsx sheet.
@@ -126,4 +137,6 @@ class ServiceEndpointsAPM(JobStepBase):
                 analysisDataRawMetrics["controllerWideTotalServiceEndpoints"] = totalServiceEndpoints
                 analysisDataRawMetrics["applicationContributingToSepLimit"] = applicationContributingToSepLimit
 
-                self.applyThresholds(analysisDataEvaluatedMetrics, analysisDataRoot, jobStepThresholds)
+                self.results.append(hostInfo, application, analysisDataRoot)
+
+        self.applyThresholds(self.results, jobStepThresholds)
@@ -4,6 +4,7 @@ from itertools import count
 
 from backend.api.appd.AppDService import AppDService
 from backend.extractionSteps.JobStepBase import JobStepBase
+from backend.extractionSteps.ResultTable import ResultTable
 from backend.util.asyncio_utils import AsyncioUtils
 
 
@@ -11,6 +12,16 @@ logger = logging.getLogger(__name__.split('.')[-1])
 
 
 class NetworkRequestsBRUM(JobStepBase):
+    consumes = ("brum",)
+    produces = (
+        "brum.eumPageListViewData",
+        "brum.eumNetworkRequestList",
+        "brum.pagesAndFramesConfig",
+        "brum.ajaxConfig",
+        "brum.virtualPagesConfig",
+        "brum.browserSnapshotsWithServerSnapshots",
+    )
+
     def __init__(self):
         super().__init__("brum")
 
@@ -64,13 +75,14 @@ class NetworkRequestsBRUM(JobStepBase):
 
         # Get thresholds related to job
         jobStepThresholds = thresholds[self.componentType][jobStepName]
+        self.results = ResultTable(self.componentType)
 
         for host, hostInfo in controllerData.items():
             logger.info(f'{hostInfo["controller"].host} - Analyzing {jobStepName}')
 
             for application in hostInfo[self.componentType].values():
                 # Root node of current application for current JobStep.
-                analysisDataRoot = application[jobStepName] = OrderedDict()
+                analysisDataRoot = OrderedDict()
                 # This data goes into the 'JobStep - Metrics' xlsx sheet.
                 analysisDataEvaluatedMetrics = analysisDataRoot["evaluated"] = OrderedDict()
                 # This data goes into the 'JobStep - Raw' xlsx sheet.
@@ -137,4 +149,6 @@ class NetworkRequestsBRUM(JobStepBase):
                 analysisDataEvaluatedMetrics["hasCustomEventServiceIncludeRule"] = len(application["ajaxConfig"]["eventServiceIncludeRules"]) > 0
                 analysisDataRawMetrics["numberOfCustomEventServiceIncludeRules"] = len(application["ajaxConfig"]["eventServiceIncludeRules"])
 
-                self.applyThresholds(analysisDataEvaluatedMetrics, analysisDataRoot, jobStepThresholds)
+                self.results.append(hostInfo, application, analysisDataRoot)
+
+        self.applyThresholds(self.results, jobStepThresholds)
@@ -5,6 +5,7 @@ from collections import OrderedDict
 from backend.api.appd.AppDService import AppDService
 from deepdiff import DeepDiff
 from backend.extractionSteps.JobStepBase import JobStepBase
+from backend.extractionSteps.ResultTable import ResultTable
 from backend.util.asyncio_utils import AsyncioUtils
 
 
@@ -12,6 +13,9 @@ logger = logging.getLogger(__name__.split('.')[-1])
 
 
 class HealthRulesAndAlertingMRUM(JobStepBase):
+    consumes = ("mrum",)
+    produces = ("mrum.eventCounts", "mrum.policies", "mrum.healthRules")
+
     def __init__(self):
         super().__init__("mrum")
 
@@ -71,13 +75,14 @@ class HealthRulesAndAlertingMRUM(JobStepBase):
 
         # Get thresholds related to job
         jobStepThresholds = thresholds[self.componentType][jobStepName]
+        self.results = ResultTable(self.componentType)
 
         for host, hostInfo in controllerData.items():
             logger.info(f'{hostInfo["controller"].host} - Analyzing {jobStepName}')
 
             for application in hostInfo[self.componentType].values():
                 # Root node of current application for current JobStep.
-                analysisDataRoot = application[jobStepName] = OrderedDict()
+                analysisDataRoot = OrderedDict()
                 # This data goes into the 'JobStep - Metrics' xlsx sheet.
                 analysisDataEvaluatedMetrics = analysisDataRoot["evaluated"] = OrderedDict()
                 # This data goes into the 'JobStep - Raw' xlsx sheet.
@@ -106,4 +111,6 @@ class HealthRulesAndAlertingMRUM(JobStepBase):
                 analysisDataRawMetrics["numberOfHealthRules"] = len(application["healthRules"])
                 analysisDataRawMetrics["numberOfPolicies"] = len(application["policies"])
 
-                self.applyThresholds(analysisDataEvaluatedMetrics, analysisDataRoot, jobStepThresholds)
+                self.results.append(hostInfo, application, analysisDataRoot)
+
+        self.applyThresholds(self.results, jobStepThresholds)
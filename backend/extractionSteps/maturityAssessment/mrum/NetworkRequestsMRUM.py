@@ -4,6 +4,7 @@ from itertools import count
 
 from backend.api.appd.AppDService import AppDService
 from backend.extractionSteps.JobStepBase import JobStepBase
+from backend.extractionSteps.ResultTable import ResultTable
 from backend.util.asyncio_utils import AsyncioUtils
 
 
@@ -11,6 +12,9 @@ logger = logging.getLogger(__name__.split('.')[-1])
 
 
 class NetworkRequestsMRUM(JobStepBase):
+    consumes = ("mrum",)
+    produces = ("mrum.eumPageListViewData", "mrum.networkRequestLimit", "mrum.mobileSnapshotsWithServerSnapshots")
+
     def __init__(self):
         super().__init__("mrum")
 
@@ -58,13 +62,14 @@ class NetworkRequestsMRUM(JobStepBase):
 
         # Get thresholds related to job
         jobStepThresholds = thresholds[self.componentType][jobStepName]
+        self.results = ResultTable(self.componentType)
 
         for host, hostInfo in controllerData.items():
             logger.info(f'{hostInfo["controller"].host} - Analyzing {jobStepName}')
 
             for application in hostInfo[self.componentType].values():
                 # Root node of current application for current JobStep.
-                analysisDataRoot = application[jobStepName] = OrderedDict()
+                analysisDataRoot = OrderedDict()
                 # This data goes into the 'JobStep - Metrics' xlsx sheet.
                 analysisDataEvaluatedMetrics = analysisDataRoot["evaluated"] = OrderedDict()
                 # This data goes into the 'JobStep - Raw' xlsx sheet.
@@ -94,4 +99,6 @@ class NetworkRequestsMRUM(JobStepBase):
                 )
                 analysisDataRawMetrics["numberOfCustomEventServiceIncludeRules"] = len(application["eumPageListViewData"]["eventServiceIncludeRules"])
 
-                self.applyThresholds(analysisDataEvaluatedMetrics, analysisDataRoot, jobStepThresholds)
+                self.results.append(hostInfo, application, analysisDataRoot)
+
+        self.applyThresholds(self.results, jobStepThresholds)
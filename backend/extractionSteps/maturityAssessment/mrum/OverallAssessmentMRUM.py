@@ -2,12 +2,16 @@ import logging
 from collections import OrderedDict
 
 from backend.extractionSteps.JobStepBase import JobStepBase
+from backend.extractionSteps.ResultTable import ResultTable
 
 
 logger = logging.getLogger(__name__.split('.')[-1])
 
 
 class OverallAssessmentMRUM(JobStepBase):
+    consumes = ()
+    produces = ()
+
     def __init__(self):
         super().__init__("mrum")
 
@@ -27,6 +31,7 @@ class OverallAssessmentMRUM(JobStepBase):
 
         # Get thresholds related to job
         jobStepThresholds = thresholds[self.componentType][jobStepName]
+        self.results = ResultTable(self.componentType)
 
         for host, hostInfo in controllerData.items():
             logger.info(f'{hostInfo["controller"].host} - Analyzing {jobStepName}')
@@ -34,7 +39,7 @@ class OverallAssessmentMRUM(JobStepBase):
             for application in hostInfo[self.componentType].values():
 
                 # Root node of current application for current JobStep.
-                analysisDataRoot = application[jobStepName] = OrderedDict()
+                analysisDataRoot = OrderedDict()
                 # This data goes into the 'JobStep - Metrics' xlsx sheet.
                 analysisDataEvaluatedMetrics = analysisDataRoot["evaluated"] = OrderedDict()
                 # This data goes into the 'JobStep - Raw' xlsx sheet.
@@ -44,17 +49,21 @@ class OverallAssessmentMRUM(JobStepBase):
                 num_gold = 0
                 num_platinum = 0
 
+                # every job step has one row per application, in the same order
+                row = len(self.results)
                 for individualJobStepName in jobStepNames:
-                    job_step_color = application[individualJobStepName]["computed"]
-                    if job_step_color[0] == "silver":
+                    job_step_score = self.stepResults[individualJobStepName].scores[row]
+                    if job_step_score == "silver":
                         num_silver = num_silver + 1
-                    elif job_step_color[0] == "gold":
+                    elif job_step_score == "gold":
                         num_gold = num_gold + 1
-                    elif job_step_color[0] == "platinum":
+                    elif job_step_score == "platinum":
                         num_platinum = num_platinum + 1
 
                 analysisDataEvaluatedMetrics["percentageTotalPlatinum"] = num_platinum / num_job_steps * 100
                 analysisDataEvaluatedMetrics["percentageTotalGoldOrBetter"] = (num_platinum + num_gold) / num_job_steps * 100
                 analysisDataEvaluatedMetrics["percentageTotalSilverOrBetter"] = (num_platinum + num_gold + num_silver) / num_job_steps * 100
 
-                self.applyThresholds(analysisDataEvaluatedMetrics, analysisDataRoot, jobStepThresholds)
+                self.results.append(hostInfo, application, analysisDataRoot)
+
+        self.applyThresholds(self.results, jobStepThresholds)
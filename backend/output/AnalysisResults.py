@@ -0,0 +1,52 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import pandas as pd
+
+from backend.extractionSteps.JobStepBase import JobStepBase
+from backend.extractionSteps.ResultTable import ResultTable
+
+
+@dataclass
+class AnalysisResults:
+    """
+    In-memory results of the 'analyze' steps, handed to post-process commands and plugins.
+    Frames are built from the ResultTable columns of the job steps and have the same columns and values as the sheets
+    of the MaturityAssessment workbooks, so commands don't need to parse the workbooks back.
+    """
+
+    controllerData: OrderedDict
+    maturityAssessmentSteps: [JobStepBase]
+
+    def results(self, jobStepName: str) -> ResultTable:
+        """ResultTable of one job step, e.g. results("AppAgentsAPM").row(host, applicationName) for the results of one application."""
+        return next(jobStep.results for jobStep in self.maturityAssessmentSteps if type(jobStep).__name__ == jobStepName)
+
+    def stepFrame(self, componentType: str, jobStepName: str, metricFolder: str = "evaluated") -> pd.DataFrame:
+        """Metrics of one job step per application, like the '<jobStepName>' sheet."""
+        results = self.results(jobStepName)
+        columns = OrderedDict([("controller", results.controllers), ("application", results.applications), ("applicationId", results.applicationIds)])
+        if componentType == "apm":
+            columns["description"] = results.descriptions
+        columns.update(results.evaluated if metricFolder == "evaluated" else results.raw)
+        return pd.DataFrame(columns)
+
+    def analysisFrame(self, componentType: str) -> pd.DataFrame:
+        """Computed ranking of each job step per application, like the 'Analysis' sheet."""
+        jobSteps = [jobStep for jobStep in self.maturityAssessmentSteps if jobStep.componentType == componentType]
+        # every job step has one row per application, in the same order
+        keyResults = jobSteps[0].results
+        columns = OrderedDict(
+            [
+                ("controller", keyResults.controllers),
+                ("componentType", [componentType] * len(keyResults)),
+                ("name", keyResults.applications),
+                ("applicationId", keyResults.applicationIds),
+            ]
+        )
+        if componentType == "apm":
+            columns["description"] = keyResults.descriptions
+        for jobStep in jobSteps:
+            jobStepName = type(jobStep).__name__
+            columns[jobStepName if not jobStepName.startswith("OverallAssessment") else "OverallAssessment"] = jobStep.results.scores
+        return pd.DataFrame(columns)
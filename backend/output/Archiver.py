@@ -22,7 +22,7 @@ class Archiver(PostProcessReport):
         self.workbook = None
         self.analysis_sheet = None
 
-    async def post_process(self, jobFileName):
+    async def post_process(self, jobFileName, analysisResults=None):
         logging.info(f"Archiving generated report for job: {jobFileName}")
 
         # Define source and archive directories
@@ -40,8 +40,8 @@ class Archiver(PostProcessReport):
         # Iterate through files in the source directory
         if os.path.exists(source_directory):
             for file_name in os.listdir(source_directory):
-                # Skip `controllerData.json` and any files starting with `info`
-                if file_name == "controllerData.json" or file_name.startswith("info"):
+                # Skip the controllerData snapshot, the recorded responses and any files starting with `info`
+                if file_name in ("controllerData.json", "controllerData.jsonl.gz", "responses.jsonl.gz") or file_name.startswith("info"):
                     logging.info(f"Skipping file: {file_name}")
                     continue
 
@@ -0,0 +1,93 @@
+import gzip
+import json
+import logging
+import os
+from collections import OrderedDict
+
+from backend.util.stdlib_utils import jsonEncoder
+
+# application level data makes up most of a snapshot, it is written one application per line
+COMPONENT_TYPES = ("apm", "brum", "mrum")
+
+
+class ControllerDataSnapshot:
+    """
+    Snapshot of controllerData, written after 'analyze' of every job and loaded with --analyze-only.
+    By default it is the indented controllerData.json raw data dump. With compact=True it is written as
+    controllerData.jsonl.gz instead: gzipped JSON lines, the first line is a header, every other line holds one
+    hostInfo key of one controller, or one application of a component type. The compact snapshot is several times
+    smaller and faster to write.
+    """
+
+    JSON_FILE_NAME = "controllerData.json"
+    COMPACT_FILE_NAME = "controllerData.jsonl.gz"
+    # the results of 'analyze' aren't part of controllerData, they are saved next to it
+    RESULTS_FILE_NAME = "analysisResults.json"
+    VERSION = 1
+
+    def __init__(self, compact: bool = False):
+        self.compact = compact
+        self.fileName = ControllerDataSnapshot.COMPACT_FILE_NAME if compact else ControllerDataSnapshot.JSON_FILE_NAME
+        self.uncompressedBytes = 0
+        self.compressedBytes = 0
+
+    def write(self, path: str, controllerData: OrderedDict):
+        if not self.compact:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(controllerData, fp=f, default=jsonEncoder, indent=4)
+                self.uncompressedBytes = self.compressedBytes = f.tell()
+            return
+
+        self.uncompressedBytes = 0
+        with open(path, "wb") as rawFile:
+            # speed matters more than the last few percent of compression, this runs at the end of every job
+            with gzip.GzipFile(fileobj=rawFile, mode="wb", compresslevel=5) as f:
+                self._writeLine(f, {"version": ControllerDataSnapshot.VERSION, "hosts": list(controllerData)})
+                for host, hostInfo in controllerData.items():
+                    for key, value in hostInfo.items():
+                        if key in COMPONENT_TYPES and isinstance(value, dict):
+                            self._writeLine(f, {"host": host, "key": key, "value": {}})
+                            for applicationName, application in value.items():
+                                self._writeLine(f, {"host": host, "key": key, "application": applicationName, "value": application})
+                        else:
+                            self._writeLine(f, {"host": host, "key": key, "value": value})
+            self.compressedBytes = rawFile.tell()
+
+    def writeResults(self, path: str, jobSteps: list):
+        """Writes the ResultTable of every job step by job step name."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(OrderedDict((type(jobStep).__name__, jobStep.results) for jobStep in jobSteps), fp=f, default=jsonEncoder, separators=(",", ":"))
+
+    def _writeLine(self, f, record: dict):
+        line = json.dumps(record, default=jsonEncoder, separators=(",", ":")).encode("utf-8") + b"\n"
+        self.uncompressedBytes += len(line)
+        f.write(line)
+
+    @staticmethod
+    def read(path: str) -> OrderedDict:
+        """Reads a snapshot in either format."""
+        if not path.endswith(".gz"):
+            with open(path, encoding="utf-8") as f:
+                return json.load(f, object_pairs_hook=OrderedDict)
+
+        controllerData = OrderedDict()
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            header = json.loads(f.readline())
+            if header.get("version") != ControllerDataSnapshot.VERSION:
+                logging.warning(f"Snapshot {path} has version {header.get('version')}, expected {ControllerDataSnapshot.VERSION}")
+            for host in header["hosts"]:
+                controllerData[host] = OrderedDict()
+            for line in f:
+                record = json.loads(line, object_pairs_hook=OrderedDict)
+                hostInfo = controllerData[record["host"]]
+                if "application" in record:
+                    hostInfo[record["key"]][record["application"]] = record["value"]
+                else:
+                    hostInfo[record["key"]] = record["value"]
+        return controllerData
+
+    @staticmethod
+    def readResults(snapshotPath: str) -> OrderedDict:
+        """Reads the results written next to the snapshot at snapshotPath, as saved by 'writeResults'."""
+        with open(os.path.join(os.path.dirname(snapshotPath), ControllerDataSnapshot.RESULTS_FILE_NAME), encoding="utf-8") as f:
+            return json.load(f, object_pairs_hook=OrderedDict)
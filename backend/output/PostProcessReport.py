@@ -1,10 +1,13 @@
 from abc import ABC, abstractmethod
 
+from backend.output.AnalysisResults import AnalysisResults
+
 
 class PostProcessReport(ABC):
     @abstractmethod
-    async def post_process(self, report_names):
+    async def post_process(self, jobFileName, analysisResults: AnalysisResults = None):
         """
         execute post processing reports
+        analysisResults holds the in-memory results of the job, when not given the generated reports are read instead
         """
         pass
@@ -0,0 +1,115 @@
+import importlib
+import logging
+import multiprocessing
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, wait
+
+from backend.api.appd.AppDService import AppDService
+from backend.extractionSteps.JobStepBase import JobStepBase
+from backend.output.ControllerDataSnapshot import ControllerDataSnapshot
+from backend.output.ReportBase import ReportBase
+from backend.output.presentations.cxPptTemplate import createCxPpt as createCxPptTemplate
+from backend.output.reports.MaturityAssessmentReport import MaturityAssessmentReport
+from backend.util.logging_utils import initLogging
+
+# snapshot path -> (controllerData, jobs), a worker process loads the snapshot once for all the reports it renders
+_snapshots = {}
+
+
+class SavedController:
+    """
+    Controller of a snapshot in a worker process: the attributes AppDService saves in the snapshot, e.g. host and
+    the time range. There is no connection to the controller, so none of the API calls of AppDService are available.
+    """
+
+    def __init__(self, savedController: dict):
+        self.__dict__.update(savedController)
+
+    def __json__(self):
+        return dict(self.__dict__)
+
+    def __getattr__(self, name):
+        if hasattr(AppDService, name):
+            raise AttributeError(
+                f"{self.__dict__.get('host')} - AppDService.{name} is not available while rendering reports from the snapshot in worker processes, "
+                f"render them with --report-workers 1 instead."
+            )
+        raise AttributeError(f"{type(self).__name__} has no attribute {name}")
+
+
+def stepClassNames(steps: [JobStepBase]) -> [str]:
+    """Qualified class names of steps, what worker processes get instead of the steps and their state."""
+    return [f"{type(jobStep).__module__}.{type(jobStep).__name__}" for jobStep in steps]
+
+
+def createStep(className: str) -> JobStepBase:
+    moduleName, _, name = className.rpartition(".")
+    return getattr(importlib.import_module(moduleName), name)()
+
+
+def loadReportData(snapshotPath: str, stepNames: [str], jobNames: [str]) -> (OrderedDict, [JobStepBase]):
+    """
+    Loads controllerData and the jobs for rendering reports in a worker process.
+    1. Reads the snapshot written after 'analyze'.
+    2. Replaces the saved controllers with SavedController, reports only need their attributes.
+    3. Creates the job steps and lets every one of them restore the values which don't survive the JSON round trip,
+       and the analysis results saved next to the snapshot.
+    """
+    if snapshotPath not in _snapshots:
+        controllerData = ControllerDataSnapshot.read(snapshotPath)
+        for hostInfo in controllerData.values():
+            hostInfo["controller"] = SavedController(hostInfo["controller"])
+        steps = OrderedDict((className, createStep(className)) for className in stepNames)
+        jobs = [steps[className] for className in jobNames]
+        for jobStep in steps.values():
+            jobStep.restoreSnapshot(controllerData)
+        savedResults = ControllerDataSnapshot.readResults(snapshotPath)
+        for jobStep in jobs:
+            jobStep.restoreAnalysis(controllerData, savedResults)
+        _snapshots[snapshotPath] = controllerData, jobs
+    return _snapshots[snapshotPath]
+
+
+def renderWorkbook(report: ReportBase, stepNames: [str], jobNames: [str], snapshotPath: str, jobFileName: str, output_dir: str):
+    controllerData, jobs = loadReportData(snapshotPath, stepNames, jobNames)
+    report.createWorkbook(jobs, controllerData, jobFileName, output_dir)
+
+
+class ReportRenderer:
+    """
+    Renders the report workbooks and the presentation of a job.
+    With more than one worker, independent workbooks are rendered in a pool of worker processes, each reading the
+    controllerData snapshot and creating the job steps by their class names instead of receiving them from the parent. The presentation is built from the
+    MaturityAssessment workbooks, so it is started as soon as they are done.
+    """
+
+    def __init__(self, workers: int = 1):
+        self.workers = workers
+
+    def render(self, reports: [ReportBase], steps: [JobStepBase], jobs: [JobStepBase], controllerData: OrderedDict, snapshotPath: str, jobFileName: str, output_dir: str):
+        startTime = time.monotonic()
+        if self.workers <= 1:
+            for report in reports:
+                report.createWorkbook(jobs, controllerData, jobFileName, output_dir)
+            createCxPptTemplate(jobFileName, output_dir)
+        else:
+            self.renderInWorkers(reports, steps, jobs, snapshotPath, jobFileName, output_dir)
+        logging.info(f"Rendered {len(reports)} reports and the presentation in {time.monotonic() - startTime:.2f}s with {max(self.workers, 1)} worker(s)")
+
+    def renderInWorkers(self, reports: [ReportBase], steps: [JobStepBase], jobs: [JobStepBase], snapshotPath: str, jobFileName: str, output_dir: str):
+        workers = min(self.workers, len(reports) + 1)
+        # spawned workers behave the same on every platform and don't inherit the state of the event loop
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=initLogging,
+            initargs=(logging.getLogger().isEnabledFor(logging.DEBUG),),
+        ) as pool:
+            stepNames, jobNames = stepClassNames(steps), stepClassNames(jobs)
+            futures = [pool.submit(renderWorkbook, report, stepNames, jobNames, snapshotPath, jobFileName, output_dir) for report in reports]
+            wait([future for report, future in zip(reports, futures) if isinstance(report, MaturityAssessmentReport)])
+            futures.append(pool.submit(createCxPptTemplate, jobFileName, output_dir))
+            # raise the first failure the same way rendering in this process would
+            for future in futures:
+                future.result()
@@ -5,17 +5,15 @@ import os
 from collections import Counter
 from datetime import datetime
 
-from openpyxl import Workbook
 from backend.output.ReportBase import ReportBase
-from backend.util.excel_utils import addFilterAndFreeze, resizeColumnWidth, writeUncoloredRow
+from backend.util.excel_utils import ReportWorkbook, addFilterAndFreeze, resizeColumnWidth, writeUncoloredRow
 
 
 class AgentMatrixReport(ReportBase):
     def createWorkbook(self, jobs, controllerData, jobFileName, output_dir="output"):
         logging.info(f"Creating Agent Matrix Report Workbook")
 
-        workbook = Workbook()
-        del workbook["Sheet"]
+        workbook = ReportWorkbook(os.path.join(output_dir, jobFileName, f"{jobFileName}-AgentMatrix.xlsx"))
 
         allAppAgentVersions = set()
         for host in controllerData.values():
@@ -23,7 +21,7 @@ class AgentMatrixReport(ReportBase):
         allAppAgentVersions = [f"{version[2]}:{version[0]}.{version[1]}" for version in sorted(list(allAppAgentVersions), reverse=True)]
 
         logging.debug(f"Creating workbook sheet for App Agents")
-        appAgentsSheet = workbook.create_sheet(f"Overall - App Agents")
+        appAgentsSheet = workbook.createSheet(f"Overall - App Agents")
         writeUncoloredRow(appAgentsSheet, 1, ["controller", "application", "applicationId", *allAppAgentVersions])
 
         # Write Data
@@ -60,7 +58,7 @@ class AgentMatrixReport(ReportBase):
             allMachineAgentVersions.update(host["machineAgentVersions"])
         allMachineAgentVersions = [f"{version[0]}.{version[1]}" for version in sorted(list(allMachineAgentVersions), reverse=True)]
 
-        machineAgentsSheet = workbook.create_sheet(f"Overall - Machine Agents")
+        machineAgentsSheet = workbook.createSheet(f"Overall - Machine Agents")
         writeUncoloredRow(
             machineAgentsSheet,
             1,
@@ -95,7 +93,7 @@ class AgentMatrixReport(ReportBase):
         resizeColumnWidth(machineAgentsSheet)
 
         for agentType in ["appServerAgents", "machineAgents", "dbAgents", "analyticsAgents"]:
-            sheet = workbook.create_sheet(f"Individual - {agentType}")
+            sheet = workbook.createSheet(f"Individual - {agentType}")
 
             cols = []
             for host, hostInfo in controllerData.items():
@@ -139,6 +137,26 @@ class AgentMatrixReport(ReportBase):
                 ]
             )
 
+            # rows are streamed to disk, so the header has to be written first
+            if agentType == "machineAgents":
+                writeUncoloredRow(
+                    sheet,
+                    1,
+                    ["controller", *machineAgentCols],
+                )
+            elif agentType == "appServerAgents":
+                writeUncoloredRow(
+                    sheet,
+                    1,
+                    ["controller", *appServerAgentCols],
+                )
+            else:
+                writeUncoloredRow(
+                    sheet,
+                    1,
+                    ["controller", *cols],
+                )
+
             rowIdx = 2
             for host, hostInfo in controllerData.items():
                 for agent in hostInfo[agentType]:
@@ -227,27 +245,8 @@ class AgentMatrixReport(ReportBase):
                     )
                     rowIdx += 1
 
-            if agentType == "machineAgents":
-                writeUncoloredRow(
-                    sheet,
-                    1,
-                    ["controller", *machineAgentCols],
-                )
-            elif agentType == "appServerAgents":
-                writeUncoloredRow(
-                    sheet,
-                    1,
-                    ["controller", *appServerAgentCols],
-                )
-            else:
-                writeUncoloredRow(
-                    sheet,
-                    1,
-                    ["controller", *cols],
-                )
-
             addFilterAndFreeze(sheet, "B2")
             resizeColumnWidth(sheet)
 
         logging.debug(f"Saving AgentMatrix Workbook")
-        workbook.save(os.path.join(output_dir, jobFileName, f"{jobFileName}-AgentMatrix.xlsx"))
+        workbook.close()
@@ -5,6 +5,7 @@ import shutil
 import pandas as pd
 import xlsxwriter
 
+from backend.output.AnalysisResults import AnalysisResults
 from backend.output.PostProcessReport import PostProcessReport
 
 light_font = '#FFFFFF'
@@ -14,13 +15,52 @@ medium_bg = '#A0A0A0'
 dark_bg = '#000000'
 
 
+class ApplicationSheet:
+    """
+    A sheet of the MaturityAssessment workbook, indexed by application so rules are evaluated for all applications at once.
+    An application can have one row per controller. A rule matches if any of its rows matches
+    and messages quote the first row, as the former per application lookups did.
+    """
+
+    def __init__(self, frame: pd.DataFrame, key='application'):
+        self.frame = frame
+        self.applications = frame[key]
+        self.firstRows = frame.drop_duplicates(key).set_index(key).to_dict('index')
+
+    def first(self, application, column):
+        """Returns the value of column in the first row of application."""
+        return self.firstRows[application][column]
+
+    def any(self, mask: pd.Series) -> set:
+        """Returns the applications with at least one row matching mask."""
+        matches = mask.groupby(self.applications, sort=False).any()
+        return set(matches.index[matches])
+
+    def __getitem__(self, column):
+        return self.frame[column]
+
+
 class ConfigurationAnalysisReport(PostProcessReport):
+    # sheets of the MaturityAssessment-apm workbook used by the analysis
+    SHEETS = [
+        'Analysis',
+        'AppAgentsAPM',
+        'BusinessTransactionsAPM',
+        'BackendsAPM',
+        'OverheadAPM',
+        'ServiceEndpointsAPM',
+        'ErrorConfigurationAPM',
+        'HealthRulesAndAlertingAPM',
+        'DataCollectorsAPM',
+        'DashboardsAPM',
+    ]
+
     def __init__(self, output_dir="output"):
         self.output_dir = output_dir
         self.workbook = None
         self.analysis_sheet = None
 
-    async def post_process(self, jobFileName):
+    async def post_process(self, jobFileName, analysisResults: AnalysisResults = None):
 
         logging.info(f"Running post-process command: Creating Configuration Analysis Workbook")
 
@@ -29,7 +69,7 @@ class ConfigurationAnalysisReport(PostProcessReport):
         # input
         self.analysis_sheet = os.path.join(directory, f"{file_prefix}-MaturityAssessment-apm.xlsx")
 
-        if not os.path.exists(self.analysis_sheet):
+        if analysisResults is None and not os.path.exists(self.analysis_sheet):
             logging.warn(f"Input file sheet {self.analysis_sheet} does not exist. "
                          f"Skipping post-process command: Creating Configuration Analysis Workbook")
             return
@@ -37,12 +77,26 @@ class ConfigurationAnalysisReport(PostProcessReport):
         # output
         self.workbook = xlsxwriter.Workbook(os.path.join(directory, f"{jobFileName}-ConfigurationAnalysisReport.xlsx"))
         worksheets = self.generateHeaders()
-        applicationNames = self.getListOfApplications()
+
+        # every rule is evaluated for all applications at once, on the results in memory or on the workbook parsed once
+        if analysisResults is not None:
+            sheets = {
+                sheetName: analysisResults.analysisFrame('apm') if sheetName == 'Analysis' else analysisResults.stepFrame('apm', sheetName)
+                for sheetName in self.SHEETS
+            }
+        else:
+            sheets = pd.read_excel(self.analysis_sheet, sheet_name=self.SHEETS, engine='openpyxl')
+        applicationNames = sheets['Analysis'].dropna(how='all')['name'].tolist()
+        # step sheets of a job without applications have no columns to evaluate
+        rankings, rules = self.performAnalysis(sheets) if applicationNames else ({}, [])
         applicationData = []
 
         for application in applicationNames:
             taskList = [[], [], [], [], []]
-            ranking = self.performAnalysis(application, taskList)
+            for category, applications, message in rules:
+                if application in applications:
+                    taskList[category].append(message if isinstance(message, str) else message(application))
+            ranking = rankings.get(application, 'NA')
             if ranking != "Platinum":
                 for task in taskList:
                     if (len(task) > 0):
@@ -65,241 +119,195 @@ class ConfigurationAnalysisReport(PostProcessReport):
                 break
         return values
 
-    def getListOfApplications(self):
-        frame = pd.read_excel(self.analysis_sheet, sheet_name='Analysis',
-                              engine='openpyxl').dropna(how='all')
-        return frame['name'].tolist()
-
-    def overallAppStatus(self, application, tasklist):
-        frame = pd.read_excel(self.analysis_sheet, sheet_name='Analysis', engine='openpyxl')
-        frame = frame.drop('controller', axis=1)
-        appFrame = frame.loc[frame['name'] == application]
-
-        # Overall Assessment
-        ranking = 'NA'
-        if (appFrame['OverallAssessment'] == 'bronze').any():
-            ranking = 'Bronze'
-        elif (appFrame['OverallAssessment'] == 'silver').any():
-            ranking = 'Silver'
-        elif (appFrame['OverallAssessment'] == 'gold').any():
-            ranking = 'Gold'
-        elif (appFrame['OverallAssessment'] == 'platinum').any():
-            ranking = 'Platinum'
-        return ranking
-
-    def appAgentStatus(self, application, taskList):
-        # Sheet name may have changed to AppAgentsAPM
-        frame = pd.read_excel(self.analysis_sheet, sheet_name='AppAgentsAPM', engine='openpyxl')
-        frame = frame.drop('controller', axis=1)
-        appFrame = frame.loc[frame['application'] == application]
+    def overallAppStatus(self, sheet: ApplicationSheet) -> dict:
+        # Overall Assessment, the lowest ranking of any row of an application wins
+        rankings = {}
+        for ranking in ['Platinum', 'Gold', 'Silver', 'Bronze']:
+            for application in sheet.any(sheet['OverallAssessment'] == ranking.lower()):
+                rankings[application] = ranking
+        return rankings
+
+    def appAgentStatus(self, sheet: ApplicationSheet) -> list:
+        rules = []
 
         # Agent Metric Limit
-        if (appFrame['metricLimitNotHit'] == False).any():
-            taskList[2].append("Application Agent metric limit has been reached")
+        rules.append((2, sheet.any(sheet['metricLimitNotHit'] == False), "Application Agent metric limit has been reached"))
 
         # Agent Versions
-        if (appFrame['percentAgentsLessThan2YearsOld'] < 50).any():
-            taskList[0].append(str(100 - int(appFrame['percentAgentsLessThan2YearsOld'].iloc[0])) + '% of Application Agents are 2+ years old')
-        elif (appFrame['percentAgentsLessThan1YearOld'] < 80).any():
-            taskList[0].append(str(100 - int(appFrame['percentAgentsLessThan1YearOld'].iloc[0])) + '% of Application Agents are at least 1 year old')
+        agentsOlderThan2Years = sheet.any(sheet['percentAgentsLessThan2YearsOld'] < 50)
+        rules.append((0, agentsOlderThan2Years,
+                      lambda app: str(100 - int(sheet.first(app, 'percentAgentsLessThan2YearsOld'))) + '% of Application Agents are 2+ years old'))
+        rules.append((0, sheet.any(sheet['percentAgentsLessThan1YearOld'] < 80) - agentsOlderThan2Years,
+                      lambda app: str(100 - int(sheet.first(app, 'percentAgentsLessThan1YearOld'))) + '% of Application Agents are at least 1 year old'))
 
         # Agents reporting data
-        if (appFrame['percentAgentsReportingData'] < 100).any():
-            taskList[0].append(str(100 - int(appFrame['percentAgentsReportingData'].iloc[0])) + "% of Application Agents aren't reporting data")
-
-        if (appFrame['percentAgentsRunningSameVersion'] < 100).any():
-            taskList[0].append('Multiple Application Agent Versions')
+        rules.append((0, sheet.any(sheet['percentAgentsReportingData'] < 100),
+                      lambda app: str(100 - int(sheet.first(app, 'percentAgentsReportingData'))) + "% of Application Agents aren't reporting data"))
 
-    def machineAgentStatus(self, application, taskList):
-        frame = pd.read_excel(self.analysis_sheet, sheet_name='MachineAgentsAPM', engine='openpyxl')
-        frame = frame.drop('controller', axis=1)
-        appFrame = frame.loc[frame['application'] == application]
+        rules.append((0, sheet.any(sheet['percentAgentsRunningSameVersion'] < 100), 'Multiple Application Agent Versions'))
+        return rules
 
-    def businessTranStatus(self, application, taskList):
-        frame = pd.read_excel(self.analysis_sheet, sheet_name='BusinessTransactionsAPM', engine='openpyxl')
-        frame.drop('controller', axis=1)
-        appFrame = frame.loc[frame['application'] == application]
+    def businessTranStatus(self, sheet: ApplicationSheet) -> list:
+        rules = []
 
         # Number of Business Transcations
-        if (appFrame['numberOfBTs'] > 200).any():
-            taskList[1].append("Reduce amount of Business transactions from " + str(int(appFrame['numberOfBTs'].iloc[0])))
+        rules.append((1, sheet.any(sheet['numberOfBTs'] > 200),
+                      lambda app: "Reduce amount of Business transactions from " + str(int(sheet.first(app, 'numberOfBTs')))))
 
         # % of Business Transactions with load
-        if (appFrame['percentBTsWithLoad'] < 90).any():
-            taskList[1].append(str(100 - int(appFrame['percentBTsWithLoad'].iloc[0])) + '% of Business Transactions have no load over the last 24 hours')
+        rules.append((1, sheet.any(sheet['percentBTsWithLoad'] < 90),
+                      lambda app: str(100 - int(sheet.first(app, 'percentBTsWithLoad'))) + '% of Business Transactions have no load over the last 24 hours'))
 
         # Business Transaction Lockdown
-        if (appFrame['btLockdownEnabled'] == False).any():
-            taskList[1].append("Business Transaction Lockdown is disabled")
+        rules.append((1, sheet.any(sheet['btLockdownEnabled'] == False), "Business Transaction Lockdown is disabled"))
 
         # Number of Custom Match Rules
-        if (appFrame['numberCustomMatchRules'] < 3).any():
-            if (appFrame['numberCustomMatchRules'] == 0).any():
-                taskList[2].append('No Custom Match Rules')
-            else:
-                taskList[2].append('Only ' + str(int(appFrame['numberCustomMatchRules'].iloc[0])) + ' Custom Match Rules')
+        noCustomMatchRules = sheet.any(sheet['numberCustomMatchRules'] == 0)
+        fewCustomMatchRules = sheet.any(sheet['numberCustomMatchRules'] < 3)
+        rules.append((2, fewCustomMatchRules & noCustomMatchRules, 'No Custom Match Rules'))
+        rules.append((2, fewCustomMatchRules - noCustomMatchRules,
+                      lambda app: 'Only ' + str(int(sheet.first(app, 'numberCustomMatchRules'))) + ' Custom Match Rules'))
+        return rules
 
-    def backendStatus(self, application, taskList):
-        frame = pd.read_excel(self.analysis_sheet, sheet_name='BackendsAPM', engine='openpyxl')
-        frame.drop('controller', axis=1)
-        appFrame = frame.loc[frame['application'] == application]
+    def backendStatus(self, sheet: ApplicationSheet) -> list:
+        rules = []
 
         # % of Backends with load
-        if (appFrame['percentBackendsWithLoad'] < 75).any():
-            taskList[2].append(str(100 - int(appFrame['percentBackendsWithLoad'].iloc[0])) + '% of Backends have no load')
+        rules.append((2, sheet.any(sheet['percentBackendsWithLoad'] < 75),
+                      lambda app: str(100 - int(sheet.first(app, 'percentBackendsWithLoad'))) + '% of Backends have no load'))
 
         # Backend limit not hit
-        if (appFrame['backendLimitNotHit'] == False).any():
-            taskList[2].append('Backend limit has been reached')
+        rules.append((2, sheet.any(sheet['backendLimitNotHit'] == False), 'Backend limit has been reached'))
 
         # Number of Custom Backend Rules
-        if (appFrame['numberOfCustomBackendRules'] == 0).any():
-            taskList[2].append('No Custom Backend Rules')
+        rules.append((2, sheet.any(sheet['numberOfCustomBackendRules'] == 0), 'No Custom Backend Rules'))
+        return rules
 
-    def overheadStatus(self, application, taskList):
-        frame = pd.read_excel(self.analysis_sheet, sheet_name='OverheadAPM', engine='openpyxl')
-        frame.drop('controller', axis=1)
-        appFrame = frame.loc[frame['application'] == application]
+    def overheadStatus(self, sheet: ApplicationSheet) -> list:
+        rules = []
 
         # Developer Mode Not Enabled for any Business Transaction
-        if (appFrame['developerModeNotEnabledForAnyBT'] == False).any():
-            taskList[2].append('Development Level monitoring is enabled for a Business Transaction')
+        rules.append((2, sheet.any(sheet['developerModeNotEnabledForAnyBT'] == False), 'Development Level monitoring is enabled for a Business Transaction'))
 
         # find-entry-points not enabled
-        if (appFrame['findEntryPointsNotEnabled'] == False).any():
-            taskList[2].append('Find-entry-points node property is enabled')
+        rules.append((2, sheet.any(sheet['findEntryPointsNotEnabled'] == False), 'Find-entry-points node property is enabled'))
 
         # Aggressive Snapshotting not enabled
-        if (appFrame['aggressiveSnapshottingNotEnabled'] == False).any():
-            taskList[2].append('Aggressive snapshot collection is enabled')
+        rules.append((2, sheet.any(sheet['aggressiveSnapshottingNotEnabled'] == False), 'Aggressive snapshot collection is enabled'))
 
         # Developer Mode not enabled for an application
-        if (appFrame['developerModeNotEnabledForApplication'] == False).any():
-            taskList[2].append('Development Level monitoring is enabled for an Application')
+        rules.append((2, sheet.any(sheet['developerModeNotEnabledForApplication'] == False), 'Development Level monitoring is enabled for an Application'))
+        return rules
 
-    def serviceEndpointStatus(self, application, taskList):
-        frame = pd.read_excel(self.analysis_sheet, sheet_name='ServiceEndpointsAPM', engine='openpyxl')
-        frame.drop('controller', axis=1)
-        appFrame = frame.loc[frame['application'] == application]
+    def serviceEndpointStatus(self, sheet: ApplicationSheet) -> list:
+        rules = []
 
         # Number of Custom Service Endpoint Rules
-        if (appFrame['numberOfCustomServiceEndpointRules'] == 0).any():
-            taskList[2].append('No Custom Service Endpoint rules')
+        rules.append((2, sheet.any(sheet['numberOfCustomServiceEndpointRules'] == 0), 'No Custom Service Endpoint rules'))
 
         # Service Endpoint Limit not hit
-        if (appFrame['serviceEndpointLimitNotHit'] == False).any():
-            taskList[2].append('Service Endpoint limit has been reached')
+        rules.append((2, sheet.any(sheet['serviceEndpointLimitNotHit'] == False), 'Service Endpoint limit has been reached'))
 
         # % of enabled Service Endpoints with load
-        if (appFrame['percentServiceEndpointsWithLoadOrDisabled'] < 75).any():
-            taskList[2].append(str(100 - int(appFrame['percentServiceEndpointsWithLoadOrDisabled'].iloc[0])) + '% of enabled Service Endpoints have no load')
+        rules.append((2, sheet.any(sheet['percentServiceEndpointsWithLoadOrDisabled'] < 75),
+                      lambda app: str(100 - int(sheet.first(app, 'percentServiceEndpointsWithLoadOrDisabled'))) + '% of enabled Service Endpoints have no load'))
+        return rules
 
-    def errorConfigurationStatus(self, application, taskList):
-        frame = pd.read_excel(self.analysis_sheet, sheet_name='ErrorConfigurationAPM', engine='openpyxl')
-        frame.drop('controller', axis=1)
-        appFrame = frame.loc[frame['application'] == application]
+    def errorConfigurationStatus(self, sheet: ApplicationSheet) -> list:
+        rules = []
 
         # Sucess Percentage of Worst Transaction
-        if (appFrame['successPercentageOfWorstTransaction'] < 80).any():
-            taskList[3].append('Some Business Transactions fail ' + str(100 - int(appFrame['successPercentageOfWorstTransaction'].iloc[0])) + '% of the time')
+        rules.append((3, sheet.any(sheet['successPercentageOfWorstTransaction'] < 80),
+                      lambda app: 'Some Business Transactions fail ' + str(100 - int(sheet.first(app, 'successPercentageOfWorstTransaction'))) + '% of the time'))
 
         # Number of Custom rules
-        if (appFrame['numberOfCustomRules'] == 0).any():
-            taskList[2].append('No custom error configurations')
+        rules.append((2, sheet.any(sheet['numberOfCustomRules'] == 0), 'No custom error configurations'))
+        return rules
 
-    def healthRulesAlertingStatus(self, application, taskList):
-        frame = pd.read_excel(self.analysis_sheet, sheet_name='HealthRulesAndAlertingAPM', engine='openpyxl')
-        frame.drop('controller', axis=1)
-        appFrame = frame.loc[frame['application'] == application]
+    def healthRulesAlertingStatus(self, sheet: ApplicationSheet) -> list:
+        rules = []
 
         # Number of Health Rule Violations in last 24 hours
-        if (appFrame['numberOfHealthRuleViolations'] > 10).any():
-            taskList[3].append(str(int(appFrame['numberOfHealthRuleViolations'].iloc[0])) + ' Health Rule Violations in 24 hours')
+        rules.append((3, sheet.any(sheet['numberOfHealthRuleViolations'] > 10),
+                      lambda app: str(int(sheet.first(app, 'numberOfHealthRuleViolations'))) + ' Health Rule Violations in 24 hours'))
 
         # Number of modifications to default Health Rules
-        if (appFrame['numberOfDefaultHealthRulesModified'] < 2).any():
-            if (appFrame['numberOfDefaultHealthRulesModified'] < 2).any():
-                taskList[3].append('No modifications to the default Health Rules')
-            else:
-                taskList[3].append('Only ' + str(int(appFrame['numberOfDefaultHealthRulesModified'].iloc[0])) + ' modifications to the default Health Rules')
+        rules.append((3, sheet.any(sheet['numberOfDefaultHealthRulesModified'] < 2), 'No modifications to the default Health Rules'))
 
         # Number of actions bound to enabled policies
-        if (appFrame['numberOfActionsBoundToEnabledPolicies'] < 1).any():
-            taskList[3].append('No actions bound to enabled policies')
+        rules.append((3, sheet.any(sheet['numberOfActionsBoundToEnabledPolicies'] < 1), 'No actions bound to enabled policies'))
 
         # Number of Custom Health Rules
-        if (appFrame['numberOfCustomHealthRules'] < 5).any():
-            if (appFrame['numberOfCustomHealthRules'] == 0).any():
-                taskList[3].append('No Custom Health Rules')
-            else:
-                taskList[3].append('Only ' + str(int(appFrame['numberOfCustomHealthRules'].iloc[0])) + ' Custom Health Rules')
+        noCustomHealthRules = sheet.any(sheet['numberOfCustomHealthRules'] == 0)
+        fewCustomHealthRules = sheet.any(sheet['numberOfCustomHealthRules'] < 5)
+        rules.append((3, fewCustomHealthRules & noCustomHealthRules, 'No Custom Health Rules'))
+        rules.append((3, fewCustomHealthRules - noCustomHealthRules,
+                      lambda app: 'Only ' + str(int(sheet.first(app, 'numberOfCustomHealthRules'))) + ' Custom Health Rules'))
+        return rules
 
-    def dataCollectorStatus(self, application, taskList):
-        frame = pd.read_excel(self.analysis_sheet, sheet_name='DataCollectorsAPM', engine='openpyxl')
-        frame.drop('controller', axis=1)
-        appFrame = frame.loc[frame['application'] == application]
+    def dataCollectorStatus(self, sheet: ApplicationSheet) -> list:
+        rules = []
 
         # Number of data collector fields configured
-        if (appFrame['numberOfDataCollectorFieldsConfigured'] < 5).any():
-            if (appFrame['numberOfDataCollectorFieldsConfigured'] == 0).any():
-                taskList[2].append('No configured Data Collectors')
-            else:
-                taskList[2].append('Only ' + str(int(appFrame['numberOfDataCollectorFieldsConfigured'].iloc[0])) + ' configured Data Collectors')
-
         # Number of data collector fields colleced in snapshots in last 24 hours
-        if (appFrame['numberOfDataCollectorFieldsCollectedInSnapshots'] < 5).any():
-            if (appFrame['numberOfDataCollectorFieldsCollectedInSnapshots'] == 0).any():
-                taskList[2].append('No Data Collector fields collected in APM Snapshots in 24 hours')
-            else:
-                taskList[2].append('Only ' + str(int(appFrame['numberOfDataCollectorFieldsCollectedInSnapshots'].iloc[0])) + ' Data Collector fields collected in APM Snapshots in 24 hours')
-
         # Number of data collector fields collect in analytics in last 24 hours
-        if (appFrame['numberOfDataCollectorFieldsCollectedInAnalytics'] < 5).any():
-            if (appFrame['numberOfDataCollectorFieldsCollectedInAnalytics'] == 0).any():
-                taskList[2].append('No Data Collector fields collected in Analytics in 24 hours')
-            else:
-                taskList[2].append('Only ' + str(int(appFrame['numberOfDataCollectorFieldsCollectedInAnalytics'].iloc[0])) + ' Data Collector fields collected in Analytics in 24 hours')
+        for column, noneMessage, someMessage in [
+            ('numberOfDataCollectorFieldsConfigured', 'No configured Data Collectors', ' configured Data Collectors'),
+            ('numberOfDataCollectorFieldsCollectedInSnapshots', 'No Data Collector fields collected in APM Snapshots in 24 hours',
+             ' Data Collector fields collected in APM Snapshots in 24 hours'),
+            ('numberOfDataCollectorFieldsCollectedInAnalytics', 'No Data Collector fields collected in Analytics in 24 hours',
+             ' Data Collector fields collected in Analytics in 24 hours'),
+        ]:
+            noFields = sheet.any(sheet[column] == 0)
+            fewFields = sheet.any(sheet[column] < 5)
+            rules.append((2, fewFields & noFields, noneMessage))
+            rules.append((2, fewFields - noFields,
+                          lambda app, column=column, someMessage=someMessage: 'Only ' + str(int(sheet.first(app, column))) + someMessage))
 
         # BiQ enabled
-        if (appFrame['biqEnabled'] == False).any():
-            taskList[2].append('BiQ is disabled')
+        rules.append((2, sheet.any(sheet['biqEnabled'] == False), 'BiQ is disabled'))
+        return rules
 
-    def apmDashBoardsStatus(self, application, taskList):
-        frame = pd.read_excel(self.analysis_sheet, sheet_name='DashboardsAPM', engine='openpyxl')
-        frame.drop('controller', axis=1)
-        appFrame = frame.loc[frame['application'] == application]
+    def apmDashBoardsStatus(self, sheet: ApplicationSheet) -> list:
+        rules = []
 
         # Number of custom dashboards
-        if (appFrame['numberOfDashboards'] < 5).any():
-            if (appFrame['numberOfDashboards'] == 1).any():
-                taskList[4].append('Only 1 Custom Dashboard')
-            elif (appFrame['numberOfDashboards'] == 0).any():
-                taskList[4].append('No Custom Dashboards')
-            else:
-                taskList[4].append('Only ' + str(int(appFrame['numberOfDashboards'].iloc[0])) + ' Custom Dashboards')
+        fewDashboards = sheet.any(sheet['numberOfDashboards'] < 5)
+        oneDashboard = sheet.any(sheet['numberOfDashboards'] == 1)
+        noDashboards = sheet.any(sheet['numberOfDashboards'] == 0)
+        rules.append((4, fewDashboards & oneDashboard, 'Only 1 Custom Dashboard'))
+        rules.append((4, (fewDashboards & noDashboards) - oneDashboard, 'No Custom Dashboards'))
+        rules.append((4, fewDashboards - oneDashboard - noDashboards,
+                      lambda app: 'Only ' + str(int(sheet.first(app, 'numberOfDashboards'))) + ' Custom Dashboards'))
 
         # % of Custom Dashboards modified in last 6 months
-        if (appFrame['percentageOfDashboardsModifiedLast6Months'] < 100).any():
-            taskList[4].append(str(100 - int(appFrame['percentageOfDashboardsModifiedLast6Months'].iloc[0])) + '% of Custom Dashboards have not been updated in 6+ months')
+        rules.append((4, sheet.any(sheet['percentageOfDashboardsModifiedLast6Months'] < 100),
+                      lambda app: str(100 - int(sheet.first(app, 'percentageOfDashboardsModifiedLast6Months'))) + '% of Custom Dashboards have not been updated in 6+ months'))
 
         # Number of Custom Dashboards using BiQ
-        if (appFrame['numberOfDashboardsUsingBiQ'] == 0).any():
-            taskList[4].append('No Custom Dashboards using BiQ')
-
-    def performAnalysis(self, application, taskList):
-        overallRanking = self.overallAppStatus(application, taskList)
-        self.appAgentStatus(application, taskList)
-        self.machineAgentStatus(application, taskList)
-        self.businessTranStatus(application, taskList)
-        self.backendStatus(application, taskList)
-        self.overheadStatus(application, taskList)
-        self.serviceEndpointStatus(application, taskList)
-        self.errorConfigurationStatus(application, taskList)
-        self.healthRulesAlertingStatus(application, taskList)
-        self.dataCollectorStatus(application, taskList)
-        self.apmDashBoardsStatus(application, taskList)
-
-        return overallRanking
+        rules.append((4, sheet.any(sheet['numberOfDashboardsUsingBiQ'] == 0), 'No Custom Dashboards using BiQ'))
+        return rules
+
+    def performAnalysis(self, sheets: dict) -> (dict, list):
+        """
+        Evaluates all rules for all applications.
+        Returns the ranking of each application and the rules as (task category, matching applications, message) tuples,
+        in the order their tasks are listed. A message is either a string or a function of the application.
+        """
+        overallRankings = self.overallAppStatus(ApplicationSheet(sheets['Analysis'], key='name'))
+        rules = [
+            *self.appAgentStatus(ApplicationSheet(sheets['AppAgentsAPM'])),
+            *self.businessTranStatus(ApplicationSheet(sheets['BusinessTransactionsAPM'])),
+            *self.backendStatus(ApplicationSheet(sheets['BackendsAPM'])),
+            *self.overheadStatus(ApplicationSheet(sheets['OverheadAPM'])),
+            *self.serviceEndpointStatus(ApplicationSheet(sheets['ServiceEndpointsAPM'])),
+            *self.errorConfigurationStatus(ApplicationSheet(sheets['ErrorConfigurationAPM'])),
+            *self.healthRulesAlertingStatus(ApplicationSheet(sheets['HealthRulesAndAlertingAPM'])),
+            *self.dataCollectorStatus(ApplicationSheet(sheets['DataCollectorsAPM'])),
+            *self.apmDashBoardsStatus(ApplicationSheet(sheets['DashboardsAPM'])),
+        ]
+
+        return overallRankings, rules
 
     def buildOutput(self, applicationData, worksheets):
         worksheet = None
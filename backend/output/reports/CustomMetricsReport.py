@@ -1,9 +1,8 @@
 import logging
 import os
 
-from openpyxl import Workbook
 from backend.output.ReportBase import ReportBase
-from backend.util.excel_utils import addFilterAndFreeze, resizeColumnWidth, writeColoredRow, writeSummarySheet, writeUncoloredRow
+from backend.util.excel_utils import ReportWorkbook, addFilterAndFreeze, resizeColumnWidth, writeColoredRow, writeSummarySheet, writeUncoloredRow
 
 
 class CustomMetricsReport(ReportBase):
@@ -11,10 +10,10 @@ class CustomMetricsReport(ReportBase):
         logging.info(f"Creating Custom Metrics Report Workbook")
 
         # Create Report with Raw Data
-        workbook = Workbook()
+        save_path = os.path.join(output_dir, jobFileName, f"{jobFileName}-CustomMetrics.xlsx")
+        workbook = ReportWorkbook(save_path)
 
-        summarySheet = workbook["Sheet"]
-        summarySheet.title = "Extensions"
+        summarySheet = workbook.createSheet("Extensions")
 
         allExtensions = set()
         for host, hostInfo in controllerData.items():
@@ -55,5 +54,4 @@ class CustomMetricsReport(ReportBase):
         resizeColumnWidth(summarySheet)
 
         logging.debug(f"Saving CustomMetrics Workbook")
-        save_path = os.path.join(output_dir, jobFileName, f"{jobFileName}-CustomMetrics.xlsx")
-        workbook.save(save_path)
+        workbook.close()
@@ -2,21 +2,20 @@ import logging
 import os
 
 from datetime import datetime
-from openpyxl import Workbook
 
 from backend.output.ReportBase import ReportBase
-from backend.util.excel_utils import Color, addFilterAndFreeze, resizeColumnWidth, writeRow, writeUncoloredRow
+from backend.util.excel_utils import Color, ReportWorkbook, addFilterAndFreeze, resizeColumnWidth, writeRow, writeUncoloredRow
 
 
 class DashboardReport(ReportBase):
     def createWorkbook(self, jobs, controllerData, jobFileName, output_dir="output"):
         logging.info("Creating Dashboard Report Workbook")
 
-        workbook = Workbook()
-        del workbook["Sheet"]
+        save_path = os.path.join(output_dir, jobFileName, f"{jobFileName}-Dashboards.xlsx")
+        workbook = ReportWorkbook(save_path)
 
         logging.debug(f"Creating workbook sheet for Dashboards")
-        dashboardSheet = workbook.create_sheet(f"Dashboards")
+        dashboardSheet = workbook.createSheet(f"Dashboards")
         writeUncoloredRow(dashboardSheet, 1, ["controller", "dashboardName"])
 
         # Write Data
@@ -39,5 +38,4 @@ class DashboardReport(ReportBase):
         resizeColumnWidth(dashboardSheet)
 
         logging.debug(f"Saving Dashboard Workbook")
-        save_path = os.path.join(output_dir, jobFileName, f"{jobFileName}-Dashboards.xlsx")
-        workbook.save(save_path)
+        workbook.close()
@@ -2,20 +2,19 @@ import logging
 from datetime import datetime
 import os
 
-from openpyxl import Workbook
 from backend.output.ReportBase import ReportBase
-from backend.util.excel_utils import Color, addFilterAndFreeze, resizeColumnWidth, writeRow, writeUncoloredRow
+from backend.util.excel_utils import Color, ReportWorkbook, addFilterAndFreeze, resizeColumnWidth, writeRow, writeUncoloredRow
 
 
 class LicenseReport(ReportBase):
     def createWorkbook(self, jobs, controllerData, jobFileName, output_dir="output"):
         logging.info(f"Creating License Report Workbook")
 
-        workbook = Workbook()
-        del workbook["Sheet"]
+        save_path = os.path.join(output_dir, jobFileName, f"{jobFileName}-License.xlsx")
+        workbook = ReportWorkbook(save_path)
 
         logging.debug(f"Creating workbook sheet for App Agents")
-        licenseSheet = workbook.create_sheet(f"License")
+        licenseSheet = workbook.createSheet(f"License")
         writeUncoloredRow(licenseSheet, 1, ["controller", "licenseType", "isLicensed", "peakUsage", "numOfProvisionedLicense", "expirationDate"])
 
         # Write Data
@@ -52,5 +51,4 @@ class LicenseReport(ReportBase):
         resizeColumnWidth(licenseSheet)
 
         logging.debug(f"Saving License Workbook")
-        save_path = os.path.join(output_dir, jobFileName, f"{jobFileName}-License.xlsx")
-        workbook.save(save_path)
+        workbook.close()
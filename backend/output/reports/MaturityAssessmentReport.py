@@ -1,23 +1,25 @@
 import logging
 import os
 
-from openpyxl import Workbook
 from backend.output.ReportBase import ReportBase
-from backend.util.excel_utils import addFilterAndFreeze, resizeColumnWidth, writeColoredRow, writeSummarySheet, writeUncoloredRow
+from backend.util.excel_utils import Color, ReportWorkbook, addFilterAndFreeze, resizeColumnWidth, writeColoredRow, writeSummarySheet, writeUncoloredRow
 
 
 class MaturityAssessmentReport(ReportBase):
+    def __init__(self, reportTypes=("apm", "brum", "mrum")):
+        # one workbook per component type, rendered independently of each other
+        self.reportTypes = reportTypes
+
     def createWorkbook(self, jobs, controllerData, jobFileName, output_dir="output"):
-        for reportType in ["apm", "brum", "mrum"]:
+        for reportType in self.reportTypes:
             logging.info(f"Creating {reportType} Maturity Assessment Report Workbook")
 
             # Create Report with Raw Data
-            workbook = Workbook()
+            workbook = ReportWorkbook(os.path.join(output_dir, jobFileName, f"{jobFileName}-MaturityAssessment-{reportType}.xlsx"))
 
-            summarySheet = workbook["Sheet"]
-            summarySheet.title = "Summary"
+            summarySheet = workbook.createSheet("Summary")
 
-            analysisSheet = workbook.create_sheet(f"Analysis")
+            analysisSheet = workbook.createSheet(f"Analysis")
 
             filteredJobs = [job for job in jobs if job.componentType == reportType]
 
@@ -45,27 +47,26 @@ class MaturityAssessmentReport(ReportBase):
                 data_header
             )
 
-            rowIdx = 2
-            for host, hostInfo in controllerData.items():
-                for component in hostInfo[reportType].values():
-
-                    data_row = [
-                        (hostInfo["controller"].host, None),
-                        (reportType, None),
-                        (component["name"], None),
-                        (component["applicationId"] if reportType == "mrum" else component["id"], None),
-                        *[component[jobStep]["computed"] for jobStep in [type(jobStep).__name__ for jobStep in filteredJobs]],
-                    ]
-
-                    if reportType == "apm": # add desc after name
-                        data_row.insert(4, (component["description"], None))
-
-                    writeColoredRow(
-                        analysisSheet,
-                        rowIdx,
-                        data_row
-                    )
-                    rowIdx += 1
+            # every job step has one row per application, in the same order
+            stepResults = [jobStep.results for jobStep in filteredJobs]
+            keyResults = stepResults[0] if stepResults else None
+            for idx in range(len(keyResults) if keyResults is not None else 0):
+                data_row = [
+                    (keyResults.controllers[idx], None),
+                    (reportType, None),
+                    (keyResults.applications[idx], None),
+                    (keyResults.applicationIds[idx], None),
+                    *[(results.scores[idx], Color[results.scores[idx]]) for results in stepResults],
+                ]
+
+                if reportType == "apm": # add desc after name
+                    data_row.insert(4, (keyResults.descriptions[idx], None))
+
+                writeColoredRow(
+                    analysisSheet,
+                    idx + 2,
+                    data_row
+                )
 
             addFilterAndFreeze(analysisSheet, "E2")
             resizeColumnWidth(analysisSheet)
@@ -74,4 +75,4 @@ class MaturityAssessmentReport(ReportBase):
             writeSummarySheet(summarySheet)
 
             logging.debug(f"Saving MaturityAssessment-{reportType} Workbook")
-            workbook.save(os.path.join(output_dir, jobFileName, f"{jobFileName}-MaturityAssessment-{reportType}.xlsx"))
+            workbook.close()
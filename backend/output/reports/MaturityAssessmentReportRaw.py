@@ -1,34 +1,34 @@
 import logging
 import os
 
-from openpyxl import Workbook
 from backend.output.ReportBase import ReportBase
-from backend.util.excel_utils import addFilterAndFreeze, resizeColumnWidth
+from backend.util.excel_utils import ReportWorkbook, addFilterAndFreeze, resizeColumnWidth
 
 
 class RawMaturityAssessmentReport(ReportBase):
+    def __init__(self, reportTypes=("apm", "brum", "mrum")):
+        # one workbook per component type, rendered independently of each other
+        self.reportTypes = reportTypes
+
     def createWorkbook(self, jobs, controllerData, jobFileName, output_dir="output"):
-        for reportType in ["apm", "brum", "mrum"]:
+        for reportType in self.reportTypes:
             logging.info(f"Creating {reportType} Raw Maturity Assessment Report Workbook")
 
             # Create Report with Raw Maturity Assessment Report
-            workbook = Workbook()
+            save_path = os.path.join(output_dir, jobFileName, f"{jobFileName}-MaturityAssessmentRaw-{reportType}.xlsx")
+            workbook = ReportWorkbook(save_path)
 
             filteredJobs = [job for job in jobs if job.componentType == reportType]
 
-            if filteredJobs:
-                del workbook["Sheet"]
-            else:
-                summarySheet = workbook["Sheet"]
-                summarySheet.title = "Summary"
+            if not filteredJobs:
+                workbook.createSheet("Summary")
 
             for jobStep in filteredJobs:
                 jobStep.reportData(workbook, controllerData, type(jobStep).__name__, False, False)
 
-            analysisSheet = workbook.create_sheet("Analysis")
+            analysisSheet = workbook.createSheet("Analysis")
             addFilterAndFreeze(analysisSheet, "E2")
             resizeColumnWidth(analysisSheet)
 
             logging.debug(f"Saving MaturityAssessmentRaw-{reportType} Workbook")
-            save_path = os.path.join(output_dir, jobFileName, f"{jobFileName}-MaturityAssessmentRaw-{reportType}.xlsx")
-            workbook.save(save_path)
+            workbook.close()
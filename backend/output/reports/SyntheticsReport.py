@@ -4,21 +4,14 @@ import re
 from datetime import datetime
 from math import floor, ceil
 
-from openpyxl import Workbook
 from backend.output.ReportBase import ReportBase
-from backend.util.excel_utils import addFilterAndFreeze, resizeColumnWidth, writeColoredRow, writeSummarySheet, writeUncoloredRow, Color
+from backend.util.excel_utils import ReportWorkbook, addFilterAndFreeze, resizeColumnWidth, writeColoredRow, writeSummarySheet, writeUncoloredRow, Color
 
 
 class SyntheticsReport(ReportBase):
     def createWorkbook(self, jobs, controllerData, jobFileName, output_dir="output"):
         logging.info(f"Creating Synthetics Report Workbook")
 
-        # Create Report with Raw Data
-        workbook = Workbook()
-
-        summarySheet = workbook["Sheet"]
-        summarySheet.title = "Synthetics"
-
         allSyntheticJobs = []
         for host, hostInfo in controllerData.items():
             for application in hostInfo["brum"].values():
@@ -79,6 +72,12 @@ class SyntheticsReport(ReportBase):
             logging.warning(f"No data found for Synthetics")
             return
 
+        # Create Report with Raw Data
+        save_path = os.path.join(output_dir, jobFileName, f"{jobFileName}-Synthetics.xlsx")
+        workbook = ReportWorkbook(save_path)
+
+        summarySheet = workbook.createSheet("Synthetics")
+
         # Write Headers
         writeUncoloredRow(
             summarySheet,
@@ -101,5 +100,4 @@ class SyntheticsReport(ReportBase):
         resizeColumnWidth(summarySheet)
 
         logging.debug(f"Saving Synthetics Workbook")
-        save_path = os.path.join(output_dir, jobFileName, f"{jobFileName}-Synthetics.xlsx")
-        workbook.save(save_path)
+        workbook.close()
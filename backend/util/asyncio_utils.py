@@ -1,28 +1,212 @@
 import asyncio
+import inspect
 import logging
+import time
+from collections import deque
+from typing import Iterable
 
 
-class AsyncioUtils:
-    concurrentConnections = 50
+# connection budget of a controller when neither the job file nor -c sets one
+DEFAULT_CONCURRENT_CONNECTIONS = 50
+# coroutines a single gather runs at once, the AdmissionLimiter of the controller bounds the requests actually in flight
+MAX_PENDING_PER_GATHER = 100
+
 
+class AsyncioUtils:
     @staticmethod
-    def init(concurrentConnections: int = 50):
+    def clampConcurrentConnections(concurrentConnections: int) -> int:
         if concurrentConnections > 100:
             logging.warning(f"Concurrent connections ({concurrentConnections}) is too high. Setting to 100.")
-            concurrentConnections = 100
+            return 100
         elif concurrentConnections < 1:
             logging.warning(f"Concurrent connections ({concurrentConnections}) is too low. Setting to 1.")
-            concurrentConnections = 1
-        else:
-            logging.info(f"Setting concurrent connections to {concurrentConnections}.")
-        AsyncioUtils.concurrentConnections = concurrentConnections
+            return 1
+        return concurrentConnections
 
     @staticmethod
-    async def gatherWithConcurrency(*tasks):
-        semaphore = asyncio.Semaphore(AsyncioUtils.concurrentConnections)
+    async def gatherWithConcurrency(*tasks, limit: int = MAX_PENDING_PER_GATHER) -> list:
+        """asyncio.gather of the coroutines in tasks, running at most limit of them at once."""
+        return await AsyncioUtils.gatherLazily(tasks, limit)
+
+    @staticmethod
+    async def gatherLazily(coroutines: Iterable, limit: int = MAX_PENDING_PER_GATHER) -> list:
+        """
+        Results of the coroutines in order, like asyncio.gather, but only limit of them are started at once and the
+        next one is taken from the iterable when one finishes. With a generator the coroutines of a large fan-out
+        (e.g. one per node or health rule) are also only created as they are started.
+        The first exception is raised after the coroutines still running were cancelled.
+        """
+        pending = iter(coroutines)
+        results = []
+        running = {}
+
+        def startNext() -> bool:
+            coroutine = next(pending, None)
+            if coroutine is None:
+                return False
+            running[asyncio.ensure_future(coroutine)] = len(results)
+            results.append(None)
+            return True
+
+        try:
+            while len(running) < limit and startNext():
+                pass
+            while running:
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    results[running.pop(task)] = task.result()
+                    startNext()
+        except BaseException:
+            for task in running:
+                task.cancel()
+            # coroutines passed in a collection were created but never started, a generator just stops here
+            if pending is not coroutines:
+                for coroutine in pending:
+                    if inspect.iscoroutine(coroutine):
+                        coroutine.close()
+            raise
+        return results
+
+
+class AdmissionLimiter:
+    """
+    Bounds the requests in flight against a single controller and optionally the rate at which they are started.
+    Shared by every call made through an AppDService, waiters are admitted in FIFO order.
+    """
+
+    def __init__(self, maxInFlight: int, requestsPerSecond: float = None):
+        self.maxInFlight = maxInFlight
+        self.requestsPerSecond = requestsPerSecond
+        self.inFlight = 0
+        self.peakInFlight = 0
+        self.peakQueueDepth = 0
+        self.totalAdmitted = 0
+        self._waiters = deque()
+        self._nextStartTime = 0.0
+
+    @property
+    def queueDepth(self) -> int:
+        """Number of requests waiting to be admitted."""
+        return len(self._waiters)
+
+    async def acquire(self):
+        if self.inFlight < self.maxInFlight and not self._waiters:
+            self.inFlight += 1
+        else:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            self.peakQueueDepth = max(self.peakQueueDepth, len(self._waiters))
+            try:
+                # release() hands its slot over to us, inFlight is already accounted for
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    self.release()
+                elif waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                raise
+
+        self.peakInFlight = max(self.peakInFlight, self.inFlight)
+        self.totalAdmitted += 1
+        try:
+            await self._pace()
+        except asyncio.CancelledError:
+            self.release()
+            raise
+
+    def release(self):
+        # once the limit was lowered, slots are retired instead of handed over until inFlight is back under it
+        if self.inFlight <= self.maxInFlight:
+            while self._waiters:
+                waiter = self._waiters.popleft()
+                if not waiter.done():
+                    waiter.set_result(None)
+                    return
+        self.inFlight -= 1
+
+    def setMaxInFlight(self, maxInFlight: int):
+        self.maxInFlight = maxInFlight
+        while self.inFlight < self.maxInFlight and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.inFlight += 1
+                waiter.set_result(None)
+
+    async def _pace(self):
+        """Spaces out request starts to honor requestsPerSecond."""
+        if not self.requestsPerSecond:
+            return
+        now = time.monotonic()
+        startTime = max(now, self._nextStartTime)
+        self._nextStartTime = startTime + 1 / self.requestsPerSecond
+        if startTime > now:
+            await asyncio.sleep(startTime - now)
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.release()
+
+
+class AdaptiveConcurrency:
+    """
+    Additive-increase / multiplicative-decrease of the in-flight limit of an AdmissionLimiter.
+    After every window of responses the limit grows by one while p95 latency stays within tolerance of the best
+    window seen so far, and holds while latency rises. Overload (429/503/504 or timeouts) halves the limit,
+    at most once per cooldown so a burst of failures from the same congestion only counts once.
+    """
+
+    def __init__(
+        self,
+        admissionLimiter: AdmissionLimiter,
+        minLimit: int = 1,
+        maxLimit: int = 100,
+        windowSize: int = 20,
+        latencyTolerance: float = 1.5,
+        cooldownSeconds: float = 5.0,
+    ):
+        self.admissionLimiter = admissionLimiter
+        self.minLimit = minLimit
+        self.maxLimit = maxLimit
+        self.windowSize = windowSize
+        self.latencyTolerance = latencyTolerance
+        self.cooldownSeconds = cooldownSeconds
+        self.baselineLatency = None
+        self.lowestLimit = self.highestLimit = admissionLimiter.maxInFlight
+        self.decreases = 0
+        self._window = []
+        self._cooldownUntil = 0.0
+
+    @property
+    def limit(self) -> int:
+        return self.admissionLimiter.maxInFlight
+
+    def observe(self, latencySeconds: float, overloaded: bool = False):
+        now = time.monotonic()
+        if overloaded:
+            if now >= self._cooldownUntil:
+                self._setLimit(max(self.minLimit, self.limit // 2))
+                self.decreases += 1
+                self._cooldownUntil = now + self.cooldownSeconds
+                self._window.clear()
+            return
+
+        self._window.append(latencySeconds)
+        if len(self._window) < self.windowSize:
+            return
+        p95 = sorted(self._window)[int(0.95 * (len(self._window) - 1))]
+        self._window.clear()
 
-        async def semTask(task):
-            async with semaphore:
-                return await task
+        if self.baselineLatency is None or p95 < self.baselineLatency:
+            self.baselineLatency = p95
+        if p95 <= self.baselineLatency * self.latencyTolerance and now >= self._cooldownUntil:
+            self._setLimit(min(self.maxLimit, self.limit + 1))
 
-        return await asyncio.gather(*[semTask(task) for task in tasks])
+    def _setLimit(self, limit: int):
+        if limit != self.limit:
+            logging.debug(f"Adjusting concurrent requests from {self.limit} to {limit}")
+            self.admissionLimiter.setMaxInFlight(limit)
+        self.lowestLimit = min(self.lowestLimit, limit)
+        self.highestLimit = max(self.highestLimit, limit)
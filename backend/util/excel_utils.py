@@ -1,13 +1,19 @@
 import logging
-import string
+from datetime import date
 from enum import Enum
 from typing import Any, List
 
-from openpyxl import Workbook
+import xlsxwriter
 from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
 from openpyxl.styles import PatternFill
-from openpyxl.utils.exceptions import IllegalCharacterError
-from openpyxl.worksheet.worksheet import Worksheet
+
+# widest column Excel allows
+MAX_COLUMN_WIDTH = 255
+# column widths are taken from every one of the first rows, further down tall sheets only every WIDTH_SAMPLE_STRIDE-th row is measured
+WIDTH_SAMPLE_ROWS = 10000
+WIDTH_SAMPLE_STRIDE = 100
+# columns after these keep the default width, so very wide sheets aren't measured cell by cell
+WIDTH_SAMPLE_COLUMNS = 256
 
 
 class Color(Enum):
@@ -24,41 +30,136 @@ class Color(Enum):
     white = PatternFill(start_color="FFFFFFFF", end_color="FFFFFFFF", fill_type="solid")
 
 
-def writeRow(sheet: Worksheet, rowIdx: int, data: [Any]):
+class ReportWorkbook:
+    """
+    Write-only xlsx workbook backed by xlsxwriter in constant_memory mode.
+    Rows are flushed to disk as soon as a later row is written, so memory stays flat regardless of the size of a report.
+    Rows of a sheet have to be written top to bottom, a row can't be written to after a later row was started.
+    """
+
+    # same number format openpyxl used for datetimes
+    DATE_FORMAT = "yyyy-mm-dd h:mm:ss"
+
+    def __init__(
+        self,
+        path: str,
+        maxColumnWidth: int = MAX_COLUMN_WIDTH,
+        widthSampleRows: int = WIDTH_SAMPLE_ROWS,
+        widthSampleStride: int = WIDTH_SAMPLE_STRIDE,
+        widthSampleColumns: int = WIDTH_SAMPLE_COLUMNS,
+    ):
+        self.maxColumnWidth = maxColumnWidth
+        # None measures every row, a widthSampleStride of None no row after widthSampleRows
+        self.widthSampleRows = widthSampleRows
+        self.widthSampleStride = widthSampleStride
+        # None measures every column
+        self.widthSampleColumns = widthSampleColumns
+        self.workbook = xlsxwriter.Workbook(
+            path,
+            {
+                "constant_memory": True,
+                # keep values as they are, e.g. don't turn dashboard or synthetic job URLs into hyperlinks
+                "strings_to_urls": False,
+                "nan_inf_to_errors": True,
+                "default_date_format": ReportWorkbook.DATE_FORMAT,
+            },
+        )
+        # (color, isDate) -> Format
+        self.colorFormats = {}
+
+    def createSheet(self, title: str) -> "ReportSheet":
+        return ReportSheet(self, self.workbook.add_worksheet(title))
+
+    def colorFormat(self, color: Color, isDate: bool = False):
+        """Returns the cell format filling a cell with color, created once per workbook."""
+        if (color, isDate) not in self.colorFormats:
+            properties = {"pattern": 1, "bg_color": f"#{color.value.start_color.rgb[2:]}"}
+            if isDate:
+                # a cell format replaces the default date format
+                properties["num_format"] = ReportWorkbook.DATE_FORMAT
+            self.colorFormats[(color, isDate)] = self.workbook.add_format(properties)
+        return self.colorFormats[(color, isDate)]
+
+    def measuresRow(self, row: int) -> bool:
+        """True if the widths of the cells of the 0-based row are tracked."""
+        if self.widthSampleRows is None or row < self.widthSampleRows:
+            return True
+        return self.widthSampleStride is not None and (row - self.widthSampleRows) % self.widthSampleStride == 0
+
+    def close(self):
+        self.workbook.close()
+
+
+class ReportSheet:
+    """
+    Sheet of a ReportWorkbook. Keeps track of the written range and the column widths while cells are written,
+    as written cells can't be read back.
+    """
+
+    def __init__(self, workbook: ReportWorkbook, worksheet):
+        self.workbook = workbook
+        self.worksheet = worksheet
+        self.maxRow = 0
+        self.maxCol = 0
+        # column index -> length of the longest value
+        self.columnWidths = {}
+
+    def writeRow(self, row: int, values: [Any], colors: [Color] = None):
+        """Write values to the given 0-based row starting from the first column, each cell filled with the matching color if given."""
+        if not values:
+            return
+        values = [scrubIllegalCharacters(value) if isinstance(value, str) else value for value in values]
+        if colors is None:
+            self.worksheet.write_row(row, 0, values)
+        else:
+            colorFormat = self.workbook.colorFormat
+            for col, (value, color) in enumerate(zip(values, colors)):
+                self.worksheet.write(row, col, value, colorFormat(color, isinstance(value, date)) if color is not None else None)
+
+        self.maxRow = max(self.maxRow, row + 1)
+        self.maxCol = max(self.maxCol, len(values))
+        if self.workbook.measuresRow(row):
+            columnWidths = self.columnWidths
+            for col, value in enumerate(values[: self.workbook.widthSampleColumns]):
+                if value:
+                    width = len(str(value))
+                    if width > columnWidths.get(col, 0):
+                        columnWidths[col] = width
+
+
+def scrubIllegalCharacters(value: str) -> str:
+    if ILLEGAL_CHARACTERS_RE.search(value):
+        logging.warning(f"illegal character detected in cell, will scrub {value}")
+        value = ILLEGAL_CHARACTERS_RE.sub(r'', value)
+        logging.warning(f"scrubbed cell: {value}")
+    return value
+
+
+def writeRow(sheet: ReportSheet, rowIdx: int, data: [Any]):
     if all(value for value in data if isinstance(value, tuple) and isinstance(value[1], Color)):
         writeColoredRow(sheet, rowIdx, data)
     else:
         writeUncoloredRow(sheet, rowIdx, data)
 
 
-def writeColoredRow(sheet: Worksheet, rowIdx: int, data: [(Any, Color)]):
-    """Write row of data at given rowIdx starting from colIdx A."""
-    for (data, color), colIdx in zip(data, string.ascii_uppercase[: len(data)]):
-        sheet[f"{colIdx}{rowIdx}"] = data
-        if color is not None:
-            sheet[f"{colIdx}{rowIdx}"].fill = color.value
+def writeColoredRow(sheet: ReportSheet, rowIdx: int, data: [(Any, Color)]):
+    """Write row of data at given 1-based rowIdx starting from the first column."""
+    sheet.writeRow(rowIdx - 1, [value for value, _ in data], [color for _, color in data])
 
 
-def writeUncoloredRow(sheet: Worksheet, rowIdx: int, data: [Any]):
-    """Write row of data at given rowIdx starting from colIdx A. Typically used for writing headers."""
-    for cell, colIdx in zip(data, string.ascii_uppercase[: len(data)]):
-        try:
-            sheet[f"{colIdx}{rowIdx}"] = cell
-        except IllegalCharacterError:
-            logging.warning(f"illegal character detected in cell, will scrub {cell}")
-            cell = ILLEGAL_CHARACTERS_RE.sub(r'', cell)
-            logging.warning(f"scrubbed cell: {cell}")
-            sheet[f"{colIdx}{rowIdx}"] = cell
+def writeUncoloredRow(sheet: ReportSheet, rowIdx: int, data: [Any]):
+    """Write row of data at given 1-based rowIdx starting from the first column. Typically used for writing headers."""
+    sheet.writeRow(rowIdx - 1, data)
 
 
-def createSheet(workbook: Workbook, sheetName: str, headers: List[Any], rows: List[List[Any]]):
-    sheet = workbook.create_sheet(sheetName)
+def createSheet(workbook: ReportWorkbook, sheetName: str, headers: List[Any], rows: List[List[Any]]):
+    sheet = workbook.createSheet(sheetName)
     writeRow(sheet, 1, headers)
     for idx, row in enumerate(rows):
         writeRow(sheet, idx + 1, row)
 
 
-def writeSummarySheet(summarySheet: Worksheet):
+def writeSummarySheet(summarySheet: ReportSheet):
     """Summarize the data in the report on the summary sheet."""
     writeColoredRow(
         summarySheet,
@@ -95,20 +196,15 @@ def writeSummarySheet(summarySheet: Worksheet):
     )
 
 
-def resizeColumnWidth(sheet: Worksheet):
-    """Resize columns to max width of cell per column."""
+def resizeColumnWidth(sheet: ReportSheet):
+    """Resize columns to max width of cell per column, as tracked while writing the sheet."""
     headerFilterArrowPadding = 5
-    dims = {}
-    for row in sheet.rows:
-        for cell in row:
-            if cell.value:
-                dims[cell.column_letter] = max((dims.get(cell.column_letter, 0), len(str(cell.value))))
-    for col, value in dims.items():
-        sheet.column_dimensions[col].width = value + headerFilterArrowPadding
+    for col, value in sheet.columnWidths.items():
+        sheet.worksheet.set_column(col, col, min(value + headerFilterArrowPadding, sheet.workbook.maxColumnWidth))
 
 
-def addFilterAndFreeze(sheet: Worksheet, freezePane: str = "D2"):
+def addFilterAndFreeze(sheet: ReportSheet, freezePane: str = "D2"):
     """Add filter on headers and freeze the first 2 columns and 1 row."""
-    sheet.auto_filter.ref = sheet.dimensions
+    sheet.worksheet.autofilter(0, 0, max(sheet.maxRow - 1, 0), max(sheet.maxCol - 1, 0))
     # Freeze controller and application columns
-    sheet.freeze_panes = freezePane
+    sheet.worksheet.freeze_panes(freezePane)
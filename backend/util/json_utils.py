@@ -0,0 +1,26 @@
+import json
+
+try:
+    # optional, parses several times faster than the json module
+    import orjson
+except ImportError:
+    orjson = None
+
+JSON_BACKEND = "orjson" if orjson is not None else "json"
+
+
+def loadsResponseBody(body: bytes):
+    """
+    Parses a controller response body the same way as json.loads(body.decode("ISO-8859-1")), except that orjson reads
+    integers beyond 64 bits as floats, the controller never sends any wider than a Java long.
+    ASCII bodies, most responses, are parsed from the bytes directly without decoding them to a str first.
+    Raises ValueError if the body is not valid JSON.
+    """
+    document = body if body.isascii() else body.decode("ISO-8859-1")
+    if orjson is not None:
+        try:
+            return orjson.loads(document)
+        except orjson.JSONDecodeError:
+            # json also accepts NaN and Infinity
+            pass
+    return json.loads(document)
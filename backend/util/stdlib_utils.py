@@ -1,5 +1,6 @@
 import base64
 import binascii
+import math
 from enum import Enum
 from typing import Optional
 
@@ -16,28 +17,82 @@ def get_recursively(search_dict, field):
     """
     Takes a dict with nested lists and dicts, and searches all dicts for a key of the field provided.
     """
-    fields_found = set()
-
-    for key, value in search_dict.items():
-        if key == field:
-            if isinstance(value, list):
-                for x in value:
-                    fields_found.add(x)
-            else:
-                fields_found.add(value)
-        elif isinstance(value, dict):
-            results = get_recursively(value, field)
-            for result in results:
-                fields_found.add(result)
-        elif isinstance(value, list):
-            for item in value:
-                if isinstance(item, dict):
-                    more_results = get_recursively(item, field)
-                    for another_result in more_results:
-                        fields_found.add(another_result)
+    return get_fields_recursively(search_dict, (field,))[field]
+
+
+def get_fields_recursively(search_dict, fields) -> dict:
+    """
+    Like get_recursively for several fields at once, walking the nested lists and dicts a single time.
+    Returns field -> set of values found. Values of a matching key are not searched further.
+    """
+    fields_found = {field: set() for field in fields}
+    stack = [search_dict]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, dict):
+            for key, value in item.items():
+                if key in fields_found:
+                    if isinstance(value, list):
+                        fields_found[key].update(value)
+                    else:
+                        fields_found[key].add(value)
+                elif isinstance(value, (dict, list)):
+                    stack.append(value)
+        else:
+            stack.extend(value for value in item if isinstance(value, dict))
     return fields_found
 
 
+class AhoCorasick:
+    """
+    Finds which of many patterns occur in a text in a single pass over the text,
+    instead of one substring search per pattern.
+    """
+
+    def __init__(self, patterns: [str]):
+        self.patterns = patterns
+        # trie of the patterns, node -> next node per character
+        self.transitions = [{}]
+        # node -> indexes of the patterns ending at the node, including those reached through its fail links
+        self.outputs = [[]]
+        for patternIdx, pattern in enumerate(patterns):
+            node = 0
+            for char in pattern:
+                nextNode = self.transitions[node].get(char)
+                if nextNode is None:
+                    nextNode = len(self.transitions)
+                    self.transitions[node][char] = nextNode
+                    self.transitions.append({})
+                    self.outputs.append([])
+                node = nextNode
+            self.outputs[node].append(patternIdx)
+
+        # fail link: node of the longest proper suffix of the node which is also in the trie, built breadth first
+        self.fail = [0] * len(self.transitions)
+        queue = list(self.transitions[0].values())
+        for node in queue:
+            for char, nextNode in self.transitions[node].items():
+                fallback = self.fail[node]
+                while fallback and char not in self.transitions[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[nextNode] = self.transitions[fallback].get(char, 0) if node else 0
+                self.outputs[nextNode] = self.outputs[nextNode] + self.outputs[self.fail[nextNode]]
+                queue.append(nextNode)
+
+    def search(self, text: str) -> set:
+        """Indexes of the patterns occurring in text."""
+        found = set(self.outputs[0])  # empty patterns occur in every text
+        transitions, fail, outputs = self.transitions, self.fail, self.outputs
+        node = 0
+        for char in text:
+            while node and char not in transitions[node]:
+                node = fail[node]
+            node = transitions[node].get(char, 0)
+            if outputs[node]:
+                found.update(outputs[node])
+        return found
+
+
 def jsonEncoder(o):
     if isinstance(o, set):
         return list(o)
@@ -49,6 +104,14 @@ def jsonEncoder(o):
         return f"<<non-serializable: {type(o).__qualname__}>>"
 
 
+def formatSize(sizeBytes: int) -> str:
+    """Returns a human readable size, e.g. 1.5 MB."""
+    sizeName = ("B", "KB", "MB", "GB")
+    i = min(int(math.floor(math.log(sizeBytes, 1024))), len(sizeName) - 1) if sizeBytes > 0 else 0
+    p = math.pow(1024, i)
+    return f"{round(sizeBytes / p, 2)} {sizeName[i]}"
+
+
 def isBase64(s: str, encoding="ISO-8859-1"):
     try:
         strBytes = bytes(s, encoding=encoding)
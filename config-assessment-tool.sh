@@ -276,6 +276,20 @@ case "$1" in
     echo "  -t, --thresholds-file <name>      Thresholds file name (default: DefaultThresholds)"
     echo "  -d, --debug                       Enable debug logging"
     echo "  -c, --concurrent-connections <n>  Number of concurrent connections"
+    echo "  --parallel-controllers            Extract all controllers of the job in parallel"
+    echo "  --requests-per-second <n>         Maximum number of requests started per second against each controller"
+    echo "  --adaptive-concurrency            Adjust concurrent requests to controller latency, -c is the starting point"
+    echo "  --max-retries <n>                 Retries of transient controller failures (default: 3)"
+    echo "  --job-deadline-mins <n>           Abort the job when it has run for this many minutes"
+    echo "  --response-cache                  Reuse cached controller configuration responses from earlier runs"
+    echo "  --response-cache-ttl-mins <n>     How long cached responses are reused (default: 10)"
+    echo "  --response-cache-max-mb <n>       Size limit of the response cache (default: 512)"
+    echo "  --incremental-dashboards          Only export dashboards modified since the last run"
+    echo "  --record                          Record every controller response of the job"
+    echo "  --replay                          Rerun the job from recorded responses without contacting the controllers"
+    echo "  --analyze-only                    Rerun analysis and reports on the controllerData snapshot of the last run"
+    echo "  --compact-snapshot                Write controllerData.jsonl.gz (gzipped JSON lines) instead of controllerData.json"
+    echo "  --report-workers <n>              Render report workbooks in this many worker processes (default: 1)"
     echo "  "
     echo "Direct Docker Usage:"
     echo "  You can also run the tool directly using Docker without this script."
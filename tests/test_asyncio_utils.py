@@ -0,0 +1,222 @@
+import asyncio
+import time
+
+import pytest
+
+from backend.util.asyncio_utils import AdaptiveConcurrency, AdmissionLimiter, AsyncioUtils
+
+
+class InFlightCounter:
+    def __init__(self):
+        self.inFlight = 0
+        self.peak = 0
+        self.order = []
+
+    async def call(self, idx, admissionLimiter: AdmissionLimiter = None, seconds: float = 0.01):
+        if admissionLimiter is not None:
+            await admissionLimiter.acquire()
+        try:
+            self.order.append(idx)
+            self.inFlight += 1
+            self.peak = max(self.peak, self.inFlight)
+            await asyncio.sleep(seconds)
+            self.inFlight -= 1
+            return idx
+        finally:
+            if admissionLimiter is not None:
+                admissionLimiter.release()
+
+
+def testAdmissionLimiterBoundsInFlight():
+    async def run():
+        admissionLimiter = AdmissionLimiter(3)
+        counter = InFlightCounter()
+        results = await asyncio.gather(*[counter.call(idx, admissionLimiter) for idx in range(20)])
+        return admissionLimiter, counter, results
+
+    admissionLimiter, counter, results = asyncio.run(run())
+    assert results == list(range(20))
+    assert counter.peak == 3
+    assert admissionLimiter.peakInFlight == 3
+    assert admissionLimiter.peakQueueDepth == 17
+    assert admissionLimiter.totalAdmitted == 20
+    assert admissionLimiter.inFlight == 0
+    assert admissionLimiter.queueDepth == 0
+
+
+def testAdmissionLimiterAdmitsInFifoOrder():
+    async def run():
+        admissionLimiter = AdmissionLimiter(1)
+        counter = InFlightCounter()
+        await asyncio.gather(*[counter.call(idx, admissionLimiter, seconds=0) for idx in range(10)])
+        return counter.order
+
+    assert asyncio.run(run()) == list(range(10))
+
+
+def testAdmissionLimiterHoldsAcrossNestedGathers():
+    async def run():
+        admissionLimiter = AdmissionLimiter(4)
+        counter = InFlightCounter()
+
+        async def application(applicationIdx):
+            return await asyncio.gather(*[counter.call((applicationIdx, idx), admissionLimiter) for idx in range(5)])
+
+        await asyncio.gather(*[application(applicationIdx) for applicationIdx in range(5)])
+        return counter.peak
+
+    assert asyncio.run(run()) == 4
+
+
+def testAdmissionLimiterCancelledWaiterGivesUpItsPlace():
+    async def run():
+        admissionLimiter = AdmissionLimiter(1)
+        await admissionLimiter.acquire()
+        waiter = asyncio.ensure_future(admissionLimiter.acquire())
+        await asyncio.sleep(0)
+        assert admissionLimiter.queueDepth == 1
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert admissionLimiter.queueDepth == 0
+        admissionLimiter.release()
+        return admissionLimiter.inFlight
+
+    assert asyncio.run(run()) == 0
+
+
+def testAdmissionLimiterLoweredLimitRetiresSlots():
+    async def run():
+        admissionLimiter = AdmissionLimiter(4)
+        for _ in range(4):
+            await admissionLimiter.acquire()
+        waiter = asyncio.ensure_future(admissionLimiter.acquire())
+        await asyncio.sleep(0)
+        admissionLimiter.setMaxInFlight(2)
+
+        # the first two releases retire slots instead of admitting the waiter
+        admissionLimiter.release()
+        admissionLimiter.release()
+        await asyncio.sleep(0)
+        assert not waiter.done()
+        assert admissionLimiter.inFlight == 2
+
+        admissionLimiter.release()
+        await waiter
+        return admissionLimiter.inFlight
+
+    assert asyncio.run(run()) == 2
+
+
+def testAdmissionLimiterPacesRequestsPerSecond():
+    async def run():
+        admissionLimiter = AdmissionLimiter(10, requestsPerSecond=50)
+        counter = InFlightCounter()
+        startTime = time.monotonic()
+        await asyncio.gather(*[counter.call(idx, admissionLimiter, seconds=0) for idx in range(6)])
+        return time.monotonic() - startTime
+
+    # 6 starts spaced 20ms apart
+    assert asyncio.run(run()) >= 0.09
+
+
+def testGatherWithConcurrencyKeepsOrderAndBound():
+    async def run():
+        counter = InFlightCounter()
+        results = await AsyncioUtils.gatherWithConcurrency(*[counter.call(idx, seconds=0.001 * (idx % 3)) for idx in range(50)], limit=7)
+        return counter.peak, results
+
+    peak, results = asyncio.run(run())
+    assert peak == 7
+    assert results == list(range(50))
+
+
+def testGatherLazilyCreatesCoroutinesAsTheyStart():
+    created = []
+
+    async def run():
+        counter = InFlightCounter()
+
+        def coroutines():
+            for idx in range(20):
+                # the next coroutine is only created once one of the 5 running finished
+                assert counter.inFlight < 5
+                created.append(idx)
+                yield counter.call(idx)
+
+        return await AsyncioUtils.gatherLazily(coroutines(), limit=5)
+
+    assert asyncio.run(run()) == list(range(20))
+    assert created == list(range(20))
+
+
+def testGatherWithConcurrencyCancelsTheRestOnError():
+    cancelled = []
+
+    async def fail():
+        raise ValueError("failed")
+
+    async def slow(idx):
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.append(idx)
+            raise
+
+    async def run():
+        tasks = [fail(), slow(1), slow(2), slow(3)]
+        with pytest.raises(ValueError):
+            await AsyncioUtils.gatherWithConcurrency(*tasks, limit=2)
+        await asyncio.sleep(0)
+        # slow(2) and slow(3) were never started, they are closed instead of left unawaited
+        return [task.cr_frame is None for task in tasks[2:]]
+
+    assert asyncio.run(run()) == [True, True]
+    assert cancelled == [1]
+
+
+def testGatherWithConcurrencyOfNothing():
+    assert asyncio.run(AsyncioUtils.gatherWithConcurrency()) == []
+
+
+def testAdaptiveConcurrencyGrowsWhileLatencyHolds():
+    adaptive = AdaptiveConcurrency(AdmissionLimiter(10), maxLimit=12, windowSize=5, cooldownSeconds=0)
+    for _ in range(5 * 4):
+        adaptive.observe(0.1)
+    # one step per window, capped at maxLimit
+    assert adaptive.limit == 12
+    assert adaptive.highestLimit == 12
+    assert adaptive.baselineLatency == 0.1
+
+
+def testAdaptiveConcurrencyHoldsWhileLatencyRises():
+    adaptive = AdaptiveConcurrency(AdmissionLimiter(10), windowSize=5, cooldownSeconds=0)
+    for _ in range(5):
+        adaptive.observe(0.1)
+    assert adaptive.limit == 11
+    for _ in range(5):
+        adaptive.observe(0.5)
+    assert adaptive.limit == 11
+    assert adaptive.baselineLatency == 0.1
+
+
+def testAdaptiveConcurrencyHalvesOncePerCooldownOnOverload():
+    adaptive = AdaptiveConcurrency(AdmissionLimiter(16), windowSize=5, cooldownSeconds=60)
+    adaptive.observe(1.0, overloaded=True)
+    adaptive.observe(1.0, overloaded=True)
+    assert adaptive.limit == 8
+    assert adaptive.decreases == 1
+    assert adaptive.lowestLimit == 8
+
+    # no increase during the cooldown either
+    for _ in range(5):
+        adaptive.observe(0.1)
+    assert adaptive.limit == 8
+
+
+def testAdaptiveConcurrencyNeverDropsBelowMinLimit():
+    adaptive = AdaptiveConcurrency(AdmissionLimiter(2), minLimit=1, cooldownSeconds=0)
+    for _ in range(3):
+        adaptive.observe(1.0, overloaded=True)
+    assert adaptive.limit == 1
+    assert adaptive.admissionLimiter.maxInFlight == 1
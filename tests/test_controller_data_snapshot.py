@@ -0,0 +1,100 @@
+import json
+import os
+from collections import OrderedDict
+
+import pytest
+
+from backend.api.Result import Result
+from backend.output.ControllerDataSnapshot import ControllerDataSnapshot
+from backend.util.excel_utils import Color
+from backend.util.stdlib_utils import jsonEncoder
+
+
+class Controller:
+    def __json__(self):
+        return {"host": "acme.saas.appdynamics.com", "timeRangeMins": 1440}
+
+
+@pytest.fixture
+def controllerData():
+    application = OrderedDict(
+        [
+            ("id", 1),
+            ("name", "App1"),
+            ("customMetrics", {"Custom Metrics|foo"}),
+            ("tiers", Result([{"id": 7, "name": "Web"}], None)),
+            ("AppAgentsAPM", {"computed": [1, Color.gold], "evaluated": {"percentAgentsLessThan1YearOld": [100.0, Color.platinum]}}),
+        ]
+    )
+    return OrderedDict(
+        [
+            (
+                "acme.saas.appdynamics.com",
+                OrderedDict(
+                    [
+                        ("controller", Controller()),
+                        ("apm", OrderedDict([("App1", application), ("App2", OrderedDict([("id", 2), ("name", "App2")]))])),
+                        ("brum", OrderedDict()),
+                        ("mrum", OrderedDict([("Mobile", {"applicationId": 3, "name": "Mobile"})])),
+                        ("exportedDashboards", Result([{"id": 5}], Result.Error("failed"))),
+                        ("containerLicense", 0),
+                    ]
+                ),
+            ),
+            ("onprem.example.com", OrderedDict([("controller", Controller()), ("apm", OrderedDict())])),
+        ]
+    )
+
+
+def jsonRoundTrip(controllerData) -> OrderedDict:
+    """What a snapshot should load as, the values jsonEncoder turns controllerData into."""
+    return json.loads(json.dumps(controllerData, default=jsonEncoder), object_pairs_hook=OrderedDict)
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def testWriteThenRead(tmp_path, controllerData, compact):
+    snapshot = ControllerDataSnapshot(compact=compact)
+    path = os.path.join(tmp_path, snapshot.fileName)
+    snapshot.write(path, controllerData)
+
+    loaded = ControllerDataSnapshot.read(path)
+    assert loaded == jsonRoundTrip(controllerData)
+    # key order is kept, reports list controllers and applications in extraction order
+    assert list(loaded) == list(controllerData)
+    assert list(loaded["acme.saas.appdynamics.com"]) == list(controllerData["acme.saas.appdynamics.com"])
+    assert list(loaded["acme.saas.appdynamics.com"]["apm"]) == ["App1", "App2"]
+    assert Result.fromJson(loaded["acme.saas.appdynamics.com"]["exportedDashboards"]) == Result([{"id": 5}], Result.Error("failed"))
+    assert snapshot.compressedBytes == os.path.getsize(path)
+
+
+def testDefaultIsTheControllerDataJsonDump(tmp_path, controllerData):
+    snapshot = ControllerDataSnapshot()
+    assert snapshot.fileName == "controllerData.json"
+    path = os.path.join(tmp_path, snapshot.fileName)
+    snapshot.write(path, controllerData)
+
+    # the documented raw data dump, indented JSON of controllerData
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == json.dumps(controllerData, default=jsonEncoder, indent=4)
+
+
+def testCompactSnapshotIsSmaller(tmp_path, controllerData):
+    controllerData["acme.saas.appdynamics.com"]["apm"].update(
+        (f"App{idx}", {"id": idx, "name": f"App{idx}", "nodes": [{"id": node, "tierName": "Web"} for node in range(20)]}) for idx in range(3, 50)
+    )
+    paths = []
+    for compact in (False, True):
+        snapshot = ControllerDataSnapshot(compact=compact)
+        paths.append(os.path.join(tmp_path, snapshot.fileName))
+        snapshot.write(paths[-1], controllerData)
+    assert os.path.getsize(paths[1]) * 5 < os.path.getsize(paths[0])
+    assert ControllerDataSnapshot.read(paths[0]) == ControllerDataSnapshot.read(paths[1])
+
+
+def testReadsControllerDataJsonOfEarlierVersions(tmp_path, controllerData):
+    # written by versions before ControllerDataSnapshot existed
+    path = os.path.join(tmp_path, "controllerData.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(controllerData, fp=f, default=jsonEncoder, indent=4)
+
+    assert ControllerDataSnapshot.read(path) == jsonRoundTrip(controllerData)
@@ -0,0 +1,71 @@
+import os
+
+import pytest
+from openpyxl import load_workbook
+
+from backend.util.excel_utils import Color, ReportWorkbook, resizeColumnWidth, writeColoredRow, writeUncoloredRow
+
+
+def readColumnWidths(path: str) -> dict:
+    worksheet = load_workbook(path)["Sheet"]
+    return {column: dimension.width for column, dimension in worksheet.column_dimensions.items() if dimension.customWidth}
+
+
+def testColumnWidthsAreTrackedWhileWriting(tmp_path):
+    path = os.path.join(tmp_path, "report.xlsx")
+    workbook = ReportWorkbook(path)
+    sheet = workbook.createSheet("Sheet")
+    writeUncoloredRow(sheet, 1, ["controller", "application", "BTs"])
+    writeColoredRow(sheet, 2, [("acme.saas.appdynamics.com", Color.white), ("App1", Color.white), (12, Color.gold)])
+    writeUncoloredRow(sheet, 3, ["x", None, 0])
+
+    assert sheet.columnWidths == {0: len("acme.saas.appdynamics.com"), 1: len("application"), 2: len("BTs")}
+    assert (sheet.maxRow, sheet.maxCol) == (3, 3)
+
+    resizeColumnWidth(sheet)
+    workbook.close()
+    # padded for the filter arrow of the header, xlsxwriter adds its own cell padding on top
+    assert readColumnWidths(path) == {"A": pytest.approx(30, abs=1), "B": pytest.approx(16, abs=1), "C": pytest.approx(8, abs=1)}
+
+
+def testColumnWidthIsCapped(tmp_path):
+    path = os.path.join(tmp_path, "report.xlsx")
+    workbook = ReportWorkbook(path, maxColumnWidth=40)
+    sheet = workbook.createSheet("Sheet")
+    writeUncoloredRow(sheet, 1, ["description", "x" * 1000])
+    resizeColumnWidth(sheet)
+    workbook.close()
+
+    assert readColumnWidths(path) == {"A": pytest.approx(16, abs=1), "B": pytest.approx(40, abs=1)}
+
+
+def testTallSheetsAreSampled(tmp_path):
+    workbook = ReportWorkbook(os.path.join(tmp_path, "report.xlsx"), widthSampleRows=10, widthSampleStride=5)
+    sheet = workbook.createSheet("Sheet")
+    for row in range(30):
+        # rows 0-9 are all measured, then rows 10, 15, 20 and 25
+        sheet.writeRow(row, ["x" * (row + 1) if row != 25 else "x"])
+        if row in (12, 20):
+            assert sheet.columnWidths[0] == {12: 11, 20: 21}[row]
+    assert sheet.columnWidths == {0: 21}
+    assert sheet.maxRow == 30
+    workbook.close()
+
+
+def testEveryRowIsMeasuredWithoutSampling(tmp_path):
+    workbook = ReportWorkbook(os.path.join(tmp_path, "report.xlsx"), widthSampleRows=None)
+    sheet = workbook.createSheet("Sheet")
+    for row in range(30):
+        sheet.writeRow(row, ["x" * (row + 1)])
+    assert sheet.columnWidths == {0: 30}
+    workbook.close()
+
+
+def testWideSheetsAreOnlyMeasuredUpToWidthSampleColumns(tmp_path):
+    workbook = ReportWorkbook(os.path.join(tmp_path, "report.xlsx"), widthSampleColumns=3)
+    sheet = workbook.createSheet("Sheet")
+    sheet.writeRow(0, [f"column{col}" for col in range(10)])
+    assert sorted(sheet.columnWidths) == [0, 1, 2]
+    # the written range still covers every column, e.g. for the filter
+    assert sheet.maxCol == 10
+    workbook.close()
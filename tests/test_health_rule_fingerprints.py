@@ -0,0 +1,78 @@
+import copy
+import json
+import os
+from collections import OrderedDict
+
+from backend.extractionSteps.HealthRuleFingerprints import CONTROLLER_DEFAULTS_DIR, HealthRuleFingerprints, canonicalize
+
+
+def healthRule() -> dict:
+    return {
+        "name": "Business Transaction response time is much higher than normal",
+        "enabled": True,
+        "affects": {
+            "affectedEntityType": "BUSINESS_TRANSACTION_PERFORMANCE",
+            "affectedBusinessTransactions": {"businessTransactionScope": "SPECIFIC_BUSINESS_TRANSACTIONS", "businessTransactions": ["/login", "/checkout"]},
+        },
+        "evalCriterias": {
+            "criticalCriteria": {
+                "conditionAggregationType": "ALL",
+                "conditions": [
+                    {"shortName": "A", "evalDetail": {"metricPath": "Average Response Time (ms)", "compareValue": 3}},
+                    {"shortName": "B", "evalDetail": {"metricPath": "Calls per Minute", "compareValue": 50}},
+                ],
+            }
+        },
+    }
+
+
+def testKeyOrderAndMappingTypeDoNotMatter():
+    rule = healthRule()
+    reordered = OrderedDict(reversed(list(rule.items())))
+    assert canonicalize(reordered) == canonicalize(rule)
+    # what a snapshot loads
+    assert canonicalize(json.loads(json.dumps(rule), object_pairs_hook=OrderedDict)) == canonicalize(rule)
+
+
+def testListsIgnoreOrderAndRepetitions():
+    rule = healthRule()
+    reordered = copy.deepcopy(rule)
+    reordered["affects"]["affectedBusinessTransactions"]["businessTransactions"] = ["/checkout", "/login", "/login"]
+    assert canonicalize(reordered) == canonicalize(rule)
+
+
+def testReorderedConditionsAreNotModified():
+    # same as DeepDiff(ignore_order=True)
+    rule = healthRule()
+    reordered = copy.deepcopy(rule)
+    reordered["evalCriterias"]["criticalCriteria"]["conditions"].reverse()
+    assert canonicalize(reordered) == canonicalize(rule)
+
+    changed = copy.deepcopy(rule)
+    changed["evalCriterias"]["criticalCriteria"]["conditions"][0]["evalDetail"]["compareValue"] = 4
+    assert canonicalize(changed) != canonicalize(rule)
+
+
+def testValueTypesAreKept():
+    assert canonicalize({"compareValue": 1}) != canonicalize({"compareValue": 1.0})
+    assert canonicalize({"compareValue": 1}) != canonicalize({"compareValue": True})
+    assert canonicalize({"compareValue": "1"}) != canonicalize({"compareValue": 1})
+
+
+def testDefaultsAreFoundFromAnyWorkingDirectory(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    assert os.path.isdir(CONTROLLER_DEFAULTS_DIR)
+    assert len(HealthRuleFingerprints("apm").names()) > 0
+    # no defaults file
+    assert len(HealthRuleFingerprints("mrum").names()) == 0
+
+
+def testCountModifiedIgnoresIdsAndCountsDeletedRules():
+    defaults = HealthRuleFingerprints("apm")
+    healthRules = {name: {**copy.deepcopy(rule), "id": idx} for idx, (name, rule) in enumerate(defaults.defaultHealthRules.items())}
+    assert defaults.countModified(healthRules) == 0
+
+    first, second = list(healthRules)[:2]
+    healthRules[first]["enabled"] = not healthRules[first]["enabled"]
+    del healthRules[second]
+    assert defaults.countModified(healthRules) == 2
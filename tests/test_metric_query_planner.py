@@ -0,0 +1,125 @@
+import asyncio
+import pickle
+
+from backend.api.Result import Result
+from backend.core.Engine import Engine
+from backend.extractionSteps.MetricQueryPlanner import MetricQueryPlanner, matchesMetricPath
+from backend.extractionSteps.maturityAssessment.apm.AppAgentsAPM import AppAgentsAPM
+from backend.extractionSteps.maturityAssessment.apm.MachineAgentsAPM import MachineAgentsAPM
+
+APP_AVAILABILITY = "Application Infrastructure Performance|*|Individual Nodes|*|Agent|App|Availability"
+MACHINE_AVAILABILITY = "Application Infrastructure Performance|*|Individual Nodes|*|Agent|Machine|Availability"
+BT_CALLS = "Business Transaction Performance|Business Transactions|*|*|Calls per Minute"
+BT_ERRORS = "Business Transaction Performance|Business Transactions|*|*|Errors per Minute"
+
+
+class FakeController:
+    host = "acme.saas.appdynamics.com"
+    timeRangeMins = 1440
+
+    def __init__(self, metrics: [str], error: Result.Error = None):
+        self.metrics = metrics
+        self.error = error
+        self.queries = []
+
+    async def getMetricData(self, applicationID, metric_path, rollup, time_range_type, duration_in_mins) -> Result:
+        self.queries.append((applicationID, metric_path))
+        await asyncio.sleep(0)
+        if self.error is not None:
+            return Result([], self.error)
+        pattern = metric_path.split("|")
+        return Result([{"metricPath": metric, "metricValues": [{"sum": 1}]} for metric in self.metrics if matchesMetricPath(pattern, metric)], None)
+
+
+def metricPathsOf(result: Result) -> [str]:
+    return [metric["metricPath"] for metric in result.data]
+
+
+def testMatchesMetricPath():
+    pattern = APP_AVAILABILITY.split("|")
+    assert matchesMetricPath(pattern, "Application Infrastructure Performance|Web|Individual Nodes|node1|Agent|App|Availability")
+    assert not matchesMetricPath(pattern, "Application Infrastructure Performance|Web|Individual Nodes|node1|Agent|Machine|Availability")
+    assert not matchesMetricPath(pattern, "Application Infrastructure Performance|Web|Individual Nodes|node1|Agent|App|Availability|Extra")
+
+
+def testPathsOfTheSameMetricAreMerged():
+    planner = MetricQueryPlanner([APP_AVAILABILITY, MACHINE_AVAILABILITY])
+    assert planner.queries == {
+        "Application Infrastructure Performance|*|Individual Nodes|*|Agent|*|Availability": [APP_AVAILABILITY, MACHINE_AVAILABILITY]
+    }
+
+
+def testMetricNamesAreNeverWidened():
+    planner = MetricQueryPlanner([BT_CALLS, BT_ERRORS, "Backends|*|Calls per Minute", "Backends|*|Errors per Minute"])
+    assert list(planner.queries) == [BT_CALLS, BT_ERRORS, "Backends|*|Calls per Minute", "Backends|*|Errors per Minute"]
+
+
+def testPathsDifferingInMoreThanMaxWidenedSegmentsAreNotMerged():
+    other = "Application Infrastructure Performance|*|Individual Nodes|*|Hardware|Machine|Availability"
+    assert len(MetricQueryPlanner([APP_AVAILABILITY, other]).queries) == 2
+    assert len(MetricQueryPlanner([APP_AVAILABILITY, other], maxWidenedSegments=2).queries) == 1
+
+
+def testMergedResponseIsSplitPerMetricPath():
+    metrics = [
+        "Application Infrastructure Performance|Web|Individual Nodes|node1|Agent|App|Availability",
+        "Application Infrastructure Performance|Web|Individual Nodes|node1|Agent|Machine|Availability",
+        "Application Infrastructure Performance|Web|Individual Nodes|node1|Agent|Other|Availability",
+    ]
+    controller = FakeController(metrics)
+    planner = MetricQueryPlanner([APP_AVAILABILITY, MACHINE_AVAILABILITY])
+
+    async def run():
+        return await asyncio.gather(planner.getMetricData(controller, 1, APP_AVAILABILITY), planner.getMetricData(controller, 1, MACHINE_AVAILABILITY))
+
+    app, machine = asyncio.run(run())
+    assert metricPathsOf(app) == [metrics[0]]
+    assert metricPathsOf(machine) == [metrics[1]]
+    assert controller.queries == [(1, "Application Infrastructure Performance|*|Individual Nodes|*|Agent|*|Availability")]
+    # every reader read its metrics
+    assert planner._results == {}
+
+
+def testErrorsReachEveryMetricPathOfTheQuery():
+    controller = FakeController([], error=Result.Error("504"))
+    planner = MetricQueryPlanner([APP_AVAILABILITY, MACHINE_AVAILABILITY])
+
+    async def run():
+        return await asyncio.gather(planner.getMetricData(controller, 1, APP_AVAILABILITY), planner.getMetricData(controller, 1, MACHINE_AVAILABILITY))
+
+    assert all(result.error is not None for result in asyncio.run(run()))
+
+
+def testUnplannedMetricPathsAreQueriedOnTheirOwn():
+    controller = FakeController(["Backends|db|Calls per Minute"])
+    planner = MetricQueryPlanner([APP_AVAILABILITY])
+    result = asyncio.run(planner.getMetricData(controller, 1, "Backends|*|Calls per Minute"))
+    assert metricPathsOf(result) == ["Backends|db|Calls per Minute"]
+    assert planner._results == {}
+
+
+def testClearDropsResultsNoStepRead():
+    controller = FakeController([])
+    planner = MetricQueryPlanner([APP_AVAILABILITY, MACHINE_AVAILABILITY])
+
+    async def run():
+        # the reader of the machine availability skipped this application
+        await planner.getMetricData(controller, 1, APP_AVAILABILITY)
+        left = len(planner._results)
+        planner.clear()
+        return left
+
+    assert asyncio.run(run()) == 1
+    assert planner._results == {}
+
+
+def testStepsArePickledWithoutTheirPlanner():
+    stepScheduler = Engine.createStepScheduler([AppAgentsAPM(), MachineAgentsAPM()])
+    jobStep = stepScheduler.jobSteps[0]
+    assert jobStep.metricQueryPlanner is stepScheduler.metricQueryPlanner
+
+    restored = pickle.loads(pickle.dumps(jobStep))
+    assert restored.metricQueryPlanner is None
+    assert restored.componentType == "apm"
+    # the step itself keeps its planner
+    assert jobStep.metricQueryPlanner is not None
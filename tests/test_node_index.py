@@ -0,0 +1,79 @@
+import json
+from collections import OrderedDict
+
+from backend.extractionSteps.NodeIndex import NodeIndex
+from backend.util.stdlib_utils import jsonEncoder
+
+
+def applications() -> OrderedDict:
+    # both applications have a node Web|node1, and share a name
+    return OrderedDict(
+        [
+            ("App1", {"id": 1, "name": "App", "nodes": [{"id": 10, "tierName": "Web", "name": "node1", "machineId": 100}]}),
+            ("App2", {"id": 2, "name": "App", "nodes": [{"id": 20, "tierName": "Web", "name": "node1", "machineId": 200}, {"id": 21, "tierName": "Web", "name": "node2", "machineId": 201}]}),
+        ]
+    )
+
+
+def nodeMetric(tierName: str, nodeName: str, value: int) -> dict:
+    return {"metricPath": f"Application Infrastructure Performance|{tierName}|Individual Nodes|{nodeName}|Agent|App|Availability", "metricValues": [{"sum": value}]}
+
+
+def indexOf(applications: OrderedDict) -> NodeIndex:
+    nodeIndex = NodeIndex()
+    for application in applications.values():
+        nodeIndex.addApplication(application, application["nodes"])
+    return nodeIndex
+
+
+def testApplicationRowsAreKeyedByApplicationId():
+    nodeIndex = indexOf(applications())
+    assert nodeIndex.applicationRows == {1: range(0, 1), 2: range(1, 3)}
+
+
+def testNodeMetricsMatchNodesOfTheirApplication():
+    apps = applications()
+    nodeIndex = indexOf(apps)
+    assert nodeIndex.setNodeMetric("appAgentAvailability", apps["App2"], [nodeMetric("Web", "node1", 1440), nodeMetric("Web", "node3", 5)]) == 1
+    assert nodeIndex.appAgentAvailability == [0, 1440, 0]
+    assert nodeIndex.availabilityPercentByNodeId(1440) == {10: 0, 20: 100, 21: 0}
+
+
+def testColumnsAreWrittenToTheNodes():
+    apps = applications()
+    nodeIndex = indexOf(apps)
+    nodeIndex.setNodeMetric("metricUploadRequestsExceedingLimit", apps["App1"], [nodeMetric("Web", "node1", 3)])
+    nodeIndex.appAgentAge[1] = 2
+    nodeIndex.writeToNodes(apps, ("appAgentAvailability", "metricUploadRequestsExceedingLimit", "appAgentAge"))
+
+    assert apps["App1"]["nodes"][0] == {
+        "id": 10,
+        "tierName": "Web",
+        "name": "node1",
+        "machineId": 100,
+        "appAgentAvailability": 0,
+        "nodeMetricsUploadRequestsExceedingLimit": 3,
+    }
+    assert apps["App2"]["nodes"][0]["appAgentAge"] == 2
+    # nodes without a parsable agent version get no age
+    assert "appAgentAge" not in apps["App2"]["nodes"][1]
+
+
+def testJsonRoundTrip():
+    apps = applications()
+    nodeIndex = indexOf(apps)
+    nodeIndex.setNodeMetric("appAgentAvailability", apps["App2"], [nodeMetric("Web", "node2", 7)])
+
+    restored = NodeIndex.fromJson(json.loads(json.dumps(nodeIndex, default=jsonEncoder)))
+    assert restored.applicationRows == nodeIndex.applicationRows
+    assert restored.__json__() == nodeIndex.__json__()
+    assert restored.setNodeMetric("appAgentAvailability", apps["App1"], [nodeMetric("Web", "node1", 1)]) == 0
+
+
+def testRebuiltFromNodesOfEarlierSnapshots():
+    apps = applications()
+    apps["App2"]["nodes"][1].update({"appAgentAvailability": 7, "nodeMetricsUploadRequestsExceedingLimit": 1, "machineAgentAge": 3})
+    nodeIndex = NodeIndex.fromNodes(apps)
+    assert nodeIndex.appAgentAvailability == [0, 0, 7]
+    assert nodeIndex.metricUploadRequestsExceedingLimit == [0, 0, 1]
+    assert nodeIndex.machineAgentAge == [None, None, 3]
@@ -0,0 +1,35 @@
+import pickle
+
+import pytest
+
+from backend.extractionSteps.maturityAssessment.apm.BackendsAPM import BackendsAPM
+from backend.extractionSteps.maturityAssessment.brum.NetworkRequestsBRUM import NetworkRequestsBRUM
+from backend.output.ReportRenderer import SavedController, createStep, stepClassNames
+from backend.util.stdlib_utils import jsonEncoder
+
+
+def testStepsAreCreatedByClassName():
+    steps = [BackendsAPM(), NetworkRequestsBRUM()]
+    classNames = stepClassNames(steps)
+    assert classNames == [
+        "backend.extractionSteps.maturityAssessment.apm.BackendsAPM.BackendsAPM",
+        "backend.extractionSteps.maturityAssessment.brum.NetworkRequestsBRUM.NetworkRequestsBRUM",
+    ]
+    # what worker processes receive instead of the steps
+    assert pickle.loads(pickle.dumps(classNames)) == classNames
+    assert [type(createStep(className)) for className in classNames] == [BackendsAPM, NetworkRequestsBRUM]
+
+
+def testSavedControllerKeepsTheSavedAttributes():
+    savedController = {"host": "acme.saas.appdynamics.com", "username": "foo", "timeRangeMins": 1440, "startTime": 0, "endTime": 86400000}
+    controller = SavedController(savedController)
+    assert controller.host == "acme.saas.appdynamics.com"
+    assert controller.endTime == 86400000
+    assert jsonEncoder(controller) == savedController
+
+
+def testSavedControllerExplainsMissingApiCalls():
+    controller = SavedController({"host": "acme.saas.appdynamics.com"})
+    with pytest.raises(AttributeError, match="AppDService.getApmApplications is not available.*--report-workers 1"):
+        controller.getApmApplications()
+    assert not hasattr(controller, "foo")
@@ -0,0 +1,131 @@
+import asyncio
+import inspect
+from types import SimpleNamespace
+
+import pytest
+
+from backend.api.appd.AppDController import AppdController
+from backend.api.appd.ControllerGateway import BufferedResponse, isCoalesced
+from backend.api.appd.RequestCoalescer import RequestCoalescer
+from backend.core.StepScheduler import StepScheduler
+from backend.extractionSteps.JobStepBase import JobStepBase
+
+
+class Responder:
+    def __init__(self, status: int = 200, body: bytes = b"{}", seconds: float = 0.01):
+        self.status = status
+        self.body = body
+        self.seconds = seconds
+        self.calls = 0
+
+    async def fetchResponse(self) -> BufferedResponse:
+        self.calls += 1
+        await asyncio.sleep(self.seconds)
+        return BufferedResponse(self.status, {}, self.body)
+
+
+def testIdenticalRequestsInFlightAreSentOnce():
+    async def run():
+        requestCoalescer = RequestCoalescer()
+        responder = Responder()
+        responses = await asyncio.gather(*[requestCoalescer.fetch("getTiers", (1,), {}, responder.fetchResponse) for _ in range(5)])
+        other = await requestCoalescer.fetch("getTiers", (2,), {}, responder.fetchResponse)
+        return requestCoalescer, responder, responses, other
+
+    requestCoalescer, responder, responses, other = asyncio.run(run())
+    assert responder.calls == 2
+    assert all(response is responses[0] for response in responses)
+    assert other is not responses[0]
+    assert requestCoalescer.shared == 4
+
+
+def testSuccessfulResponsesAreMemoizedUntilCleared():
+    async def run():
+        requestCoalescer = RequestCoalescer()
+        responder = Responder()
+        await requestCoalescer.fetch("getTiers", (1,), {}, responder.fetchResponse)
+        await requestCoalescer.fetch("getTiers", (1,), {}, responder.fetchResponse)
+        assert (responder.calls, requestCoalescer.memoHits, requestCoalescer.memoizedBytes) == (1, 1, 2)
+
+        requestCoalescer.clearMemo()
+        assert requestCoalescer.memoizedBytes == 0
+        await requestCoalescer.fetch("getTiers", (1,), {}, responder.fetchResponse)
+        return responder.calls
+
+    assert asyncio.run(run()) == 2
+
+
+@pytest.mark.parametrize("responder", [Responder(status=500), Responder(body=b"x" * 11)], ids=["failed", "large"])
+def testFailedAndLargeResponsesAreNotMemoized(responder):
+    async def run():
+        requestCoalescer = RequestCoalescer(maxBodyBytes=10)
+        for _ in range(2):
+            await requestCoalescer.fetch("getTiers", (1,), {}, responder.fetchResponse)
+        return requestCoalescer.memoHits
+
+    assert asyncio.run(run()) == 0
+    assert responder.calls == 2
+
+
+def testCancelledCallerDoesNotCancelTheSharedRequest():
+    async def run():
+        requestCoalescer = RequestCoalescer()
+        responder = Responder(seconds=0.05)
+        first = asyncio.ensure_future(requestCoalescer.fetch("getTiers", (1,), {}, responder.fetchResponse))
+        second = asyncio.ensure_future(requestCoalescer.fetch("getTiers", (1,), {}, responder.fetchResponse))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second, responder.calls
+
+    response, calls = asyncio.run(run())
+    assert response.status_code == 200
+    assert calls == 1
+
+
+def consumerMethod(name: str):
+    return inspect.getattr_static(AppdController, name)
+
+
+def testOnlyGetRequestsAndQueryPostsAreCoalesced():
+    assert isCoalesced("getTiers", consumerMethod("getTiers"))
+    assert isCoalesced("getHealthRule", consumerMethod("getHealthRule"))
+    assert isCoalesced("getAgentConfiguration", consumerMethod("getAgentConfiguration"))
+    # logins are always sent
+    assert not isCoalesced("login", consumerMethod("login"))
+    assert not isCoalesced("loginOAuth", consumerMethod("loginOAuth"))
+    # other POSTs are not known to be idempotent
+    assert not isCoalesced("getSnapshotsWithDataCollector", consumerMethod("getSnapshotsWithDataCollector"))
+    assert not isCoalesced("getSyntheticJobs", consumerMethod("getSyntheticJobs"))
+
+
+class FetchingStep(JobStepBase):
+    consumes = ()
+
+    def __init__(self, produces: tuple, responder: Responder, memoSizes: list):
+        super().__init__("apm")
+        self.produces = produces
+        self.responder = responder
+        self.memoSizes = memoSizes
+
+    async def extract(self, controllerData):
+        for hostInfo in controllerData.values():
+            await hostInfo["controller"].requestCoalescer.fetch("getTiers", (1,), {}, self.responder.fetchResponse)
+            self.memoSizes.append(hostInfo["controller"].requestCoalescer.memoizedBytes)
+
+    def analyze(self, controllerData, thresholds):
+        pass
+
+
+def testMemoLastsAcrossSteps():
+    requestCoalescer = RequestCoalescer()
+    controllerData = {"acme.saas.appdynamics.com": {"controller": SimpleNamespace(requestCoalescer=requestCoalescer)}}
+    responder = Responder()
+    memoSizes = []
+    # the steps write the same key, so they run one after the other
+    stepScheduler = StepScheduler([FetchingStep(("apm.tiers",), responder, memoSizes) for _ in range(3)])
+
+    asyncio.run(stepScheduler.extract(controllerData))
+    # later steps are served the response the first step fetched
+    assert responder.calls == 1
+    assert requestCoalescer.memoHits == 2
+    assert memoSizes == [2, 2, 2]
@@ -0,0 +1,77 @@
+import importlib
+import os
+
+import pytest
+
+from backend.api.appd.ResponseCache import ResponseCache
+
+responseCacheModule = importlib.import_module("backend.api.appd.ResponseCache")
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(responseCacheModule.time, "time", lambda: now[0])
+    return now
+
+
+def key(endpoint: str, *args, username: str = "foo", **kwargs) -> str:
+    return ResponseCache.key("acme.saas.appdynamics.com", "acme", username, endpoint, args, kwargs)
+
+
+def testKeyDependsOnUserAndRequest():
+    assert key("getHealthRule", 1, 2) == key("getHealthRule", 1, 2)
+    assert key("getHealthRule", 1, 2) != key("getHealthRule", 1, 3)
+    assert key("getHealthRule", 1, 2) != key("getDashboard", 1, 2)
+    # users with different permissions never share responses
+    assert key("getHealthRule", 1, 2) != key("getHealthRule", 1, 2, username="bar")
+    assert key("getAgentConfiguration", body="a") != key("getAgentConfiguration", body="b")
+
+
+def testGetReturnsWhatWasPut(tmp_path, clock):
+    responseCache = ResponseCache(str(tmp_path), ttlSeconds=600, maxBytes=1024)
+    assert responseCache.get(key("getDashboard", 1)) is None
+    responseCache.put(key("getDashboard", 1), 200, b'{"id": 1}')
+
+    assert responseCache.get(key("getDashboard", 1)) == (200, b'{"id": 1}')
+    assert responseCache.get(key("getDashboard", 1, username="bar")) is None
+    assert (responseCache.hits, responseCache.misses) == (1, 2)
+
+
+def testEntriesExpireAfterTtl(tmp_path, clock):
+    responseCache = ResponseCache(str(tmp_path), ttlSeconds=600, maxBytes=1024)
+    responseCache.put(key("getDashboard", 1), 200, b"{}")
+
+    clock[0] += 600
+    assert responseCache.get(key("getDashboard", 1)) == (200, b"{}")
+    clock[0] += 1
+    assert responseCache.get(key("getDashboard", 1)) is None
+    # the expired entry is removed
+    assert os.listdir(tmp_path) == []
+    assert responseCache.sizeBytes == 0
+
+
+def testLeastRecentlyUsedEntriesAreEvicted(tmp_path, clock):
+    body = b"x" * 1000
+    responseCache = ResponseCache(str(tmp_path), ttlSeconds=600, maxBytes=4500)
+    for idx in range(4):
+        responseCache.put(key("getDashboard", idx), 200, body)
+        # file modification times are the access times
+        os.utime(os.path.join(tmp_path, key("getDashboard", idx)), (idx, idx))
+    entrySize = responseCache.sizeBytes // 4
+
+    # a hit makes dashboard 0 the most recently used entry
+    assert responseCache.get(key("getDashboard", 0)) is not None
+    responseCache.put(key("getDashboard", 4), 200, body)
+
+    assert responseCache.sizeBytes <= 4500 * 0.9
+    assert responseCache.sizeBytes == entrySize * len(os.listdir(tmp_path))
+    assert responseCache.get(key("getDashboard", 1)) is None
+    assert responseCache.get(key("getDashboard", 0)) is not None
+    assert responseCache.get(key("getDashboard", 4)) is not None
+
+
+def testSizeIsReadBackOnStart(tmp_path, clock):
+    ResponseCache(str(tmp_path), ttlSeconds=600, maxBytes=1024).put(key("getDashboard", 1), 200, b"{}")
+    responseCache = ResponseCache(str(tmp_path), ttlSeconds=600, maxBytes=1024)
+    assert responseCache.sizeBytes == os.path.getsize(os.path.join(tmp_path, key("getDashboard", 1)))
@@ -0,0 +1,92 @@
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+from backend.extractionSteps.ResultTable import ResultTable
+from backend.extractionSteps.ThresholdTable import ThresholdTable
+from backend.extractionSteps.maturityAssessment.apm.BackendsAPM import BackendsAPM
+from backend.extractionSteps.maturityAssessment.brum.OverallAssessmentBRUM import OverallAssessmentBRUM
+from backend.output.ControllerDataSnapshot import ControllerDataSnapshot
+from backend.output.ReportRenderer import SavedController
+
+HOST = "acme.saas.appdynamics.com"
+
+
+def hostInfo(componentType: str, applications: [str]) -> dict:
+    return {
+        "controller": SavedController({"host": HOST}),
+        componentType: OrderedDict((name, {"id": idx, "name": name, "description": ""}) for idx, name in enumerate(applications, start=1)),
+    }
+
+
+def analyzedBackends() -> BackendsAPM:
+    jobStep = BackendsAPM()
+    info = hostInfo("apm", ["App1", "App2"])
+    for idx, application in enumerate(info["apm"].values(), start=1):
+        analysisDataRoot = {"evaluated": {"numberOfCustomBackendRules": idx, "backendLimitNotHit": True}, "raw": {"backendCount": idx * 10}}
+        jobStep.results.append(info, application, analysisDataRoot)
+    thresholds = {
+        "platinum": {"numberOfCustomBackendRules": 1, "backendLimitNotHit": True},
+        "gold": {"numberOfCustomBackendRules": 2, "backendLimitNotHit": True},
+        "silver": {"numberOfCustomBackendRules": 3, "backendLimitNotHit": False},
+        "direction": {"numberOfCustomBackendRules": "increasing", "backendLimitNotHit": "decreasing"},
+    }
+    jobStep.applyThresholds(jobStep.results, {"table": ThresholdTable(thresholds)})
+    return jobStep
+
+
+def testRowsAreTurnedIntoColumns():
+    results = analyzedBackends().results
+    assert len(results) == 2
+    assert results.keyColumns() == [[HOST] * 2, ["App1", "App2"], [1, 2], ["", ""]]
+    assert results.scores.tolist() == ["platinum", "gold"]
+    assert results.evaluated["backendLimitNotHit"].dtype == np.dtype(bool)
+    assert results.evaluatedLevels["numberOfCustomBackendRules"].tolist() == ["platinum", "gold"]
+    # the rows aren't kept once they are columns
+    assert results._analysisDataRoots == []
+
+
+def testRowOfOneApplication():
+    results = analyzedBackends().results
+    assert results.row(HOST, "App2") == {
+        "computed": "gold",
+        "evaluated": {"numberOfCustomBackendRules": [2, "gold"], "backendLimitNotHit": [True, "platinum"]},
+        "raw": {"backendCount": 20},
+    }
+    assert results.row(HOST, "App3") == {}
+
+
+def testResultsAreRestoredFromTheSavedResults(tmp_path):
+    jobStep = analyzedBackends()
+    snapshot = ControllerDataSnapshot()
+    snapshot.writeResults(os.path.join(tmp_path, ControllerDataSnapshot.RESULTS_FILE_NAME), [jobStep])
+
+    restored = BackendsAPM()
+    restored.restoreAnalysis(OrderedDict(), ControllerDataSnapshot.readResults(os.path.join(tmp_path, snapshot.fileName)))
+    assert restored.results.__json__() == jobStep.results.__json__()
+    assert restored.results.evaluated["numberOfCustomBackendRules"].dtype == jobStep.results.evaluated["numberOfCustomBackendRules"].dtype
+    assert restored.results.evaluated["backendLimitNotHit"].dtype == np.dtype(bool)
+
+
+def testOverallAssessmentScoresTheResultsOfTheOtherSteps():
+    controllerData = OrderedDict([(HOST, hostInfo("brum", ["Web1", "Web2"]))])
+    stepResults = OrderedDict()
+    for jobStepName, scores in (("NetworkRequestsBRUM", ["platinum", "silver"]), ("HealthRulesAndAlertingBRUM", ["gold", "bronze"])):
+        stepResults[jobStepName] = ResultTable("brum")
+        stepResults[jobStepName].scores = np.array(scores, dtype=object)
+    metrics = ("percentageTotalPlatinum", "percentageTotalGoldOrBetter", "percentageTotalSilverOrBetter")
+    thresholds = {
+        "platinum": dict(zip(metrics, (50, 50, 100))),
+        "gold": dict(zip(metrics, (0, 50, 90))),
+        "silver": dict(zip(metrics, (0, 0, 80))),
+        "direction": dict.fromkeys(metrics, "decreasing"),
+    }
+
+    jobStep = OverallAssessmentBRUM()
+    jobStep.stepResults = stepResults
+    jobStep.analyze(controllerData, {"brum": {"OverallAssessmentBRUM": {"table": ThresholdTable(thresholds)}}})
+    assert jobStep.results.evaluated["percentageTotalGoldOrBetter"].tolist() == [100, 0]
+    assert jobStep.results.scores.tolist() == ["platinum", "bronze"]
+    # the results are only kept in the table
+    assert "OverallAssessmentBRUM" not in controllerData[HOST]["brum"]["Web1"]
@@ -0,0 +1,56 @@
+import random
+
+from backend.util.stdlib_utils import AhoCorasick, get_fields_recursively, get_recursively
+
+
+def naiveSearch(patterns: [str], text: str) -> set:
+    return {idx for idx, pattern in enumerate(patterns) if pattern in text}
+
+
+def testAhoCorasickFindsOverlappingAndNestedPatterns():
+    patterns = ["he", "she", "his", "hers", "App", "App1"]
+    matcher = AhoCorasick(patterns)
+    assert matcher.search("ushers") == {0, 1, 3}
+    assert matcher.search("this App1 dashboard") == {2, 4, 5}
+    assert matcher.search("") == set()
+    assert matcher.search("nothing") == set()
+
+
+def testAhoCorasickDuplicateAndEmptyPatterns():
+    matcher = AhoCorasick(["App", "App", ""])
+    assert matcher.search("my App") == {0, 1, 2}
+    assert matcher.search("other") == {2}
+    assert AhoCorasick([]).search("App") == set()
+
+
+def testAhoCorasickMatchesNaiveSearch():
+    rng = random.Random(7)
+    for _ in range(200):
+        patterns = ["".join(rng.choice("ab|") for _ in range(rng.randint(1, 4))) for _ in range(rng.randint(1, 8))]
+        text = "".join(rng.choice("ab|c") for _ in range(rng.randint(0, 30)))
+        assert AhoCorasick(patterns).search(text) == naiveSearch(patterns, text), (patterns, text)
+
+
+def testGetFieldsRecursivelySearchesNestedDictsAndLists():
+    dashboard = {
+        "name": "Dashboard",
+        "widgetTemplates": [
+            {"applicationName": "App1", "dataSeriesTemplates": [{"metricMatchCriteriaTemplate": {"applicationName": "App2"}}]},
+            {"adqlQueryList": ["SELECT * FROM transactions WHERE application = 'App3'"], "applicationId": 3},
+            "not a dict",
+        ],
+        "applicationId": [4, 5],
+    }
+    assert get_fields_recursively(dashboard, ("applicationName", "applicationId", "adqlQueryList")) == {
+        "applicationName": {"App1", "App2"},
+        "applicationId": {3, 4, 5},
+        "adqlQueryList": {"SELECT * FROM transactions WHERE application = 'App3'"},
+    }
+    assert get_recursively(dashboard, "applicationName") == {"App1", "App2"}
+    assert get_recursively(dashboard, "missing") == set()
+
+
+def testDictsInListsOfListsAreNotSearched():
+    data = {"applicationName": "App1", "nested": {"applicationName": "App2"}, "lists": [[{"applicationName": "App3"}]]}
+    # same as the recursive search it replaced
+    assert get_recursively(data, "applicationName") == {"App1", "App2"}
@@ -0,0 +1,54 @@
+import numpy as np
+
+from backend.extractionSteps.ThresholdTable import ThresholdTable
+
+
+def thresholdTable() -> ThresholdTable:
+    return ThresholdTable(
+        {
+            "platinum": {"percentAgentsReportingData": 100, "numberOfCustomBackendRules": 0, "metricLimitNotHit": True},
+            "gold": {"percentAgentsReportingData": 80, "numberOfCustomBackendRules": 2, "metricLimitNotHit": True},
+            "silver": {"percentAgentsReportingData": 50, "numberOfCustomBackendRules": 5, "metricLimitNotHit": False},
+            "direction": {"percentAgentsReportingData": "decreasing", "numberOfCustomBackendRules": "increasing", "metricLimitNotHit": "decreasing"},
+        }
+    )
+
+
+def score(*rows) -> (list, list):
+    applicationLevels, metricLevels = thresholdTable().score(np.array(rows, dtype=float))
+    return applicationLevels.tolist(), metricLevels.tolist()
+
+
+def testDecreasingMetricsMeetThresholdsAtOrAbove():
+    applicationLevels, metricLevels = score([100, 0, True], [80, 0, True], [79.9, 0, True], [10, 0, True])
+    assert [levels[0] for levels in metricLevels] == ["platinum", "gold", "silver", "bronze"]
+    assert applicationLevels == ["platinum", "gold", "silver", "bronze"]
+
+
+def testIncreasingMetricsMeetThresholdsAtOrBelow():
+    applicationLevels, metricLevels = score([100, 0, True], [100, 2, True], [100, 3, True], [100, 6, True])
+    assert [levels[1] for levels in metricLevels] == ["platinum", "gold", "silver", "bronze"]
+    assert applicationLevels == ["platinum", "gold", "silver", "bronze"]
+
+
+def testApplicationLevelIsTheBestLevelAllMetricsMeet():
+    applicationLevels, metricLevels = score([100, 2, True], [100, 0, False])
+    assert metricLevels == [["platinum", "gold", "platinum"], ["platinum", "platinum", "silver"]]
+    assert applicationLevels == ["gold", "silver"]
+
+
+def testBoolMetricsCompareLikeZeroAndOne():
+    _, metricLevels = score([100, 0, True], [100, 0, False])
+    assert [levels[2] for levels in metricLevels] == ["platinum", "silver"]
+
+
+def testNanMeetsNoThreshold():
+    applicationLevels, metricLevels = score([np.nan, 0, True], [100, np.nan, True])
+    assert metricLevels == [["bronze", "platinum", "platinum"], ["platinum", "bronze", "platinum"]]
+    assert applicationLevels == ["bronze", "bronze"]
+
+
+def testNoApplications():
+    applicationLevels, metricLevels = thresholdTable().score(np.empty((0, 3)))
+    assert applicationLevels.shape == (0,)
+    assert metricLevels.shape == (0, 3)